@@ -208,6 +208,18 @@ CACHES = {
         'OPTIONS': {
             'MAX_ENTRIES': 500
         }
+    },
+    # Public parts catalogue payloads (parts.payload_cache). Sized to hold
+    # every live section and model page for a couple of origins (about 2,000
+    # sections today), so the catalogue does not cull its own entries; entries
+    # are retired by catalogue version, not by this timeout.
+    'parts_payloads': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'parts-payloads',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000
+        }
     }
 }
 
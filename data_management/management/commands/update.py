@@ -22,6 +22,22 @@ class Command(BaseCommand):
                 'Without a target, restore the entire database archive.'
             ),
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='With --parts, parse books in this many processes; one process writes to the database.',
+        )
+        parser.add_argument(
+            '--staged',
+            action='store_true',
+            help='With --prices, apply the feed through the staging table with set-based statements.',
+        )
+        parser.add_argument(
+            '--pandas',
+            action='store_true',
+            help='With --prices, parse the feed with pandas column operations.',
+        )
 
     def handle(self, *args, **options):
         if options['parts']:
@@ -29,9 +45,15 @@ class Command(BaseCommand):
                 stdout=self.stdout,
                 stderr=self.stderr,
                 archive=options['archive'],
+                workers=options['workers'],
             )
         elif options['prices']:
-            update_prices.run(stdout=self.stdout, archive=options['archive'])
+            update_prices.run(
+                stdout=self.stdout,
+                archive=options['archive'],
+                staged=options['staged'],
+                pandas=options['pandas'],
+            )
         elif options['curated']:
             update_curated.run(stdout=self.stdout, stderr=self.stderr)
         elif options['archive']:
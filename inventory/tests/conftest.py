@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_inventory_media_root(tmp_path, settings):
+    """Prevent motorcycle image tests writing uploads and thumbnails into real media."""
+    settings.MEDIA_ROOT = tmp_path
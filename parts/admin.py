@@ -1,18 +1,35 @@
 from django.contrib import admin
 
-from .models import Part, PartsModel, PartSection, PartsSettings, SectionPart
+from .models import Part, PartPriceChange, PartsModel, PartSection, PartsSettings, SectionPart, SyncRun
+
+
+class CataloguePayloadAdmin(admin.ModelAdmin):
+    """Retire the cached catalogue payloads after an edit made here."""
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        PartsSettings.bump_catalogue_version()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        PartsSettings.bump_catalogue_version()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        PartsSettings.bump_catalogue_version()
 
 
 class PartSectionInline(admin.TabularInline):
     model = PartSection
     extra = 0
-    fields = ('code', 'group', 'name', 'sort_order')
+    fields = ('code', 'group', 'name', 'sort_order', 'added_in_version', 'retired_in_version')
+    readonly_fields = ('added_in_version', 'retired_in_version')
     show_change_link = True
 
 
 @admin.register(PartsModel)
-class PartsModelAdmin(admin.ModelAdmin):
-    list_display = ('name', 'model_code', 'cc_class', 'is_active', 'last_ingested_at')
+class PartsModelAdmin(CataloguePayloadAdmin):
+    list_display = ('name', 'model_code', 'cc_class', 'is_active', 'catalog_version', 'last_ingested_at')
     list_filter = ('cc_class', 'is_active')
     search_fields = ('name', 'model_code')
     prepopulated_fields = {'slug': ('name',)}
@@ -27,20 +44,40 @@ class SectionPartInline(admin.TabularInline):
 
 
 @admin.register(PartSection)
-class PartSectionAdmin(admin.ModelAdmin):
-    list_display = ('parts_model', 'code', 'group', 'name')
+class PartSectionAdmin(CataloguePayloadAdmin):
+    list_display = ('parts_model', 'code', 'group', 'name', 'added_in_version', 'retired_in_version')
     list_filter = ('group',)
     search_fields = ('code', 'name', 'parts_model__model_code')
     inlines = [SectionPartInline]
 
 
+class PartPriceChangeInline(admin.TabularInline):
+    model = PartPriceChange
+    extra = 0
+    can_delete = False
+    fields = ('changed_at', 'previous_price', 'wholesale_price_incl_gst', 'previous_available', 'available_qty')
+    readonly_fields = fields
+    ordering = ('-changed_at',)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Part)
-class PartAdmin(admin.ModelAdmin):
+class PartAdmin(CataloguePayloadAdmin):
     list_display = ('part_number', 'description', 'colour_name', 'wholesale_price_incl_gst', 'available_qty', 'in_pa_feed')
     list_filter = ('in_pa_feed',)
     search_fields = ('part_number', 'base_part_number', 'description')
+    inlines = [PartPriceChangeInline]
 
 
 @admin.register(PartsSettings)
 class PartsSettingsAdmin(admin.ModelAdmin):
     list_display = ('markup_percentage', 'shipping_fee', 'backorder_hold_days', 'enable_new_part_sales', 'updated_at')
+
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'seconds', 'pipeline', 'succeeded')
+    list_filter = ('succeeded', 'pipeline')
+    readonly_fields = ('started_at', 'finished_at', 'seconds', 'pipeline', 'succeeded', 'failures', 'stages', 'report_path')
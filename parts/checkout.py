@@ -51,11 +51,13 @@ def create_parts_order(*, customer, items):
         part = Part.objects.filter(part_number=part_number).first()
         fitment_key = (line.get('fitment_key') or '').strip()
         section_part_id = line.get('section_part_id')
-        fitment_filter = {'fitment_key': fitment_key} if fitment_key else {'pk': section_part_id}
+        if part and not fitment_key and section_part_id:
+            # Legacy lines carry a pk that a later build may have replaced.
+            fitment_key = SectionPart.objects.fitment_key_for(section_part_id) or ''
         section_part = (
-            SectionPart.objects.select_related('section', 'section__parts_model')
-            .filter(part=part, **fitment_filter).first()
-            if part and (fitment_key or section_part_id) else None
+            SectionPart.objects.live().select_related('section', 'section__parts_model')
+            .filter(part=part, fitment_key=fitment_key).first()
+            if part and fitment_key else None
         )
         if not part or not part.is_orderable or not section_part:
             unavailable.append(part_number)
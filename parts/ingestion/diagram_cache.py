@@ -0,0 +1,59 @@
+"""Content-addressed cache of encoded WebP diagrams.
+
+Lossless ``method=6`` WebP is the slowest setting Pillow has, and many SYM
+books print the same exploded diagram for several model variants. Entries are
+keyed by the source image's sha256 plus a fingerprint of the encoder options,
+so an identical diagram is encoded once however many sections, books or
+re-imports use it, and changing the options simply misses the old entries.
+
+    <sym_parts_files>/diagram_cache/<ab>/<source sha256>-<options>.webp
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from parts.ingestion import storage
+from parts.ingestion.diagram_images import diagram_webp_bytes, source_format, webp_options
+
+CACHE_DIRECTORY = "diagram_cache"
+
+
+def cache_dir():
+    return Path(storage.BASE_DIR) / CACHE_DIRECTORY
+
+
+def options_tag(options):
+    encoded = json.dumps(options, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+def entry_path(source_hash, options):
+    return cache_dir() / source_hash[:2] / f"{source_hash}-{options_tag(options)}.webp"
+
+
+def cached_webp_bytes(data, *, source_hash=None):
+    """Return ``diagram_webp_bytes(data)``, encoding only on a cache miss."""
+    source_hash = source_hash or storage.sha256_bytes(data)
+    path = entry_path(source_hash, webp_options(source_format(data)))
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    webp = diagram_webp_bytes(data)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so a concurrent reader never sees a partial entry.
+    partial = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    partial.write_bytes(webp)
+    os.replace(partial, path)
+    return webp
+
+
+def iter_entries():
+    """Yield ``(source_hash, path)`` for every cache entry."""
+    root = cache_dir()
+    if not root.exists():
+        return
+    for path in root.glob("*/*.webp"):
+        yield path.name.split("-", 1)[0], path
@@ -3,6 +3,8 @@ from io import BytesIO
 
 from PIL import Image
 
+from parts.ingestion import metrics
+
 
 def diagram_webp_bytes(data: bytes) -> bytes:
     """Encode a supplier diagram as WebP without changing its source fingerprint.
@@ -11,7 +13,8 @@ def diagram_webp_bytes(data: bytes) -> bytes:
     source sheets are already lossy photographs/screenshots; high-quality WebP
     keeps their labels legible while reducing their transfer size.
     """
-    with Image.open(BytesIO(data)) as image:
+    with metrics.stage("diagram_webp_bytes") as counts, Image.open(BytesIO(data)) as image:
+        counts.bytes = len(data)
         image.load()
         return diagram_webp_from_image(image, source_format=image.format)
 
@@ -23,10 +26,18 @@ def diagram_webp_from_image(image: Image.Image, *, source_format: str | None = N
         image = image.convert("RGBA" if has_alpha else "RGB")
 
     output = BytesIO()
-    options = {"format": "WEBP", "method": 6}
-    if (source_format or "").upper() == "PNG":
-        options.update({"lossless": True, "quality": 100})
-    else:
-        options.update({"quality": 90})
-    image.save(output, **options)
+    image.save(output, format="WEBP", **webp_options(source_format))
     return output.getvalue()
+
+
+def webp_options(source_format: str | None) -> dict:
+    """Pillow WebP encoder options for a diagram of the given source format."""
+    if (source_format or "").upper() == "PNG":
+        return {"method": 6, "lossless": True, "quality": 100}
+    return {"method": 6, "quality": 90}
+
+
+def source_format(data: bytes) -> str | None:
+    """The image format of ``data``, read from its header without decoding."""
+    with Image.open(BytesIO(data)) as image:
+        return image.format
@@ -1,16 +1,17 @@
 """Extract exploded-diagram images from a BIFF8 (.xls) SYM parts book.
 
 The diagrams are stored as Escher BStore BLIP records inside the OLE ``Workbook``
-stream. This module reassembles the drawing records from the BIFF stream, decodes
-each image, and maps every worksheet to its largest diagram (its ``pib`` blip
-reference). Pure Python — no LibreOffice, no OCR. Proven in the feasibility spike.
+stream. This module reassembles the drawing records from the BIFF stream, indexes
+each image by offset, sizes the referenced ones from their PNG/JPEG headers, and
+maps every worksheet to its largest diagram (its ``pib`` blip reference). Pixels
+are never decoded here. Pure Python — no LibreOffice, no OCR. Proven in the
+feasibility spike.
 """
-import io
 import logging
 import struct
 
-import olefile
-from PIL import Image
+from . import metrics
+from .workbook import as_workbook
 
 logger = logging.getLogger(__name__)
 
@@ -35,91 +36,148 @@ _JPG_SIG = b"\xff\xd8\xff"
 
 def _iter_biff_records(stream):
     """Yield (record_type, body) for each BIFF record, merging CONTINUE records
-    into the preceding record's body."""
-    i, n = 0, len(stream)
-    prev = None  # (rtype, bytearray)
+    into the preceding record's body.
+
+    Bodies are zero-copy ``memoryview`` slices of ``stream``. Only a record
+    followed by CONTINUE records is copied, to stitch its pieces into bytes.
+    """
+    view = memoryview(stream)
+    i, n = 0, len(view)
     while i + 4 <= n:
-        rtype, rlen = struct.unpack_from("<HH", stream, i)
+        rtype, rlen = struct.unpack_from("<HH", view, i)
         i += 4
-        body = stream[i:i + rlen]
+        body = view[i:i + rlen]
         i += rlen
-        if rtype == _CONTINUE and prev is not None:
-            prev[1].extend(body)
+        pieces = None
+        while i + 4 <= n:
+            next_type, next_len = struct.unpack_from("<HH", view, i)
+            if next_type != _CONTINUE:
+                break
+            if pieces is None:
+                pieces = [body]
+            pieces.append(view[i + 4:i + 4 + next_len])
+            i += 4 + next_len
+        yield rtype, body if pieces is None else b"".join(pieces)
+
+
+def _png_size(buf, start, end):
+    # IHDR is always the first chunk: length, b"IHDR", width, height (big-endian).
+    if end - start < 24 or buf[start + 12:start + 16] != b"IHDR":
+        return None
+    return struct.unpack_from(">II", buf, start + 16)
+
+
+# Start-of-frame markers carry the image size; DHT (C4), JPG (C8) and DAC (CC)
+# share the range but do not.
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_JPEG_STANDALONE_MARKERS = {0x01, *range(0xD0, 0xD9)}
+_JPEG_SOS = 0xDA
+
+
+def _jpeg_size(buf, start, end):
+    i = start + 2
+    while i + 4 <= end:
+        if buf[i] != 0xFF:
+            return None
+        marker = buf[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            i += 2
             continue
-        if prev is not None:
-            yield prev[0], bytes(prev[1])
-        prev = (rtype, bytearray(body))
-    if prev is not None:
-        yield prev[0], bytes(prev[1])
+        if marker == _JPEG_SOS:
+            return None
+        (seg_len,) = struct.unpack_from(">H", buf, i + 2)
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 9 > end:
+                return None
+            height, width = struct.unpack_from(">HH", buf, i + 5)
+            return width, height
+        i += 2 + seg_len
+    return None
 
 
-def _decode_blip_body(bse_body):
-    """Return decoded (image_bytes, size) from a BSE record body, or None."""
-    idx = bse_body.find(_JPG_SIG)
+def _image_size(buf, start, end):
+    """Return ``(w, h)`` from a PNG/JPEG header at ``buf[start:end]``, or None.
+
+    Only the header is read; no pixels are decoded.
+    """
+    if buf.startswith(_PNG_SIG, start, end):
+        size = _png_size(buf, start, end)
+    elif buf.startswith(_JPG_SIG, start, end):
+        size = _jpeg_size(buf, start, end)
+    else:
+        size = None
+    if not size or not size[0] or not size[1]:
+        return None
+    return size
+
+
+def _blip_span(buf, start, end):
+    """Offsets of the PNG/JPEG image embedded in a BSE record body, or None."""
+    idx = buf.find(_JPG_SIG, start, end)
     if idx < 0:
-        idx = bse_body.find(_PNG_SIG)
+        idx = buf.find(_PNG_SIG, start, end)
     if idx < 0:
         return None
-    blob = bse_body[idx:]
-    try:
-        im = Image.open(io.BytesIO(blob))
-        im.load()
-        return blob, im.size
-    except Exception:
-        return None
+    return idx, end
 
 
 def _walk_escher(buf, callback):
     """Walk an Escher record tree, invoking callback(rtype, ver_inst, body) for
-    each record and recursing into containers."""
-    i, n = 0, len(buf)
+    each record and recursing into containers. Bodies are memoryview slices."""
+    view = memoryview(buf)
+    i, n = 0, len(view)
     while i + 8 <= n:
-        ver_inst, rtype, rlen = struct.unpack_from("<HHI", buf, i)
+        ver_inst, rtype, rlen = struct.unpack_from("<HHI", view, i)
         i += 8
-        body = buf[i:i + rlen]
+        body = view[i:i + rlen]
         callback(rtype, ver_inst, body)
         if (ver_inst & 0x0F) == 0x0F and rtype in _ESCHER_CONTAINERS:
             _walk_escher(body, callback)
         i += rlen
 
 
-def _extract_ordered_blips(drawing_group):
-    """Return an ordered list of decoded blips (index i -> BStore index i+1).
+def _find_bstore(buf, start=0, end=None):
+    """Return the ``(start, end)`` offsets of the BStoreContainer body, or None."""
+    i = start
+    end = len(buf) if end is None else end
+    while i + 8 <= end:
+        ver_inst, rtype, rlen = struct.unpack_from("<HHI", buf, i)
+        i += 8
+        body_end = min(i + rlen, end)
+        if rtype == _BSTORE_CONTAINER:
+            return i, body_end
+        if (ver_inst & 0x0F) == 0x0F and rtype in _ESCHER_CONTAINERS:
+            found = _find_bstore(buf, i, body_end)
+            if found is not None:
+                return found
+        i += rlen
+    return None
 
-    Each entry is (image_bytes, (w, h)) or None if a blip failed to decode.
-    """
-    blips = []
 
-    # Descend to the BStoreContainer and iterate its BSE children directly, in
-    # order, so the position gives the 1-based BStore index.
-    def find_bstore(buf):
-        i, n = 0, len(buf)
-        while i + 8 <= n:
-            ver_inst, rtype, rlen = struct.unpack_from("<HHI", buf, i)
-            i += 8
-            body = buf[i:i + rlen]
-            if rtype == _BSTORE_CONTAINER:
-                return body
-            if (ver_inst & 0x0F) == 0x0F and rtype in _ESCHER_CONTAINERS:
-                found = find_bstore(body)
-                if found is not None:
-                    return found
-            i += rlen
-        return None
+def _index_blips(drawing_group):
+    """Return an ordered list of blip spans (index i -> BStore index i+1).
 
-    bstore = find_bstore(drawing_group)
+    Each entry is the ``(start, end)`` offsets of the embedded PNG/JPEG within
+    ``drawing_group``, or None for a BSE without one. Nothing is decoded: a
+    workbook's BStore also holds logos and duplicates no sheet ever picks.
+    """
+    blips = []
+    bstore = _find_bstore(drawing_group)
     if bstore is None:
         return blips
 
-    i, n = 0, len(bstore)
-    while i + 8 <= n:
-        ver_inst, rtype, rlen = struct.unpack_from("<HHI", bstore, i)
+    # Iterate the BSE children in order, so the position gives the 1-based
+    # BStore index.
+    i, end = bstore
+    while i + 8 <= end:
+        ver_inst, rtype, rlen = struct.unpack_from("<HHI", drawing_group, i)
         i += 8
-        body = bstore[i:i + rlen]
-        i += rlen
         if rtype == _BSE:
-            decoded = _decode_blip_body(body)
-            blips.append(decoded)
+            blips.append(_blip_span(drawing_group, i, min(i + rlen, end)))
+        i += rlen
     return blips
 
 
@@ -145,21 +203,20 @@ def _sheet_pib_indices(msodrawing_body):
     return indices
 
 
-def extract_diagrams(xls_path):
-    """Map each worksheet name to its diagram image bytes.
+def read_workbook_stream(source):
+    """Return the raw BIFF ``Workbook`` stream of an .xls path or WorkbookFile."""
+    return as_workbook(source).stream
 
-    Returns ``{sheet_name: png_or_jpeg_bytes}`` for every sheet that references a
-    decodable diagram (its largest referenced blip). Sheets without a diagram are
-    omitted.
-    """
-    ole = olefile.OleFileIO(xls_path)
-    try:
-        stream_name = "Workbook" if ole.exists("Workbook") else "Book"
-        wb = ole.openstream(stream_name).read()
-    finally:
-        ole.close()
 
-    drawing_group = bytearray()
+def collect_drawings(wb):
+    """Split a Workbook stream into its drawing records.
+
+    Returns ``(drawing_group, sheet_names, sheet_drawings)``: the globals
+    MSODRAWINGGROUP bytes (which hold the BStore), the worksheet names in
+    order, and ``{worksheet_index: [msodrawing body, ...]}``. Worksheet bodies
+    are views into ``wb`` unless they had to be stitched.
+    """
+    drawing_group = []
     sheet_names = []
     sheet_drawings = {}  # worksheet_index -> list[msodrawing body]
     # substream_index: 0 = globals substream, 1.. = worksheets in order.
@@ -176,34 +233,75 @@ def extract_diagrams(xls_path):
         if substream_index == 0:
             # globals substream — the drawing group (BStore) lives here
             if rtype == _MSODRAWINGGROUP:
-                drawing_group.extend(body)
+                drawing_group.append(body)
         else:
             worksheet_index = substream_index - 1
             if rtype == _MSODRAWING:
                 sheet_drawings.setdefault(worksheet_index, []).append(body)
 
-    blips = _extract_ordered_blips(bytes(drawing_group))
+    # A drawing group of any size arrives stitched from CONTINUE records, and
+    # joining a single bytes object returns it as-is, so this rarely copies.
+    return b"".join(drawing_group), sheet_names, sheet_drawings
+
+
+def extract_diagrams(source):
+    """Map each worksheet name to its diagram image bytes.
+
+    ``source`` is an .xls path or a :class:`~parts.ingestion.workbook.WorkbookFile`
+    already shared with xlrd.
+
+    Returns ``{sheet_name: png_or_jpeg_bytes}`` for every sheet that references a
+    readable diagram (its largest referenced blip, sized from the image header).
+    Sheets without a diagram are omitted. Only the chosen blips are copied out.
+    """
+    with metrics.stage("extract_diagrams") as counts:
+        result = {name: found[0] for name, found in _extract_diagrams(source, fallbacks=False).items()}
+        counts.rows = len(result)
+        counts.bytes = sum(len(data) for data in result.values())
+    return result
+
+
+def extract_diagram_candidates(source):
+    """Like :func:`extract_diagrams`, but map each sheet to all its readable blips.
+
+    Returns ``{sheet_name: [image_bytes, ...]}``, largest first, so a caller
+    whose encoder rejects the largest blip can fall back to the next one.
+    """
+    with metrics.stage("extract_diagrams") as counts:
+        result = _extract_diagrams(source, fallbacks=True)
+        counts.rows = len(result)
+        counts.bytes = sum(len(data) for candidates in result.values() for data in candidates)
+    return result
+
+
+def _extract_diagrams(source, *, fallbacks):
+    drawing_group, sheet_names, sheet_drawings = collect_drawings(read_workbook_stream(source))
+    blips = _index_blips(drawing_group)
+    sizes = {}
+
+    def blip_size(idx):
+        if idx not in sizes:
+            span = blips[idx - 1] if 1 <= idx <= len(blips) else None
+            sizes[idx] = _image_size(drawing_group, *span) if span else None
+        return sizes[idx]
 
     result = {}
     for ws_index, drawings in sheet_drawings.items():
         if ws_index >= len(sheet_names):
             continue
         name = sheet_names[ws_index]
-        # gather all referenced, decodable blips; pick the largest by area
-        best = None
-        best_area = -1
+        # gather all referenced, readable blips, largest area first
+        areas = {}
         for body in drawings:
             for idx in _sheet_pib_indices(body):
-                blip = blips[idx - 1] if 1 <= idx <= len(blips) else None
-                if blip is None:
-                    continue
-                img_bytes, (w, h) = blip
-                area = w * h
-                if area > best_area:
-                    best_area = area
-                    best = img_bytes
-        if best is not None:
-            result[name] = best
+                size = blip_size(idx)
+                if size is not None:
+                    areas[idx] = size[0] * size[1]
+        ranked = sorted(areas, key=lambda idx: -areas[idx])
+        if not fallbacks:
+            ranked = ranked[:1]
+        if ranked:
+            result[name] = [drawing_group[slice(*blips[idx - 1])] for idx in ranked]
     return result
 
 
@@ -216,7 +314,7 @@ def _decode_boundsheet_name(body):
         flags = body[7]
         raw = body[8:]
         if flags & 0x01:
-            return raw[:length * 2].decode("utf-16-le", "replace")
-        return raw[:length].decode("latin-1", "replace")
+            return bytes(raw[:length * 2]).decode("utf-16-le", "replace")
+        return bytes(raw[:length]).decode("latin-1", "replace")
     except Exception:
         return ""
@@ -2,16 +2,32 @@
 import hashlib
 import logging
 import re
+import uuid
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
 
 from django.core.files.base import ContentFile
-from django.db import transaction
+from django.db import DatabaseError, transaction
 from django.utils import timezone
 from django.utils.text import slugify
 
 from parts.ingestion import colour as colour_mod
-from parts.ingestion.diagram_images import diagram_webp_bytes
-from parts.keys import build_fitment_key, normalize_part_number
-from parts.models import Part, PartsModel, PartSection, SectionPart
+from parts.ingestion import metrics
+from parts.ingestion.diagram_cache import cached_webp_bytes
+from parts.ingestion.xls_parser import section_fingerprint
+from parts.keys import build_fitment_key, normalize_part_number, part_set_hash
+from parts.models import (
+    Part,
+    PartPriceChange,
+    PartsModel,
+    PartSection,
+    PartsSettings,
+    RetiredFitment,
+    RetiredSection,
+    SectionPart,
+)
+from parts.overlap import index_model_overlaps, index_part_usage
 
 logger = logging.getLogger(__name__)
 
@@ -64,69 +80,377 @@ def unique_model_slug(name, model_code):
     return slug
 
 
-@transaction.atomic
+# An import's claim on its book older than this is taken to be from a run
+# that died without releasing it; builds take minutes, not hours.
+BUILD_CLAIM_TIMEOUT = timedelta(hours=2)
+
+
 def import_book(parsed, *, name=None, cc_class=None, source_url="", source_filename="", book_hash=""):
-    """Upsert one parsed book while preserving stable section/fitment identities."""
+    """Build a parsed book as the model's next catalogue version, then publish it.
+
+    The new build is written beside the live one: sections whose rows and
+    diagram are unchanged carry over as they are, and changed sections get
+    new rows that no reader sees yet. Publishing is one short transaction
+    that moves ``PartsModel.catalog_version``, so catalogue requests never
+    wait on an import. The replaced build is kept until the next import so
+    :func:`rollback_book` can flip back to it. Fitment keys are stable across
+    builds, so carts survive re-imports.
+
+    Only one import builds a book at a time: a second one raises
+    ``RuntimeError`` instead of discarding the first one's unpublished rows.
+    """
     model_code = parsed["model_code"]
     if not model_code:
         raise ValueError("Book has no model code; refusing to import.")
 
-    display_name = resolve_display_name(name, model_code, parsed.get("model_name_hint"))
-    model, _ = PartsModel.objects.get_or_create(
-        model_code=model_code,
-        defaults={"name": display_name, "cc_class": cc_class or "100_165"},
-    )
-    model.name = display_name
-    if cc_class:
-        model.cc_class = cc_class
-    if not model.slug:
-        model.slug = unique_model_slug(display_name, model_code)
-    model.source_xls_url = source_url or model.source_xls_url
-    model.source_filename = source_filename or model.source_filename
-    model.book_hash = book_hash or model.book_hash
-    model.last_ingested_at = timezone.now()
-    model.is_active = True
-    model.save()
-
-    retained_section_ids = []
-    obsolete_diagram_names = []
-    for sec in parsed["sections"]:
-        section, _ = PartSection.objects.update_or_create(
+    with metrics.book(source_filename or model_code), metrics.stage("import_book") as counts:
+        counts.rows = sum(len(sec["parts"]) for sec in parsed["sections"])
+        display_name = resolve_display_name(name, model_code, parsed.get("model_name_hint"))
+        model = _start_build(model_code, display_name, cc_class)
+        version = model.catalog_version + 1
+
+        try:
+            with transaction.atomic():
+                live = {section.code: section for section in model.sections.in_version(model.catalog_version)}
+                changed_sections = [
+                    sec for sec in parsed["sections"] if _section_changed(live.get(sec["code"]), sec)
+                ]
+                # Parts are shared by every book and build, so they are filled in
+                # directly; only ever gaps, never anything a live fitment relies on.
+                parts = _upsert_book_parts(changed_sections)
+
+            with transaction.atomic():
+                new_sections = _build_sections(model, version, changed_sections, live)
+                _create_fitments(model, changed_sections, new_sections, parts)
+                codes = {sec["code"] for sec in parsed["sections"]}
+                retired = [
+                    section.id for code, section in live.items()
+                    if code in new_sections or code not in codes
+                ]
+                PartSection.objects.filter(id__in=retired).update(retired_in_version=version)
+
+            model = _publish(
+                model, version,
+                had_live_build=bool(live),
+                name=display_name,
+                cc_class=cc_class,
+                source_url=source_url,
+                source_filename=source_filename,
+                book_hash=book_hash,
+            )
+        except BaseException:
+            # The next import discards this build's rows straight away.
+            _release_build(model)
+            raise
+        if changed_sections or retired:
+            index_model_overlaps(model)
+            index_part_usage(model)
+        _prune_builds(model)
+        PartsSettings.bump_catalogue_version()
+        logger.info(
+            "Imported book %s (%s) as version %d: %d sections, %d with changed rows",
+            display_name, model_code, version, len(parsed["sections"]), len(changed_sections),
+        )
+        return model
+
+
+@transaction.atomic
+def _start_build(model_code, display_name, cc_class):
+    """Get the book's model and claim its next build, discarding any build
+    that was never published.
+
+    A new model stays inactive, and so off the public catalogue, until its
+    first build is published. Raises ``RuntimeError`` while another import
+    holds the claim, unless that claim is older than ``BUILD_CLAIM_TIMEOUT``.
+    """
+    model = PartsModel.objects.select_for_update().filter(model_code=model_code).first()
+    if model is None:
+        model = PartsModel.objects.create(
+            model_code=model_code,
+            name=display_name,
+            cc_class=cc_class or "100_165",
+            slug=unique_model_slug(display_name, model_code),
+            is_active=False,
+        )
+    now = timezone.now()
+    if model.build_token and model.build_started_at > now - BUILD_CLAIM_TIMEOUT:
+        raise RuntimeError(
+            f"{model_code} is being imported by another run (since {model.build_started_at:%Y-%m-%d %H:%M}); "
+            f"import it again once that run finishes."
+        )
+    # Left by an import that failed before publishing, or by a rollback.
+    abandoned = model.sections.filter(added_in_version__gt=model.catalog_version)
+    _delete_sections(abandoned)
+    model.sections.filter(retired_in_version__gt=model.catalog_version).update(retired_in_version=None)
+    model.build_token = uuid.uuid4().hex
+    model.build_started_at = now
+    model.save(update_fields=["build_token", "build_started_at"])
+    return model
+
+
+def _release_build(model):
+    """Give up ``model``'s build claim, if this import still holds it."""
+    try:
+        PartsModel.objects.filter(pk=model.pk, build_token=model.build_token).update(
+            build_token="", build_started_at=None,
+        )
+    except DatabaseError as exc:  # the claim expires on its own; keep the original error
+        logger.warning("Could not release the build claim on %s: %s", model.model_code, exc)
+
+
+def _section_changed(section, sec):
+    """True if ``sec`` needs a new section row rather than the live one."""
+    if section is None or section.content_hash != section_fingerprint(sec):
+        return True
+    if sec.get("diagram_bytes"):
+        return hashlib.sha256(sec["diagram_bytes"]).hexdigest() != section.diagram_source_hash
+    return False
+
+
+def _encode_diagram(model, sec, source_hash):
+    """WebP bytes for the section's diagram, or None if no candidate encodes.
+
+    The largest blip is tried first, then the sheet's smaller ones in turn.
+    """
+    candidates = [(sec["diagram_bytes"], source_hash)]
+    candidates += [(data, None) for data in sec.get("diagram_fallbacks") or ()]
+    for data, data_hash in candidates:
+        try:
+            return cached_webp_bytes(data, source_hash=data_hash)
+        except Exception as exc:  # diagrams are best-effort; never abort the book
+            logger.warning("Unreadable diagram for %s %s: %s", model.model_code, sec["code"], exc)
+    return None
+
+
+def _build_sections(model, version, parsed_sections, live):
+    """Create the new rows of ``version`` for the changed sections.
+
+    Returns ``{code: PartSection}``. A section's diagram is only re-encoded
+    when its source bytes changed, and a reviewed crop only carries over with
+    an unchanged source; files are never shared with a row that changed them.
+    A source that will not encode is still recorded, with no image.
+    """
+    to_create = []
+    for sec in parsed_sections:
+        previous = live.get(sec["code"])
+        section = PartSection(
             parts_model=model,
             code=sec["code"],
-            defaults={
-                "group": sec["group"],
-                "name": sec["name"],
-                "sort_order": sec["sort_order"],
-            },
+            group=sec["group"],
+            name=sec["name"],
+            sort_order=sec["sort_order"],
+            content_hash=section_fingerprint(sec),
+            added_in_version=version,
         )
-        retained_section_ids.append(section.id)
+        section.part_set_hash, section.part_count = part_set_hash(row["part_number"] for row in sec["parts"])
+        if previous is not None:
+            section.diagram_image = previous.diagram_image.name or None
+            section.diagram_source_hash = previous.diagram_source_hash
+            section.curated_diagram_image = previous.curated_diagram_image.name or None
+            section.curated_source_hash = previous.curated_source_hash
         if sec.get("diagram_bytes"):
             source_hash = hashlib.sha256(sec["diagram_bytes"]).hexdigest()
             if source_hash != section.diagram_source_hash:
-                old_diagram_name = section.diagram_image.name if section.diagram_image else ""
-                old_curated_name = section.curated_diagram_image.name if section.curated_diagram_image else ""
-                display_bytes = diagram_webp_bytes(sec["diagram_bytes"])
-                section.diagram_image.save(
-                    f"{model_code}_{sec['code']}.webp",
-                    ContentFile(display_bytes),
-                    save=False,
-                )
+                display_bytes = _encode_diagram(model, sec, source_hash)
+                if display_bytes is not None:
+                    # The live row keeps its own file until its build is pruned.
+                    section.diagram_image.save(
+                        f"{model.model_code}_{sec['code']}.webp",
+                        ContentFile(display_bytes),
+                        save=False,
+                    )
+                else:
+                    # Recorded anyway, so an unreadable diagram is not decoded
+                    # again on every import of an unchanged book.
+                    section.diagram_image = None
                 section.diagram_source_hash = source_hash
                 section.curated_diagram_image = None
                 section.curated_source_hash = ""
-                section.save()
-                if old_diagram_name and old_diagram_name != section.diagram_image.name:
-                    obsolete_diagram_names.append(old_diagram_name)
-                if old_curated_name:
-                    obsolete_diagram_names.append(old_curated_name)
+        to_create.append(section)
+
+    PartSection.objects.bulk_create(to_create, batch_size=1000)
+    if not to_create:
+        return {}
+    # MySQL does not return primary keys from a bulk insert.
+    return {section.code: section for section in model.sections.filter(added_in_version=version)}
+
+
+def _publish(model, version, *, had_live_build, name, cc_class, source_url, source_filename, book_hash):
+    """Make ``version`` the live build, with the book's metadata, in one update."""
+    build_token = model.build_token
+    with transaction.atomic():
+        model = PartsModel.objects.select_for_update().get(pk=model.pk)
+        if model.build_token != build_token:
+            raise RuntimeError(
+                f"{model.model_code}'s build was taken over by another import while version {version} was built."
+            )
+        if model.catalog_version != version - 1:
+            raise RuntimeError(
+                f"{model.model_code} was published by another import while version {version} was built."
+            )
+        model.name = name
+        if cc_class:
+            model.cc_class = cc_class
+        if not model.slug:
+            model.slug = unique_model_slug(name, model.model_code)
+        model.source_xls_url = source_url or model.source_xls_url
+        model.source_filename = source_filename or model.source_filename
+        model.book_hash = book_hash or model.book_hash
+        model.last_ingested_at = timezone.now()
+        model.is_active = True
+        model.previous_catalog_version = model.catalog_version if had_live_build else None
+        model.catalog_version = version
+        model.build_token = ""
+        model.build_started_at = None
+        model.save()
+    return model
+
+
+@transaction.atomic
+def rollback_book(model):
+    """Republish the build the last import replaced. Returns the model.
+
+    Rows of the abandoned build stay until the next import discards them.
+    """
+    model = PartsModel.objects.select_for_update().get(pk=model.pk)
+    if model.previous_catalog_version is None:
+        raise ValueError(f"{model.model_code} has no previous catalogue version to roll back to.")
+    model.catalog_version = model.previous_catalog_version
+    model.previous_catalog_version = None
+    model.save(update_fields=["catalog_version", "previous_catalog_version", "updated_at"])
+    index_model_overlaps(model)
+    index_part_usage(model)
+    PartsSettings.bump_catalogue_version()
+    logger.info("Rolled %s back to catalogue version %d", model.model_code, model.catalog_version)
+    return model
+
+
+@transaction.atomic
+def _prune_builds(model):
+    """Delete section rows in neither the live build nor the one before it."""
+    oldest_kept = model.previous_catalog_version or model.catalog_version
+    _delete_sections(model.sections.filter(retired_in_version__lte=oldest_kept))
+
+
+def _delete_sections(sections):
+    """Delete ``sections`` (and their fitments), then any diagram files no
+    remaining section uses, once the transaction commits.
+
+    The deleted pks are kept as ``RetiredSection``/``RetiredFitment`` rows so
+    public section links and old carts still resolve to the live build.
+    """
+    ids = []
+    image_names = set()
+    retired = []
+    for section_id, model_id, code, diagram, curated in sections.values_list(
+        "id", "parts_model_id", "code", "diagram_image", "curated_diagram_image",
+    ):
+        ids.append(section_id)
+        retired.append(RetiredSection(id=section_id, parts_model_id=model_id, code=code))
+        image_names.update(name for name in (diagram, curated) if name)
+    if not ids:
+        return
+    RetiredSection.objects.bulk_create(retired, batch_size=1000, ignore_conflicts=True)
+    RetiredFitment.objects.bulk_create(
+        [
+            RetiredFitment(id=pk, fitment_key=key)
+            for pk, key in SectionPart.objects.filter(section_id__in=ids).values_list("id", "fitment_key")
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    PartSection.objects.filter(id__in=ids).delete()
+    if not image_names:
+        return
 
-        retained_fitment_keys = []
+    transaction.on_commit(lambda: PartSection.objects.delete_unused_images(image_names))
+
+
+def _assign(instance, values):
+    """Set ``values`` on ``instance``; True if any attribute actually changed."""
+    changed = False
+    for field, value in values.items():
+        if getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed = True
+    return changed
+
+
+def _upsert_book_parts(parsed_sections):
+    """Ensure a Part exists for every book row. Returns ``{part_number: Part}``.
+
+    The book is authoritative for colour structure; pricing/description come
+    from the PA feed. Rows are applied in book order, so when a part number
+    repeats the last non-blank colour value wins, as it always has.
+    """
+    rows = [row for sec in parsed_sections for row in sec["parts"]]
+    numbers = {normalize_part_number(row["part_number"]) for row in rows}
+    parts = {
+        normalize_part_number(part_number): part
+        for part_number, part in Part.objects.in_bulk(numbers, field_name='part_number').items()
+    }
+    now = timezone.now()
+    to_create = {}
+    to_update = {}
+    for row in rows:
+        part_number = normalize_part_number(row["part_number"])
+        base_part_number = normalize_part_number(row["base_part_number"])
+        part = parts.get(part_number)
+        if part is None:
+            part = Part(
+                part_number=part_number,
+                description=row["description"],
+                base_part_number=base_part_number,
+                colour_suffix=row["colour_suffix"],
+                paint_code=row["paint_code"],
+                colour_name=row["colour_name"],
+            )
+            parts[part_number] = to_create[part_number] = part
+            continue
+        changed = _assign(part, {
+            "base_part_number": base_part_number or part.base_part_number,
+            "colour_suffix": row["colour_suffix"] or part.colour_suffix,
+            "paint_code": row["paint_code"] or part.paint_code,
+            "colour_name": row["colour_name"] or part.colour_name,
+            "description": part.description or row["description"],
+        })
+        if changed and part_number not in to_create:
+            part.updated_at = now
+            to_update[part_number] = part
+
+    Part.objects.bulk_create(to_create.values(), batch_size=1000)
+    Part.objects.bulk_update(
+        to_update.values(),
+        fields=[
+            'base_part_number', 'colour_suffix', 'paint_code', 'colour_name',
+            'description', 'updated_at',
+        ],
+        batch_size=1000,
+    )
+    if to_create:
+        parts.update(
+            (normalize_part_number(part_number), part)
+            for part_number, part in Part.objects.in_bulk(
+                list(to_create), field_name='part_number'
+            ).items()
+        )
+    return parts
+
+
+def _create_fitments(model, parsed_sections, sections, parts):
+    """Create the SectionPart rows of the given new sections in a fixed number of queries.
+
+    A fitment's identity is its key, so carts survive re-imports. A row
+    repeated within a section gets an ``:N`` occurrence suffix in book order.
+    """
+    to_create = []
+    for sec in parsed_sections:
+        section = sections[sec["code"]]
         occurrences = {}
         for row in sec["parts"]:
-            part = _upsert_book_part(row)
+            part = parts[normalize_part_number(row["part_number"])]
             base_key = build_fitment_key(
-                model_code=model_code,
+                model_code=model.model_code,
                 section_code=sec["code"],
                 ref_number=row["ref_number"],
                 part_number=part.part_number,
@@ -134,91 +458,91 @@ def import_book(parsed, *, name=None, cc_class=None, source_url="", source_filen
             )
             occurrences[base_key] = occurrences.get(base_key, 0) + 1
             occurrence = occurrences[base_key]
-            fitment_key = base_key if occurrence == 1 else f"{base_key}:{occurrence}"
-            retained_fitment_keys.append(fitment_key)
-            SectionPart.objects.update_or_create(
-                fitment_key=fitment_key,
-                defaults={
-                    "section": section,
-                    "part": part,
-                    "ref_number": row["ref_number"],
-                    "description": row["description"],
-                    "quantity": row["quantity"],
-                    "effective_date": row["effective_date"],
-                    "superseded_flag": row["superseded_flag"],
-                    "sort_order": row["sort_order"],
-                },
-            )
-        section.parts.exclude(fitment_key__in=retained_fitment_keys).delete()
+            to_create.append(SectionPart(
+                fitment_key=base_key if occurrence == 1 else f"{base_key}:{occurrence}",
+                section_id=section.id,
+                part_id=part.id,
+                ref_number=row["ref_number"],
+                description=row["description"],
+                quantity=row["quantity"],
+                effective_date=row["effective_date"],
+                superseded_flag=row["superseded_flag"],
+                sort_order=row["sort_order"],
+            ))
+    SectionPart.objects.bulk_create(to_create, batch_size=1000)
 
-    stale_sections = model.sections.exclude(id__in=retained_section_ids)
-    obsolete_diagram_names.extend(
-        section.diagram_image.name for section in stale_sections.exclude(diagram_image='')
-        if section.diagram_image
-    )
-    obsolete_diagram_names.extend(
-        section.curated_diagram_image.name
-        for section in stale_sections.exclude(curated_diagram_image='')
-        if section.curated_diagram_image
-    )
-    stale_sections.delete()
 
-    def delete_old_diagrams():
-        storage = PartSection._meta.get_field('diagram_image').storage
-        for image_name in obsolete_diagram_names:
-            storage.delete(image_name)
+# PA feeds run to tens of thousands of rows; apply them this many at a time so
+# memory stays flat whatever the feed size.
+PRICING_BATCH_SIZE = 2000
+PRICING_FIELDS = [
+    'description', 'wholesale_price_incl_gst', 'available_qty', 'in_pa_feed',
+    'price_updated_at', 'updated_at', 'base_part_number', 'colour_suffix',
+    'paint_code', 'colour_name',
+]
 
-    transaction.on_commit(delete_old_diagrams)
-    logger.info("Imported book %s (%s): %d sections", display_name, model_code, len(parsed["sections"]))
-    return model
 
-
-def _upsert_book_part(row):
-    """Ensure a Part exists for a book row. The book is authoritative for colour
-    structure; pricing/description come from the PA feed."""
-    part_number = normalize_part_number(row["part_number"])
-    part, created = Part.objects.get_or_create(
-        part_number=part_number,
-        defaults={
-            "description": row["description"],
-            "base_part_number": normalize_part_number(row["base_part_number"]),
-            "colour_suffix": row["colour_suffix"],
-            "paint_code": row["paint_code"],
-            "colour_name": row["colour_name"],
-        },
-    )
-    if not created:
-        # Refresh colour structure from the book (authoritative) without touching
-        # PA-sourced pricing.
-        part.base_part_number = normalize_part_number(row["base_part_number"]) or part.base_part_number
-        part.colour_suffix = row["colour_suffix"] or part.colour_suffix
-        part.paint_code = row["paint_code"] or part.paint_code
-        part.colour_name = row["colour_name"] or part.colour_name
-        if not part.description:
-            part.description = row["description"]
-        part.save()
-    return part
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 @transaction.atomic
-def import_pricing(rows, *, mark_missing_unavailable=True):
+def import_pricing(rows, *, mark_missing_unavailable=True, batch_size=PRICING_BATCH_SIZE):
     """Apply PA rows to Part price/availability. Returns the number of rows applied.
 
+    ``rows`` may be any iterable, e.g. a streaming :func:`iter_pa_rows`; it is
+    consumed ``batch_size`` rows at a time and only that batch's parts are
+    loaded. A part number repeated in the feed takes its last row.
+
+    Only parts whose values actually changed are written, and each price or
+    availability change is appended to :class:`PartPriceChange`.
+
     Sets ``in_pa_feed=False`` on any Part not present in this feed (discontinued).
+    The parts seen so far are kept as a packed array of primary keys, not a
+    set of part numbers, so a full feed costs eight bytes a part.
     """
     now = timezone.now()
-    rows_by_part_number = {
-        normalize_part_number(row["part_number"]): row for row in rows
-    }
-    seen = set(rows_by_part_number)
+    seen = array('q')
+    with metrics.stage("import_pricing") as counts:
+        for batch in _batches(rows, batch_size):
+            rows_by_part_number = {normalize_part_number(row["part_number"]): row for row in batch}
+            seen.extend(_apply_pricing_batch(rows_by_part_number, now))
+
+        # A part number repeated across batches was appended once per batch.
+        seen = array('q', sorted(set(seen)))
+        if mark_missing_unavailable and seen:
+            _mark_missing_from_feed(seen, batch_size)
+        counts.rows = len(seen)
+    PartsSettings.bump_catalogue_version()
+
+    applied = len(seen)
+    logger.info("Applied pricing to %d parts", applied)
+    return applied
+
+
+def _apply_pricing_batch(rows_by_part_number, now):
+    """Create new parts and write only the existing parts whose values moved.
+
+    A price or availability change also gets a :class:`PartPriceChange` row
+    and a fresh ``price_updated_at``. Returns the primary keys of every part
+    in the batch.
+    """
     existing = {
         normalize_part_number(part_number): part
         for part_number, part in Part.objects.in_bulk(
-            seen, field_name='part_number'
+            list(rows_by_part_number), field_name='part_number'
         ).items()
     }
     to_create = []
     to_update = []
+    changes = []
 
     for pn, row in rows_by_part_number.items():
         base, suffix = colour_mod.split_base_and_suffix(pn)
@@ -227,38 +551,79 @@ def import_pricing(rows, *, mark_missing_unavailable=True):
         if part is None:
             part = Part(part_number=pn)
             to_create.append(part)
-        else:
-            to_update.append(part)
-        part.description = row["description"] or part.description
-        part.wholesale_price_incl_gst = row["price"]
-        part.available_qty = row["available"]
-        part.in_pa_feed = True
-        part.price_updated_at = now
-        part.updated_at = now
+        previous = (part.wholesale_price_incl_gst, part.available_qty)
+        values = {
+            'description': row["description"] or part.description,
+            'wholesale_price_incl_gst': row["price"],
+            'available_qty': row["available"],
+            'in_pa_feed': True,
+        }
         # Fill colour gaps for PA-only parts without clobbering book-derived data.
         if not part.base_part_number:
-            part.base_part_number = base
+            values['base_part_number'] = base
         if not part.colour_suffix and suffix:
-            part.colour_suffix = suffix
+            values['colour_suffix'] = suffix
         if not part.paint_code and paint_code:
-            part.paint_code = paint_code
+            values['paint_code'] = paint_code
         if not part.colour_name and paint_code:
-            part.colour_name = colour_mod.resolve_colour_name(paint_code)
+            values['colour_name'] = colour_mod.resolve_colour_name(paint_code)
+        changed = _assign(part, values)
+        price_moved = part.pk is None or previous != (row["price"], row["available"])
+        if price_moved and part.price_updated_at == now:
+            # Repeated later in this same feed: revise this run's entry instead.
+            PartPriceChange.objects.filter(part=part, changed_at=now).update(
+                wholesale_price_incl_gst=row["price"], available_qty=row["available"],
+            )
+        elif price_moved:
+            part.price_updated_at = now
+            changes.append((pn, previous if part.pk else (None, None), row))
+        if part.pk and changed:
+            part.updated_at = now
+            to_update.append(part)
 
     Part.objects.bulk_create(to_create, batch_size=1000)
-    Part.objects.bulk_update(
-        to_update,
-        fields=[
-            'description', 'wholesale_price_incl_gst', 'available_qty', 'in_pa_feed',
-            'price_updated_at', 'updated_at', 'base_part_number', 'colour_suffix',
-            'paint_code', 'colour_name',
-        ],
-        batch_size=1000,
-    )
+    Part.objects.bulk_update(to_update, fields=PRICING_FIELDS, batch_size=1000)
+    pks = [part.pk for part in existing.values()]
+    if changes:
+        # bulk_create leaves primary keys unset on MySQL, so read the new ones back.
+        ids = dict(
+            Part.objects.filter(part_number__in=[pn for pn, _, _ in changes])
+            .values_list('part_number', 'pk')
+        )
+        ids = {normalize_part_number(part_number): pk for part_number, pk in ids.items()}
+        pks.extend(pk for pn, pk in ids.items() if pn not in existing)
+        PartPriceChange.objects.bulk_create(
+            [
+                PartPriceChange(
+                    part_id=ids[pn],
+                    changed_at=now,
+                    wholesale_price_incl_gst=row["price"],
+                    available_qty=row["available"],
+                    previous_price=previous_price,
+                    previous_available=previous_available,
+                )
+                for pn, (previous_price, previous_available), row in changes
+            ],
+            batch_size=1000,
+        )
+    return pks
 
-    if mark_missing_unavailable and seen:
-        Part.objects.exclude(part_number__in=seen).filter(in_pa_feed=True).update(in_pa_feed=False)
 
-    applied = len(rows_by_part_number)
-    logger.info("Applied pricing to %d parts", applied)
-    return applied
+def _contains(sorted_pks, pk):
+    index = bisect_left(sorted_pks, pk)
+    return index < len(sorted_pks) and sorted_pks[index] == pk
+
+
+def _mark_missing_from_feed(seen, batch_size):
+    """Flip parts absent from the feed out of it, by primary key in batches.
+
+    ``seen`` is the sorted array of primary keys the feed touched. Only the
+    primary keys of parts still in the feed are read back to compare against
+    it, rather than one ``NOT IN`` over every part number in the feed.
+    """
+    in_feed = Part.objects.filter(in_pa_feed=True).values_list('pk', flat=True)
+    missing = array('q', (
+        pk for pk in in_feed.iterator(chunk_size=batch_size) if not _contains(seen, pk)
+    ))
+    for pks in _batches(missing, batch_size):
+        Part.objects.filter(pk__in=pks).update(in_pa_feed=False)
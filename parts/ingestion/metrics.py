@@ -0,0 +1,192 @@
+"""Per-stage timers and counters for an ingestion run.
+
+Stages are wrapped in :func:`stage` wherever they run: scrape threads,
+the importing process, or a pool worker. Outside :func:`recording` a stage
+costs two clock reads and records nothing. Inside it, every stage adds its
+seconds, rows and bytes to the active :class:`Recorder`, once for the run and
+once for the book it belongs to (see :func:`book`). Pool workers record into
+their own recorder and :mod:`parts.ingestion.pool` merges it back.
+
+Stages nest (``extract_diagrams`` runs inside ``parse_book``), so each also
+records ``self_seconds``: its time outside the stages nested in it on the
+same thread. Self-times add up to the run's total; plain seconds do not.
+
+Django-free, so it can be imported by code that runs in the process pool.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+_active = None
+_active_lock = threading.Lock()
+_book = contextvars.ContextVar("ingestion_book", default=None)
+# Seconds spent in stages nested inside the current one, as a one-item list.
+_nested = contextvars.ContextVar("ingestion_nested_seconds", default=None)
+
+
+def _empty():
+    return {"calls": 0, "seconds": 0.0, "self_seconds": 0.0, "rows": 0, "bytes": 0}
+
+
+class Counts:
+    """What a stage processed; set ``rows``/``bytes`` inside :func:`stage`."""
+
+    __slots__ = ("rows", "bytes")
+
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+
+
+class Recorder:
+    """Totals per stage for a whole run and for each book in it."""
+
+    def __init__(self):
+        self.stages = {}
+        self.books = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, *, seconds=0.0, self_seconds=None, rows=0, bytes=0, calls=1, book=None):
+        with self._lock:
+            targets = [self.stages]
+            if book:
+                targets.append(self.books.setdefault(book, {}))
+            for target in targets:
+                entry = target.setdefault(name, _empty())
+                entry["calls"] += calls
+                entry["seconds"] += seconds
+                entry["self_seconds"] += seconds if self_seconds is None else self_seconds
+                entry["rows"] += rows
+                entry["bytes"] += bytes
+
+    def merge(self, snapshot):
+        """Add a :meth:`snapshot` taken elsewhere, e.g. in a pool worker."""
+        for name, entry in snapshot["stages"].items():
+            self.add(name, **entry)
+        with self._lock:
+            for book_name, stages in snapshot["books"].items():
+                target = self.books.setdefault(book_name, {})
+                for name, entry in stages.items():
+                    merged = target.setdefault(name, _empty())
+                    for key, value in entry.items():
+                        merged[key] += value
+
+    def rename_book(self, old, new):
+        """Fold the stages recorded for book ``old`` into book ``new``."""
+        with self._lock:
+            stages = self.books.pop(old, None)
+            if not stages:
+                return
+            target = self.books.setdefault(new, {})
+            for name, entry in stages.items():
+                merged = target.setdefault(name, _empty())
+                for key, value in entry.items():
+                    merged[key] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "stages": {name: dict(entry) for name, entry in self.stages.items()},
+                "books": {
+                    book_name: {name: dict(entry) for name, entry in stages.items()}
+                    for book_name, stages in self.books.items()
+                },
+            }
+
+
+@contextmanager
+def recording():
+    """Collect every stage run in this process until the block exits.
+
+    Yields the :class:`Recorder`. Recordings do not nest: an inner one
+    collects on its own and the outer one resumes afterwards.
+    """
+    global _active
+    recorder = Recorder()
+    with _active_lock:
+        outer, _active = _active, recorder
+    try:
+        yield recorder
+    finally:
+        with _active_lock:
+            _active = outer
+
+
+@contextmanager
+def book(name):
+    """Attribute the stages run in this block (on this thread) to ``name``."""
+    token = _book.set(name)
+    try:
+        yield
+    finally:
+        _book.reset(token)
+
+
+@contextmanager
+def stage(name, *, book=None):
+    """Time the block as one call of stage ``name``; yields its :class:`Counts`.
+
+    ``book`` defaults to the one set by :func:`book`. A block that raises is
+    still timed.
+    """
+    counts = Counts()
+    nested = [0.0]
+    token = _nested.set(nested)
+    started = time.perf_counter()
+    try:
+        yield counts
+    finally:
+        seconds = time.perf_counter() - started
+        _nested.reset(token)
+        enclosing = _nested.get()
+        if enclosing is not None:
+            enclosing[0] += seconds
+        recorder = _active
+        if recorder is not None:
+            recorder.add(
+                name,
+                seconds=seconds,
+                self_seconds=seconds - nested[0],
+                rows=counts.rows,
+                bytes=counts.bytes,
+                book=book or _book.get(),
+            )
+
+
+def merge(snapshot):
+    """Merge a worker's snapshot into the active recorder, if there is one."""
+    recorder = _active
+    if recorder is not None and snapshot:
+        recorder.merge(snapshot)
+
+
+def rename_book(old, new):
+    """Re-attribute book ``old``'s stages to ``new`` in the active recorder.
+
+    For stages that ran before their book's final name was known, such as a
+    download that names its file after the content's hash.
+    """
+    recorder = _active
+    if recorder is not None:
+        recorder.rename_book(old, new)
+
+
+def summary_lines(snapshot):
+    """Human-readable lines, one per stage, by self-time, slowest first.
+
+    A stage with others nested in it also shows its own share, so nested time
+    is not counted twice in the ranking.
+    """
+    lines = []
+    stages = sorted(snapshot["stages"].items(), key=lambda item: -item[1]["self_seconds"])
+    for name, entry in stages:
+        line = f"{name}: {entry['seconds']:.1f}s over {entry['calls']} calls"
+        if entry["self_seconds"] != entry["seconds"]:
+            line += f" ({entry['self_seconds']:.1f}s outside nested stages)"
+        if entry["rows"]:
+            line += f", {entry['rows']} rows"
+        if entry["bytes"]:
+            line += f", {entry['bytes'] / 1e6:.1f} MB"
+        lines.append(line)
+    return lines
@@ -0,0 +1,77 @@
+"""Process-pool helpers for the CPU-bound ingestion stages.
+
+Only Django-free callables (the book parser, the WebP encoder) are sent to the
+pool. Workers are always started with ``spawn``: ``sync --pipeline`` starts
+the pool while scrape threads hold logging and connection-pool locks, and a
+forked child can inherit one of those locks held and deadlock on it. A
+spawned worker starts from a fresh interpreter instead, so any state the
+callable needs from this process (e.g. ``storage.BASE_DIR``) must be handed
+over through ``initializer``. Database writes always stay in the calling
+process: one writer, no lock contention between workers.
+"""
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from parts.ingestion import metrics
+
+
+def timed(func, *args):
+    """Run ``func(*args)`` and return ``(result, seconds)``."""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def _timed_and_recorded(func, item):
+    """:func:`timed` in a worker, plus the stages it recorded there."""
+    with metrics.recording() as recorder:
+        result, seconds = timed(func, item)
+    return result, seconds, recorder.snapshot()
+
+
+def _collect(future):
+    result, seconds, snapshot = future.result()
+    metrics.merge(snapshot)
+    return result, seconds
+
+
+def bounded_map(func, items, *, workers, window=None, initializer=None, initargs=()):
+    """Yield ``(item, result, seconds)`` for each item, in input order.
+
+    With ``workers`` above one, ``func`` runs in a process pool. At most
+    ``window`` items (default twice the worker count) are in flight or waiting
+    for the consumer, so a slow writer applies back-pressure instead of letting
+    parsed books pile up in memory. An exception raised by ``func`` is re-raised
+    when the consumer reaches its item; later work is cancelled. Stages timed
+    in a worker (see :mod:`parts.ingestion.metrics`) are merged into this
+    process's recording as each result is yielded. ``initializer(*initargs)``
+    runs once in each worker before its first item.
+    """
+    if workers <= 1:
+        for item in items:
+            result, seconds = timed(func, item)
+            yield item, result, seconds
+        return
+
+    window = max(window or workers * 2, 1)
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    ) as executor:
+        try:
+            for item in items:
+                pending.append((item, executor.submit(_timed_and_recorded, func, item)))
+                if len(pending) >= window:
+                    ready_item, future = pending.popleft()
+                    yield (ready_item, *_collect(future))
+            while pending:
+                ready_item, future = pending.popleft()
+                yield (ready_item, *_collect(future))
+        finally:
+            for _, future in pending:
+                future.cancel()
@@ -6,11 +6,19 @@ be tested against saved HTML without network access.
 """
 import logging
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlparse
 
 import requests
+import requests.adapters
 from bs4 import BeautifulSoup
 
+from parts.ingestion import metrics
+
 logger = logging.getLogger(__name__)
 
 SOURCE_URL = "https://www.selectportal.com.au/sym-spare-parts-books/"
@@ -39,16 +47,149 @@ _PA_DATE_RE = re.compile(r"PA-(\d{1,2}-[A-Za-z]{3}-\d{2})")
 _SUPPLEMENTARY_XLS_RE = re.compile(r"models?\s+(?:which|that)\s+use\s+the\s+same\s+parts", re.I)
 
 
+# Books are fetched a few at a time; the supplier is one small host, so at most
+# PER_HOST_LIMIT requests go to any host at once whatever the worker count.
+DOWNLOAD_WORKERS = 4
+PER_HOST_LIMIT = 2
+DOWNLOAD_RETRIES = 3
+RETRY_BACKOFF = 2.0
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_pool_size = 0
+_session_lock = threading.Lock()
+
+
+def session(pool_size=DOWNLOAD_WORKERS):
+    """The process-wide pooled session shared by page fetches and downloads.
+
+    Its connection pools keep at least ``pool_size`` connections per host; a
+    caller running more download threads than that passes its worker count so
+    no connection is thrown away after each request.
+    """
+    global _session, _pool_size
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(REQUEST_HEADERS)
+        if pool_size > _pool_size:
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _pool_size = pool_size
+        return _session
+
+
 def fetch_page(url=SOURCE_URL, timeout=30):
-    resp = requests.get(url, headers=REQUEST_HEADERS, timeout=timeout)
-    resp.raise_for_status()
-    return resp.text
+    with metrics.stage("fetch_page") as counts:
+        resp = session().get(url, timeout=timeout)
+        resp.raise_for_status()
+        counts.bytes = len(resp.content)
+        return resp.text
 
 
-def download_bytes(url, *, timeout):
-    response = requests.get(url, headers=REQUEST_HEADERS, timeout=timeout)
-    response.raise_for_status()
-    return response.content
+def _conditional_headers(validators):
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _response_validators(response):
+    validators = {}
+    if response.headers.get("ETag"):
+        validators["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        validators["last_modified"] = response.headers["Last-Modified"]
+    return validators
+
+
+def download(url, *, timeout, validators=None, retries=DOWNLOAD_RETRIES, backoff=None):
+    """GET ``url``; return ``(content, validators)``.
+
+    ``validators`` (``etag``/``last_modified`` from an earlier response) make
+    the request conditional: a 304 returns ``(None, validators)`` without a
+    body. A server that ignores them just sends the file again.
+
+    Timeouts, dropped connections and 429/5xx replies are retried after
+    ``backoff`` seconds (``RETRY_BACKOFF`` by default), doubling each time;
+    other HTTP errors raise at once.
+    """
+    if backoff is None:
+        backoff = RETRY_BACKOFF
+    with metrics.stage("download") as counts:
+        content, validators = _download(url, timeout, validators, retries, backoff)
+        counts.bytes = len(content or b"")
+        return content, validators
+
+
+def _download(url, timeout, validators, retries, backoff):
+    headers = _conditional_headers(validators)
+    for attempt in range(retries + 1):
+        try:
+            response = session().get(url, timeout=timeout, headers=headers)
+            if response.status_code in _RETRY_STATUSES and attempt < retries:
+                logger.warning("Retrying %s after HTTP %s", url, response.status_code)
+            elif response.status_code == 304 and headers:
+                return None, validators
+            else:
+                response.raise_for_status()
+                return response.content, _response_validators(response)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            if attempt == retries:
+                raise
+            logger.warning("Retrying %s after %s", url, exc)
+        time.sleep(backoff * 2 ** attempt)
+
+
+def download_bytes(url, *, timeout, retries=DOWNLOAD_RETRIES, backoff=None):
+    """GET ``url`` unconditionally and return its body."""
+    return download(url, timeout=timeout, retries=retries, backoff=backoff)[0]
+
+
+def download_many(urls, *, timeout, validators=None, workers=DOWNLOAD_WORKERS, per_host=PER_HOST_LIMIT):
+    """Yield ``(url, content, validators, error)`` for each URL, in input order.
+
+    Downloads run on a thread pool with at most ``per_host`` requests to any
+    one host. ``validators`` maps a URL to the validators of its last download
+    (see :func:`download`); ``content`` is None for a 304. ``error`` is the
+    ``RequestException`` a failed download raised. At most ``workers * 2``
+    results are held ahead of the consumer, so large books do not pile up in
+    memory. Each download's stages are recorded against its URL as the book
+    (see :func:`parts.ingestion.metrics.rename_book`).
+    """
+    validators = validators or {}
+    session(pool_size=max(workers, 1))
+    host_slots = {}
+    slots_lock = threading.Lock()
+
+    def fetch(url):
+        host = urlparse(url).netloc
+        with slots_lock:
+            slot = host_slots.setdefault(host, threading.BoundedSemaphore(per_host))
+        with slot, metrics.book(url):
+            try:
+                return (*download(url, timeout=timeout, validators=validators.get(url)), None)
+            except requests.RequestException as exc:
+                return None, None, exc
+
+    window = max(workers, 1) * 2
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        try:
+            for url in urls:
+                pending.append((url, executor.submit(fetch, url)))
+                if len(pending) >= window:
+                    ready_url, future = pending.popleft()
+                    yield (ready_url, *future.result())
+            while pending:
+                ready_url, future = pending.popleft()
+                yield (ready_url, *future.result())
+        finally:
+            for _, future in pending:
+                future.cancel()
 
 
 def _cc_class_for(text):
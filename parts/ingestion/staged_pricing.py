@@ -0,0 +1,214 @@
+"""Set-based PA pricing import through a staging table.
+
+:func:`parts.ingestion.importer.import_pricing` reconciles parts in Python,
+which costs a ``bulk_update`` CASE expression per field per batch and a
+round trip for every batch of parts it loads. This engine bulk-loads the feed
+into :class:`~parts.models.PartPriceStaging` and applies it with a handful
+of statements joined on ``part_number``:
+
+* an INSERT…SELECT of each price/availability change into
+  :class:`~parts.models.PartPriceChange`, while the old values are still there,
+* an UPDATE…JOIN of price, availability and the colour-gap fields onto the
+  existing parts whose values moved (``UPDATE … FROM`` outside MySQL),
+* an INSERT…SELECT of parts the catalogue has never seen, flagged ``is_new``
+  in staging beforehand, and their first ledger rows,
+* a NOT EXISTS sweep that flips parts missing from the feed out of it.
+
+Results match ``import_pricing`` row for row; ``benchmark_pricing`` times the
+two against each other.
+"""
+import logging
+import uuid
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from parts.ingestion import colour as colour_mod
+from parts.ingestion import metrics
+from parts.ingestion.importer import PRICING_BATCH_SIZE, _batches
+from parts.keys import normalize_part_number
+from parts.models import Part, PartPriceChange, PartPriceStaging, PartsSettings
+
+logger = logging.getLogger(__name__)
+
+# Column -> new value for an existing part; ``p`` is the part, ``s`` the staged
+# row. Colour fields only fill gaps, exactly as import_pricing does.
+_UPDATE_ASSIGNMENTS = [
+    ("description", "CASE WHEN s.description <> '' THEN s.description ELSE p.description END"),
+    ("wholesale_price_incl_gst", "s.price"),
+    ("available_qty", "s.available"),
+    ("in_pa_feed", "%(true)s"),
+    ("updated_at", "%(now)s"),
+    ("base_part_number", "CASE WHEN p.base_part_number = '' THEN s.base_part_number ELSE p.base_part_number END"),
+    ("colour_suffix", "CASE WHEN p.colour_suffix = '' THEN s.colour_suffix ELSE p.colour_suffix END"),
+    ("paint_code", "CASE WHEN p.paint_code = '' THEN s.paint_code ELSE p.paint_code END"),
+    (
+        "colour_name",
+        "CASE WHEN p.colour_name = '' AND s.paint_code <> '' THEN s.colour_name ELSE p.colour_name END",
+    ),
+]
+
+
+# An existing part whose row would leave every field as it is.
+_UNCHANGED = (
+    "{price_unchanged} AND p.in_pa_feed = %(true)s"
+    " AND (s.description = '' OR s.description = p.description)"
+    " AND (p.base_part_number <> '' OR s.base_part_number = '')"
+    " AND (p.colour_suffix <> '' OR s.colour_suffix = '')"
+    " AND (p.paint_code <> '' OR s.paint_code = '')"
+    " AND (p.colour_name <> '' OR s.paint_code = '' OR s.colour_name = '')"
+)
+
+
+def _same(left, right):
+    """SQL for ``left`` equals ``right`` where NULL equals NULL."""
+    if connection.vendor == "mysql":
+        return f"{left} <=> {right}"
+    if connection.vendor == "sqlite":
+        return f"{left} IS {right}"
+    return f"{left} IS NOT DISTINCT FROM {right}"
+
+
+def _price_unchanged():
+    return f"{_same('p.wholesale_price_incl_gst', 's.price')} AND {_same('p.available_qty', 's.available')}"
+
+
+def _staged_row(run, part_number, row):
+    base, suffix = colour_mod.split_base_and_suffix(part_number)
+    paint_code = colour_mod.parse_paint_code(row["description"])
+    return {
+        "run": run,
+        "part_number": part_number,
+        "description": row["description"] or "",
+        "available": row["available"],
+        "price": row["price"],
+        "base_part_number": base,
+        "colour_suffix": suffix or "",
+        "paint_code": paint_code or "",
+        "colour_name": colour_mod.resolve_colour_name(paint_code) if paint_code else "",
+    }
+
+
+def _stage(rows, run, batch_size):
+    """Load ``rows`` into the staging table; return the part numbers seen."""
+    seen = set()
+    for batch in _batches(rows, batch_size):
+        staged = {}
+        repeated = {}
+        for row in batch:
+            part_number = normalize_part_number(row["part_number"])
+            target = repeated if part_number in seen else staged
+            target[part_number] = _staged_row(run, part_number, row)
+        PartPriceStaging.objects.bulk_create(
+            [PartPriceStaging(**values) for values in staged.values()], batch_size=1000,
+        )
+        # A part number repeated in a later batch takes its last row.
+        for part_number, values in repeated.items():
+            PartPriceStaging.objects.filter(run=run, part_number=part_number).update(**values)
+        seen.update(staged)
+    return seen
+
+
+def _changes_sql(part_table, staging_table, ledger_table):
+    return (
+        f"INSERT INTO {ledger_table} (part_id, changed_at, wholesale_price_incl_gst, available_qty, "
+        f"previous_price, previous_available) "
+        f"SELECT p.id, %(now)s, s.price, s.available, p.wholesale_price_incl_gst, p.available_qty "
+        f"FROM {part_table} p JOIN {staging_table} s "
+        f"ON s.part_number = p.part_number AND s.run = %(run)s "
+        f"WHERE NOT ({_price_unchanged()})"
+    )
+
+
+def _update_sql(part_table, staging_table):
+    unchanged = _UNCHANGED.format(price_unchanged=_price_unchanged())
+    if connection.vendor == "mysql":
+        assignments = ", ".join(f"p.{column} = {value}" for column, value in _UPDATE_ASSIGNMENTS)
+        return (
+            f"UPDATE {part_table} p JOIN {staging_table} s "
+            f"ON s.part_number = p.part_number AND s.run = %(run)s "
+            f"SET {assignments} WHERE NOT ({unchanged})"
+        )
+    assignments = ", ".join(f"{column} = {value}" for column, value in _UPDATE_ASSIGNMENTS)
+    return (
+        f"UPDATE {part_table} AS p SET {assignments} "
+        f"FROM {staging_table} AS s "
+        f"WHERE s.part_number = p.part_number AND s.run = %(run)s AND NOT ({unchanged})"
+    )
+
+
+def _price_timestamps_sql(part_table, ledger_table):
+    return (
+        f"UPDATE {part_table} SET price_updated_at = %(now)s "
+        f"WHERE id IN (SELECT part_id FROM {ledger_table} WHERE changed_at = %(now)s)"
+    )
+
+
+def _mark_new_sql(part_table, staging_table):
+    return (
+        f"UPDATE {staging_table} SET is_new = %(true)s "
+        f"WHERE run = %(run)s AND NOT EXISTS ("
+        f"SELECT 1 FROM {part_table} p WHERE p.part_number = {staging_table}.part_number)"
+    )
+
+
+def _insert_sql(part_table, staging_table):
+    return (
+        f"INSERT INTO {part_table} (part_number, description, base_part_number, colour_suffix, "
+        f"paint_code, colour_name, wholesale_price_incl_gst, available_qty, in_pa_feed, "
+        f"price_updated_at, created_at, updated_at) "
+        f"SELECT s.part_number, s.description, s.base_part_number, s.colour_suffix, "
+        f"s.paint_code, s.colour_name, s.price, s.available, %(true)s, %(now)s, %(now)s, %(now)s "
+        f"FROM {staging_table} s WHERE s.run = %(run)s AND s.is_new = %(true)s"
+    )
+
+
+def _first_changes_sql(part_table, staging_table, ledger_table):
+    return (
+        f"INSERT INTO {ledger_table} (part_id, changed_at, wholesale_price_incl_gst, available_qty, "
+        f"previous_price, previous_available) "
+        f"SELECT p.id, %(now)s, s.price, s.available, NULL, NULL "
+        f"FROM {staging_table} s JOIN {part_table} p ON p.part_number = s.part_number "
+        f"WHERE s.run = %(run)s AND s.is_new = %(true)s"
+    )
+
+
+def _sweep_sql(part_table, staging_table):
+    return (
+        f"UPDATE {part_table} SET in_pa_feed = %(false)s "
+        f"WHERE in_pa_feed = %(true)s AND NOT EXISTS ("
+        f"SELECT 1 FROM {staging_table} s "
+        f"WHERE s.run = %(run)s AND s.part_number = {part_table}.part_number)"
+    )
+
+
+@transaction.atomic
+def import_pricing_staged(rows, *, mark_missing_unavailable=True, batch_size=PRICING_BATCH_SIZE):
+    """Apply PA rows through the staging table. Same contract as ``import_pricing``."""
+    run = uuid.uuid4().hex
+    with metrics.stage("import_pricing") as counts:
+        seen = _stage(rows, run, batch_size)
+        params = {"run": run, "now": timezone.now(), "true": True, "false": False}
+        part_table = connection.ops.quote_name(Part._meta.db_table)
+        staging_table = connection.ops.quote_name(PartPriceStaging._meta.db_table)
+        ledger_table = connection.ops.quote_name(PartPriceChange._meta.db_table)
+
+        with connection.cursor() as cursor:
+            if seen:
+                # The ledger reads the old values, so it goes before the update.
+                cursor.execute(_changes_sql(part_table, staging_table, ledger_table), params)
+                cursor.execute(_update_sql(part_table, staging_table), params)
+                cursor.execute(_price_timestamps_sql(part_table, ledger_table), params)
+                # Flag the new rows first: once inserted they look like any other part.
+                cursor.execute(_mark_new_sql(part_table, staging_table), params)
+                cursor.execute(_insert_sql(part_table, staging_table), params)
+                cursor.execute(_first_changes_sql(part_table, staging_table, ledger_table), params)
+            if mark_missing_unavailable and seen:
+                cursor.execute(_sweep_sql(part_table, staging_table), params)
+        PartPriceStaging.objects.filter(run=run).delete()
+        counts.rows = len(seen)
+    PartsSettings.bump_catalogue_version()
+
+    applied = len(seen)
+    logger.info("Applied pricing to %d parts via staging", applied)
+    return applied
@@ -4,12 +4,19 @@
     <base>/inbox/books      scraped book files awaiting import
     <base>/archive/pricing  every PA file ever scraped (dated); the change ledger
     <base>/archive/books    every book file ever scraped
+    <base>/archive/<kind>.manifest.json
+                            sha256 of each archived file, keyed by filename
+    <base>/archive/validators.json
+                            ETag/Last-Modified of each source URL's last download
 
 Scraping writes to archive/ + inbox/; importing consumes inbox/ and leaves
 archive/ intact.
 """
 import hashlib
 import json
+import os
+import tempfile
+import threading
 from pathlib import Path
 
 from django.conf import settings
@@ -17,6 +24,12 @@ from django.conf import settings
 BASE_DIR = Path(settings.BASE_DIR) / "data_management" / "data" / "sym_parts_files"
 
 
+def use_base_dir(path):
+    """Point this process at ``path``; pool workers get the parent's directory this way."""
+    global BASE_DIR
+    BASE_DIR = Path(path)
+
+
 def _dir(*parts):
     path = BASE_DIR.joinpath(*parts)
     path.mkdir(parents=True, exist_ok=True)
@@ -31,6 +44,10 @@ def archive_dir(kind):
     return _dir("archive", kind)
 
 
+def reports_dir():
+    return _dir("reports")
+
+
 def sha256_bytes(data):
     return hashlib.sha256(data).hexdigest()
 
@@ -39,23 +56,133 @@ def sha256_file(path):
     return sha256_bytes(Path(path).read_bytes())
 
 
-def archived_hashes(kind):
+def _write_json(path, value):
+    """Replace ``path`` with ``value`` as JSON, so a reader never sees a partial file.
+
+    The partial file gets a name of its own, so two writers never share one.
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False,
+    ) as partial:
+        json.dump(value, partial, sort_keys=True)
+    try:
+        os.replace(partial.name, path)
+    except BaseException:
+        os.unlink(partial.name)
+        raise
+
+
+# Every read-modify-write of a manifest holds this: under sync --pipeline the
+# scrape thread queues books while the importing thread annotates them.
+_manifest_lock = threading.RLock()
+
+
+def manifest_path(kind):
+    """The hash manifest kept beside ``archive/<kind>``."""
+    return archive_dir(kind).with_name(f"{kind}.manifest.json")
+
+
+def _load_manifest(kind):
+    try:
+        return json.loads(manifest_path(kind).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(kind, entries):
+    _write_json(manifest_path(kind), entries)
+
+
+def _stat_signature(path):
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def archive_manifest(kind, *, verify=False):
+    """Return ``{filename: entry}`` for every archived source file of ``kind``.
+
+    Each entry holds the file's ``sha256`` and the ``size``/``mtime_ns`` it was
+    hashed at. The archive only grows, so a file is rehashed only when it is
+    new or its stat signature moved; ``verify`` discards the manifest and
+    rehashes everything.
+    """
+    with _manifest_lock:
+        known = {} if verify else _load_manifest(kind)
+        entries = {}
+        for path in archive_dir(kind).glob("*"):
+            if not path.is_file() or path.suffix == ".json":
+                continue
+            signature = _stat_signature(path)
+            entry = known.get(path.name)
+            if entry is None or any(entry.get(key) != value for key, value in signature.items()):
+                entry = {**signature, "sha256": sha256_file(path)}
+            entries[path.name] = entry
+        if entries != known:
+            _save_manifest(kind, entries)
+        return entries
+
+
+def annotate_archive(kind, fields_by_filename):
+    """Record extra facts (e.g. a book's model code) on existing manifest entries.
+
+    They live as long as the entry: a file whose stat signature moves is
+    rehashed and starts again from a bare entry.
+    """
+    with _manifest_lock:
+        entries = _load_manifest(kind)
+        changed = False
+        for filename, fields in fields_by_filename.items():
+            if filename in entries:
+                entries[filename].update(fields)
+                changed = True
+        if changed:
+            _save_manifest(kind, entries)
+
+
+def archived_hashes(kind, *, verify=False):
     """Set of sha256 hashes of every file already in the archive for ``kind``."""
-    return {
-        sha256_file(p) for p in archive_dir(kind).glob("*")
-        if p.is_file() and p.suffix != '.json'
-    }
+    return {entry["sha256"] for entry in archive_manifest(kind, verify=verify).values()}
 
 
-def archived_files_by_hash(kind):
+def archived_files_by_hash(kind, *, verify=False):
     """Return archived source files grouped by their content hash."""
+    directory = archive_dir(kind)
     files = {}
-    for path in archive_dir(kind).glob("*"):
-        if path.is_file() and path.suffix != ".json":
-            files.setdefault(sha256_file(path), []).append(path)
+    for filename, entry in archive_manifest(kind, verify=verify).items():
+        files.setdefault(entry["sha256"], []).append(directory / filename)
     return files
 
 
+_validators_lock = threading.Lock()
+
+
+def _validators_path():
+    return _dir("archive") / "validators.json"
+
+
+def source_validators():
+    """``{url: {"etag", "last_modified", "sha256"}}`` from each URL's last download.
+
+    ``sha256`` is the archived file the validators describe, so a 304 can be
+    matched back to it.
+    """
+    try:
+        return json.loads(_validators_path().read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def record_source_validators(updates):
+    """Merge ``{url: validators}`` into the stored HTTP validators."""
+    if not updates:
+        return
+    # sync --pipeline scrapes books and pricing on separate threads.
+    with _validators_lock:
+        validators = source_validators()
+        validators.update(updates)
+        _write_json(_validators_path(), validators)
+
+
 def write_metadata_sidecar(path, metadata):
     """Write source metadata beside an inbox/archive source file."""
     path = Path(path)
@@ -71,6 +198,10 @@ def queue_file(kind, filename, data, *, metadata=None):
     inbox_path = inbox_dir(kind) / filename
     archive_path.write_bytes(data)
     inbox_path.write_bytes(data)
+    with _manifest_lock:
+        entries = _load_manifest(kind)
+        entries[filename] = {**_stat_signature(archive_path), "sha256": sha256_bytes(data)}
+        _save_manifest(kind, entries)
     if metadata is not None:
         write_metadata_sidecar(archive_path, metadata)
         write_metadata_sidecar(inbox_path, metadata)
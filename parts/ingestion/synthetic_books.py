@@ -0,0 +1,418 @@
+"""Write synthetic SYM parts books for benchmarks and tests.
+
+The generated ``.xls`` files have the shape of the real books, so they
+exercise xlrd, :mod:`parts.ingestion.escher_images` and
+:mod:`parts.ingestion.xls_parser` on the same code paths:
+
+* a ``No.index`` sheet whose A1 cell reads ``MODEL:<code>``,
+* E/F section sheets with a bilingual title row carrying the model name
+  hint, a ``PARTS NUMBER`` header row and one row per part (reference,
+  part number, description, quantity, effective date serial, superseded
+  flag), with colour variants sharing a callout,
+* a ``<suffix> color index`` sheet per paint colour,
+* an Escher BStore holding one PNG or JPEG diagram per section plus a small
+  logo every section also references, split over CONTINUE records.
+
+The workbook stream is plain BIFF8 inside a minimal OLE2 compound file.
+Everything is derived from ``seed``, so the same arguments write the same
+bytes. Django-free, like the parser it feeds.
+"""
+import io
+import random
+import struct
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+# Catalogue presets for ``benchmark_catalogue``: books, sections per book,
+# parts per section and diagram pixel size.
+CATALOGUE_SIZES = {
+    "small": {"books": 2, "sections": 8, "parts_per_section": 15, "diagram_size": (320, 240)},
+    "medium": {"books": 6, "sections": 30, "parts_per_section": 25, "diagram_size": (1200, 900)},
+    "large": {"books": 12, "sections": 60, "parts_per_section": 40, "diagram_size": (2000, 1500)},
+}
+
+# Paint colours: part-number suffix, colour word, paint code.
+COLOURS = [
+    ("RD", "RED", "R-010CA"),
+    ("BK", "BLACK", "BK-001"),
+    ("WH", "WHITE", "WH-204P"),
+    ("BU", "BLUE", "BU-2957C"),
+]
+
+_SECTION_TITLES = [
+    ("汽缸頭", "CYLINDER HEAD"),
+    ("汽缸", "CYLINDER"),
+    ("曲軸", "CRANKSHAFT"),
+    ("離合器", "CLUTCH"),
+    ("化油器", "CARBURETOR"),
+    ("前叉", "FRONT FORK"),
+    ("車架", "FRAME BODY"),
+    ("前輪", "FRONT WHEEL"),
+    ("後輪", "REAR WHEEL"),
+    ("座墊", "SEAT"),
+    ("車燈", "HEADLIGHT"),
+    ("外殼", "BODY COVER"),
+]
+_PART_WORDS = ["BOLT", "GASKET", "COVER", "SPRING", "WASHER", "O-RING", "BRACKET", "CLIP", "SCREW", "COLLAR"]
+
+# BIFF8 record types.
+_BOF = 0x0809
+_EOF = 0x000A
+_CODEPAGE = 0x0042
+_DATEMODE = 0x0022
+_BOUNDSHEET = 0x0085
+_MSODRAWINGGROUP = 0x00EB
+_MSODRAWING = 0x00EC
+_OBJ = 0x005D
+_DIMENSIONS = 0x0200
+_NUMBER = 0x0203
+_LABEL = 0x0204
+_CONTINUE = 0x003C
+_MAX_RECORD = 8224
+
+# OLE2 sector markers.
+_SECTOR = 512
+_FREESECT = 0xFFFFFFFF
+_ENDOFCHAIN = 0xFFFFFFFE
+_FATSECT = 0xFFFFFFFD
+_DIFSECT = 0xFFFFFFFC
+_NOSTREAM = 0xFFFFFFFF
+_MINI_STREAM_CUTOFF = 4096
+
+
+def write_catalogue(directory, size="small", *, seed=0):
+    """Write the books of a :data:`CATALOGUE_SIZES` preset; return their paths.
+
+    Books draw part numbers from one shared pool, so models overlap the way
+    real ones do.
+    """
+    preset = CATALOGUE_SIZES[size]
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    pool = part_number_pool(preset["sections"] * preset["parts_per_section"], seed=seed)
+    paths = []
+    for index in range(preset["books"]):
+        model_code = f"SB{index + 1:02d}W{seed % 10}-1"
+        path = directory / f"Spare-Parts-Book-Synthetic-{model_code}.xls"
+        write_book(
+            path,
+            model_code=model_code,
+            name_hint=f"SYNTHETIC {index + 1}",
+            sections=preset["sections"],
+            parts_per_section=preset["parts_per_section"],
+            diagram_size=preset["diagram_size"],
+            seed=seed * 1000 + index,
+            part_numbers=pool,
+        )
+        paths.append(path)
+    return paths
+
+
+def part_number_pool(count, *, seed=0):
+    """``count`` distinct base part numbers shaped like ``53205-ALA-000``."""
+    rng = random.Random(seed)
+    seen = set()
+    while len(seen) < count:
+        letters = "".join(rng.choice("ABCDEFGHKLMNPRSTUVWXYZ") for _ in range(3))
+        seen.add(f"{rng.randrange(10000, 99999)}-{letters}-{rng.randrange(1000):03d}")
+    return sorted(seen)
+
+
+def write_book(
+    path,
+    *,
+    model_code="SB01W0-1",
+    name_hint="SYNTHETIC",
+    sections=8,
+    parts_per_section=15,
+    diagram_size=(480, 360),
+    jpeg_every=3,
+    seed=0,
+    part_numbers=None,
+):
+    """Write one synthetic book to ``path`` and return it.
+
+    Section ``E01``.. then ``F01``.. sheets (half each) get ``parts_per_section``
+    rows and a ``diagram_size`` diagram; every ``jpeg_every``-th diagram is a
+    JPEG and the rest are PNG. Part numbers are drawn from ``part_numbers``
+    (see :func:`part_number_pool`) when given.
+    """
+    rng = random.Random(seed)
+    if part_numbers is None:
+        part_numbers = part_number_pool(sections * parts_per_section, seed=seed)
+
+    sheets = [("No.index", _index_cells(model_code, name_hint), [])]
+    blips = [_logo()]
+    engine_sections = (sections + 1) // 2
+    for number in range(sections):
+        group, ordinal = ("E", number + 1) if number < engine_sections else ("F", number - engine_sections + 1)
+        code = f"{group}{ordinal:02d}"
+        image_format = "JPEG" if jpeg_every and number % jpeg_every == jpeg_every - 1 else "PNG"
+        blips.append(_diagram(rng, diagram_size, image_format))
+        cells = _section_cells(rng, code, model_code, name_hint, parts_per_section, part_numbers)
+        # pib indices are 1-based: the logo is 1, this section's diagram is next.
+        sheets.append((code, cells, [1, len(blips)]))
+    for suffix, word, paint_code in COLOURS:
+        sheets.append((f"{suffix} color index", _colour_index_cells(word, paint_code), []))
+
+    path = Path(path)
+    path.write_bytes(_compound_file(_workbook_stream(sheets, blips)))
+    return path
+
+
+# -- cell content ------------------------------------------------------------
+
+def _index_cells(model_code, name_hint):
+    return [
+        (0, 0, f"MODEL:{model_code}"),
+        (1, 0, f"{name_hint} PARTS CATALOGUE"),
+        (3, 0, "SHEET"),
+        (3, 1, "SECTION"),
+    ]
+
+
+def _colour_index_cells(word, paint_code):
+    return [
+        (0, 0, "COLOR"),
+        (0, 2, word),
+        (1, 0, "CODE"),
+        (1, 2, paint_code),
+    ]
+
+
+def _section_cells(rng, code, model_code, name_hint, parts_per_section, part_numbers):
+    chinese, english = rng.choice(_SECTION_TITLES)
+    cells = [
+        (0, 0, f"{code} {chinese} {english}"),
+        (0, 4, f"{model_code} [{name_hint}]"),
+        (2, 0, "NO."),
+        (2, 1, "PARTS NUMBER"),
+        (2, 3, "DESCRIPTION"),
+        (2, 5, "QTY"),
+        (2, 6, "DATE"),
+        (2, 7, "REMARK"),
+    ]
+    row = 3
+    ref = 0
+    while row - 3 < parts_per_section:
+        ref += 1
+        base = rng.choice(part_numbers)
+        word = rng.choice(_PART_WORDS)
+        # Roughly one callout in six is a painted part listed once per colour.
+        variants = rng.sample(COLOURS, k=min(3, parts_per_section - (row - 3))) if rng.random() < 0.17 else [None]
+        for variant in variants:
+            if variant is None:
+                part_number, description = base, f"{word} {rng.choice([6, 8, 10, 12])}MM"
+            else:
+                suffix, _, paint_code = variant
+                part_number, description = f"{base}-{suffix}", f"{word}({paint_code})"
+            cells.extend([
+                (row, 0, float(ref)),
+                (row, 1, part_number),
+                (row, 3, description),
+                (row, 5, float(rng.choice([1, 1, 1, 2, 4]))),
+                # 1900-system date serials between 2012 and 2024.
+                (row, 6, float(rng.randrange(40909, 45292))),
+            ])
+            if rng.random() < 0.05:
+                cells.append((row, 7, "*"))
+            row += 1
+    return cells
+
+
+# -- images ------------------------------------------------------------------
+
+def _logo():
+    image = Image.new("RGB", (96, 32), "white")
+    ImageDraw.Draw(image).text((8, 10), "SYM", fill="black")
+    return _encode(image, "PNG")
+
+
+def _diagram(rng, size, image_format):
+    """Exploded-view style line art: outlined shapes, leader lines, callouts."""
+    width, height = size
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for callout in range(1, max(8, width * height // 40000)):
+        x, y = rng.randrange(width), rng.randrange(height)
+        w, h = rng.randrange(20, max(21, width // 6)), rng.randrange(20, max(21, height // 6))
+        shape = draw.ellipse if rng.random() < 0.5 else draw.rectangle
+        shape([x, y, x + w, y + h], outline="black", width=2)
+        tx, ty = rng.randrange(width), rng.randrange(height)
+        draw.line([x + w // 2, y + h // 2, tx, ty], fill="black", width=1)
+        draw.text((tx + 2, ty + 2), str(callout), fill="black")
+    return _encode(image, image_format)
+
+
+def _encode(image, image_format):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **({"quality": 85} if image_format == "JPEG" else {}))
+    return buffer.getvalue()
+
+
+# -- BIFF8 -------------------------------------------------------------------
+
+def _record(rtype, body):
+    """A BIFF record, continued over CONTINUE records past the size limit."""
+    pieces = [body[i:i + _MAX_RECORD] for i in range(0, len(body), _MAX_RECORD)] or [b""]
+    out = [struct.pack("<HH", rtype, len(pieces[0])), pieces[0]]
+    for piece in pieces[1:]:
+        out.extend([struct.pack("<HH", _CONTINUE, len(piece)), piece])
+    return b"".join(out)
+
+
+def _bof(substream_type):
+    return _record(_BOF, struct.pack("<HHHHII", 0x0600, substream_type, 0x0DBB, 0x07CC, 0, 0x06))
+
+
+def _unicode_string(text, length_format):
+    try:
+        encoded, flags = text.encode("latin-1"), 0
+    except UnicodeEncodeError:
+        encoded, flags = text.encode("utf-16-le"), 1
+    return struct.pack(length_format, len(text)) + bytes([flags]) + encoded
+
+
+def _cell(row, col, value):
+    if isinstance(value, float):
+        return _record(_NUMBER, struct.pack("<HHHd", row, col, 0, value))
+    return _record(_LABEL, struct.pack("<HHH", row, col, 0) + _unicode_string(value, "<H"))
+
+
+def _escher(rtype, body, *, ver=0, inst=0):
+    return struct.pack("<HHI", (inst << 4) | ver, rtype, len(body)) + body
+
+
+def _drawing_group(blips):
+    entries = []
+    for data in blips:
+        is_png = data.startswith(b"\x89PNG")
+        # The blip record: a 16-byte uid and a tag byte, then the image.
+        blip = _escher(0xF01E if is_png else 0xF01D, bytes(17) + data, inst=0x6E0 if is_png else 0x46A)
+        bse_type = 6 if is_png else 5
+        header = struct.pack("<BB16sHIIIBBBB", bse_type, bse_type, bytes(16), 0xFF, len(blip), 1, 0, 0, 0, 0, 0)
+        entries.append(_escher(0xF007, header + blip, ver=2, inst=bse_type))
+    bstore = _escher(0xF001, b"".join(entries), ver=0xF, inst=len(blips))
+    dgg = _escher(0xF006, struct.pack("<IIII", 1024 * 2, 2, len(blips), 1), ver=0)
+    return _escher(0xF000, dgg + bstore, ver=0xF)
+
+
+def _picture_drawings(drawing_id, pibs):
+    """MSODRAWING/OBJ record pairs placing picture frames for ``pibs``."""
+    records = []
+    for position, pib in enumerate(pibs):
+        shape_id = drawing_id * 1024 + position + 1
+        options = _escher(0xF00B, struct.pack("<HI", 0x4104, pib), ver=3, inst=1)
+        anchor = _escher(0xF010, struct.pack("<H8H", 0, 0, 0, 0, 0, 8, 0, 30, 0))
+        shape = _escher(
+            0xF004,
+            _escher(0xF00A, struct.pack("<II", shape_id, 0x0A00), ver=2, inst=75)
+            + options + anchor + _escher(0xF011, b""),
+            ver=0xF,
+        )
+        if position == 0:
+            group = _escher(0xF003, shape, ver=0xF)
+            body = _escher(0xF002, _escher(0xF008, struct.pack("<II", len(pibs), shape_id), inst=drawing_id) + group, ver=0xF)
+        else:
+            body = shape
+        records.append(_record(_MSODRAWING, body))
+        # OBJ: a picture ftCmo subrecord, then ftEnd.
+        records.append(_record(_OBJ, struct.pack("<HHHHH12s", 0x15, 18, 0x08, position + 1, 0x6011, bytes(12)) + bytes(4)))
+    return b"".join(records)
+
+
+def _worksheet(drawing_id, cells, pibs):
+    rows = max((row for row, _, _ in cells), default=-1) + 1
+    cols = max((col for _, col, _ in cells), default=-1) + 1
+    parts = [_bof(0x0010), _record(_DIMENSIONS, struct.pack("<IIHHH", 0, rows, 0, cols, 0))]
+    parts.extend(_cell(row, col, value) for row, col, value in sorted(cells, key=lambda c: (c[0], c[1])))
+    if pibs:
+        parts.append(_picture_drawings(drawing_id, pibs))
+    parts.append(_record(_EOF, b""))
+    return b"".join(parts)
+
+
+def _workbook_stream(sheets, blips):
+    """The BIFF8 Workbook stream: globals, then one substream per sheet."""
+    substreams = [_worksheet(index + 1, cells, pibs) for index, (_, cells, pibs) in enumerate(sheets)]
+    head = _bof(0x0005) + _record(_CODEPAGE, struct.pack("<H", 1200)) + _record(_DATEMODE, struct.pack("<H", 0))
+    tail = _record(_MSODRAWINGGROUP, _drawing_group(blips)) + _record(_EOF, b"")
+
+    def boundsheets(offsets):
+        return b"".join(
+            _record(_BOUNDSHEET, struct.pack("<IBB", offset, 0, 0) + _unicode_string(name, "<B"))
+            for offset, (name, _, _) in zip(offsets, sheets)
+        )
+
+    # BOUNDSHEET sizes do not depend on the offsets they carry.
+    offset = len(head) + len(boundsheets([0] * len(sheets))) + len(tail)
+    offsets = []
+    for substream in substreams:
+        offsets.append(offset)
+        offset += len(substream)
+    return head + boundsheets(offsets) + tail + b"".join(substreams)
+
+
+# -- OLE2 --------------------------------------------------------------------
+
+def _directory_entry(name, entry_type, *, child=_NOSTREAM, start=_ENDOFCHAIN, size=0):
+    encoded = (name + "\0").encode("utf-16-le") if name else b""
+    return struct.pack(
+        "<64sHBBIII16sIQQIII",
+        encoded, len(encoded), entry_type, 1, _NOSTREAM, _NOSTREAM, child,
+        bytes(16), 0, 0, 0, start, size, 0,
+    )
+
+
+def _compound_file(stream):
+    """A version 3 compound file holding ``stream`` as its ``Workbook``."""
+    # Streams under the cutoff would live in the mini stream; BIFF readers stop
+    # at the EOF record, so padding is cheaper than writing one.
+    stream = stream.ljust(_MINI_STREAM_CUTOFF, b"\0")
+    data_sectors = -(-len(stream) // _SECTOR)
+    fat_sectors = difat_sectors = 0
+    while True:
+        needed = data_sectors + 1 + fat_sectors + difat_sectors
+        fat = -(-needed // (_SECTOR // 4))
+        difat = max(0, -(-(fat - 109) // 127))
+        if (fat, difat) == (fat_sectors, difat_sectors):
+            break
+        fat_sectors, difat_sectors = fat, difat
+
+    directory_sector = data_sectors
+    first_fat = directory_sector + 1
+    first_difat = first_fat + fat_sectors
+    total = first_difat + difat_sectors
+
+    entries = [sector + 1 for sector in range(data_sectors - 1)] + [_ENDOFCHAIN, _ENDOFCHAIN]
+    entries += [_FATSECT] * fat_sectors + [_DIFSECT] * difat_sectors
+    entries += [_FREESECT] * (fat_sectors * (_SECTOR // 4) - total)
+    fat_ids = list(range(first_fat, first_difat))
+
+    difat_blocks = []
+    for index in range(difat_sectors):
+        ids = fat_ids[109 + index * 127:109 + (index + 1) * 127]
+        following = first_difat + index + 1 if index + 1 < difat_sectors else _ENDOFCHAIN
+        ids += [_FREESECT] * (127 - len(ids)) + [following]
+        difat_blocks.append(struct.pack("<128I", *ids))
+
+    header_difat = fat_ids[:109] + [_FREESECT] * (109 - len(fat_ids[:109]))
+    header = struct.pack(
+        "<8s16sHHHHH6sIIIIIIIII109I",
+        b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", bytes(16), 0x3E, 3, 0xFFFE, 9, 6, bytes(6),
+        0, fat_sectors, directory_sector, 0, _MINI_STREAM_CUTOFF, _ENDOFCHAIN, 0,
+        first_difat if difat_sectors else _ENDOFCHAIN, difat_sectors, *header_difat,
+    )
+    directory = (
+        _directory_entry("Root Entry", 5, child=1)
+        + _directory_entry("Workbook", 2, start=0, size=len(stream))
+        + _directory_entry("", 0) * 2
+    )
+    return b"".join([
+        header,
+        stream.ljust(data_sectors * _SECTOR, b"\0"),
+        directory,
+        struct.pack(f"<{len(entries)}I", *entries),
+        *difat_blocks,
+    ])
@@ -0,0 +1,60 @@
+"""One read of a parts-book .xls, shared by every consumer.
+
+xlrd (the cell tables) and :mod:`parts.ingestion.escher_images` (the diagrams)
+both work on the BIFF ``Workbook`` stream inside the OLE container. Opening the
+file separately for each costs a disk read and an OLE parse apiece. A
+:class:`WorkbookFile` reads the file once, optionally through ``mmap``,
+extracts the stream once, and hands the same bytes to both. xlrd accepts a
+bare BIFF stream as ``file_contents`` and skips its own OLE parse.
+"""
+import mmap
+from pathlib import Path
+
+import olefile
+import xlrd
+
+
+class WorkbookFile:
+    """A parts book whose Workbook stream is read from disk at most once."""
+
+    def __init__(self, path, *, use_mmap=False):
+        self.path = Path(path)
+        self.use_mmap = use_mmap
+        self._stream = None
+
+    def __repr__(self):
+        return f"WorkbookFile({str(self.path)!r})"
+
+    @property
+    def stream(self):
+        """The raw BIFF ``Workbook`` stream, read on first use."""
+        if self._stream is None:
+            with open(self.path, "rb") as fh:
+                if self.use_mmap:
+                    # Only the OLE directory and the stream's own sectors are
+                    # paged in; other streams in the container are never read.
+                    with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        self._stream = _workbook_stream(mapped)
+                else:
+                    self._stream = _workbook_stream(fh.read())
+        return self._stream
+
+    def open_book(self, **kwargs):
+        """Open the stream with xlrd; keyword arguments go to ``open_workbook``."""
+        return xlrd.open_workbook(file_contents=self.stream, **kwargs)
+
+
+def _workbook_stream(data):
+    ole = olefile.OleFileIO(data)
+    try:
+        stream_name = "Workbook" if ole.exists("Workbook") else "Book"
+        return ole.openstream(stream_name).read()
+    finally:
+        ole.close()
+
+
+def as_workbook(source, *, use_mmap=False):
+    """Return ``source`` as a :class:`WorkbookFile`, wrapping a path if needed."""
+    if isinstance(source, WorkbookFile):
+        return source
+    return WorkbookFile(source, use_mmap=use_mmap)
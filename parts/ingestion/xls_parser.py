@@ -3,6 +3,8 @@
 Uses ``xlrd`` for the cell tables and :mod:`parts.ingestion.escher_images` for the
 section diagrams. Colour attributes are derived via :mod:`parts.ingestion.colour`.
 """
+import hashlib
+import json
 import logging
 import re
 
@@ -10,7 +12,9 @@ import xlrd
 
 from parts.keys import normalize_part_number
 from . import colour as colour_mod
-from .escher_images import extract_diagrams
+from . import metrics
+from .escher_images import extract_diagram_candidates
+from .workbook import as_workbook
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +58,7 @@ def parse_model_code(book):
 
 def read_model_code(path):
     """Read only a book's stable model code without extracting its diagrams."""
-    book = xlrd.open_workbook(path, formatting_info=False, on_demand=True)
+    book = as_workbook(path, use_mmap=True).open_book(formatting_info=False, on_demand=True)
     try:
         return parse_model_code(book)
     finally:
@@ -213,9 +217,29 @@ def _annotate_colour(rows, colour_index):
             )
 
 
+def section_fingerprint(section):
+    """sha256 of a parsed section's metadata and parts rows.
+
+    The diagram is excluded; it carries its own source hash. Two parses of an
+    unchanged sheet always produce the same fingerprint.
+    """
+    payload = {
+        "code": section["code"],
+        "group": section["group"],
+        "name": section["name"],
+        "sort_order": section["sort_order"],
+        "parts": section["parts"],
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
 def parse_book(path):
     """Parse a book .xls into a structured dict.
 
+    ``path`` may be a :class:`~parts.ingestion.workbook.WorkbookFile`; either
+    way the file is read and de-OLE'd once for both cells and diagrams.
+
     Returns::
 
         {
@@ -223,16 +247,29 @@ def parse_book(path):
             "model_name_hint": str,
             "colour_index": {paint_code: colour_name},
             "sections": [
-                {"code", "group", "name", "sort_order", "diagram_bytes", "parts": [...]},
+                {"code", "group", "name", "sort_order", "diagram_bytes",
+                 "diagram_fallbacks", "parts": [...]},
             ],
         }
+
+    ``diagram_fallbacks`` lists the sheet's smaller blips, largest first, for
+    when ``diagram_bytes`` will not encode.
     """
-    book = xlrd.open_workbook(path, formatting_info=False)
+    workbook = as_workbook(path)
+    with metrics.book(workbook.path.name), metrics.stage("parse_book") as counts:
+        parsed = _parse_workbook(workbook)
+        counts.rows = sum(len(section["parts"]) for section in parsed["sections"])
+        counts.bytes = len(workbook.stream)
+    return parsed
+
+
+def _parse_workbook(workbook):
+    book = workbook.open_book(formatting_info=False)
     diagrams = {}
     try:
-        diagrams = extract_diagrams(path)
+        diagrams = extract_diagram_candidates(workbook)
     except Exception as exc:  # diagrams are best-effort; never abort the book
-        logger.warning("Diagram extraction failed for %s: %s", path, exc)
+        logger.warning("Diagram extraction failed for %s: %s", workbook.path, exc)
 
     colour_index = parse_colour_index(book)
     sections = []
@@ -241,12 +278,14 @@ def parse_book(path):
             continue
         sheet = book.sheet_by_name(name)
         section_name = parse_section_name(sheet, name)
+        diagram, *fallbacks = diagrams.get(name) or [None]
         sections.append({
             "code": name,
             "group": "engine" if name[0] == "E" else "frame",
             "name": section_name,
             "sort_order": len(sections),
-            "diagram_bytes": diagrams.get(name),
+            "diagram_bytes": diagram,
+            "diagram_fallbacks": fallbacks,
             "parts": parse_section_parts(sheet, book.datemode, colour_index),
         })
 
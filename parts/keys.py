@@ -1,4 +1,5 @@
 """Stable, human-readable identifiers for catalogue fitments."""
+import hashlib
 
 
 def normalize_part_number(value):
@@ -22,3 +23,13 @@ def build_fitment_key(*, model_code, section_code, ref_number, part_number, effe
         date_key,
     ))
     return key if occurrence == 1 else f"{key}:{occurrence}"
+
+
+def part_set_hash(part_numbers):
+    """Return ``(sha256, count)`` of the distinct part numbers a section lists.
+
+    Order, callouts and repeated rows do not matter, so two sections listing
+    exactly the same parts share the hash.
+    """
+    numbers = sorted({normalize_part_number(number) for number in part_numbers} - {""})
+    return hashlib.sha256("\n".join(numbers).encode("utf-8")).hexdigest(), len(numbers)
@@ -0,0 +1,194 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from parts.ingestion import metrics, storage
+from parts.ingestion.importer import import_book, import_pricing
+from parts.ingestion.synthetic_books import CATALOGUE_SIZES, write_catalogue
+from parts.ingestion.xls_parser import parse_book
+from parts.management.commands.benchmark_pricing import synthetic_rows
+from parts.management.utils.benchmark_database import add_database_argument, benchmark_database
+
+# Stages every size reports; anything else recorded (e.g. diagram_webp_bytes)
+# is saved too.
+STAGES = ("parse_book", "extract_diagrams", "import_book", "reimport_book", "import_pricing")
+
+# The PA feed lists the whole SYM range, not just the books being imported.
+FEED_ROWS_PER_BOOK_PART = 3
+
+
+class _Rollback(Exception):
+    pass
+
+
+def git_commit():
+    """The checked-out commit, or None outside a git checkout."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+@contextmanager
+def scratch_storage(directory):
+    """Send diagram files and the diagram cache to ``directory`` for the block.
+
+    Every run then encodes its diagrams from scratch, and nothing it writes
+    outlives the rolled-back rows that referenced it.
+    """
+    directory = Path(directory)
+    original = storage.BASE_DIR
+    storage.BASE_DIR = directory / "sym_parts_files"
+    try:
+        with override_settings(MEDIA_ROOT=str(directory / "media")):
+            yield
+    finally:
+        storage.BASE_DIR = original
+
+
+def _pricing_feed(books):
+    """A PA feed pricing every part in ``books`` plus feed-only parts."""
+    part_numbers = sorted({
+        part["part_number"] for _, parsed in books for section in parsed["sections"] for part in section["parts"]
+    })
+    for index, part_number in enumerate(part_numbers):
+        yield {
+            "part_number": part_number,
+            "description": "",
+            "available": index % 9,
+            "price": Decimal(5 + index % 300) + Decimal("0.50"),
+        }
+    yield from synthetic_rows(len(part_numbers) * FEED_ROWS_PER_BOOK_PART)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time parse_book, extract_diagrams, import_book and import_pricing on synthetic "
+        "catalogues, rolling back every run, and save the timings as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            choices=list(CATALOGUE_SIZES),
+            default=list(CATALOGUE_SIZES),
+            help="Catalogue sizes to time.",
+        )
+        parser.add_argument("--repeat", type=int, default=1, help="Runs per size; the fastest of each stage is kept.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed for the generated books.")
+        parser.add_argument(
+            "--books-dir",
+            help="Keep the generated books here and reuse them on later runs with the same size and seed.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Where to write the JSON results. Defaults to sym_parts_files/reports/benchmark-<timestamp>.json.",
+        )
+        parser.add_argument("--compare", help="An earlier results file to print stage-by-stage changes against.")
+        add_database_argument(parser)
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+        repeat = max(options["repeat"], 1)
+        seed = options["seed"]
+        started_at = timezone.now()
+        output = Path(options["output"] or storage.reports_dir() / f"benchmark-{started_at:%Y%m%dT%H%M%S}.json")
+
+        results = {}
+        with benchmark_database(options["database"]), tempfile.TemporaryDirectory() as scratch:
+            books_root = Path(options["books_dir"] or scratch)
+            for size in options["sizes"]:
+                books_dir = books_root / f"{size}-{seed}"
+                paths = sorted(books_dir.glob("*.xls")) or write_catalogue(books_dir, size, seed=seed)
+                runs = []
+                for attempt in range(repeat):
+                    with scratch_storage(Path(scratch) / f"run-{size}-{attempt}"):
+                        runs.append(self._run(paths))
+                results[size] = {
+                    "books": len(paths),
+                    "bytes": sum(path.stat().st_size for path in paths),
+                    "stages": {
+                        name: min((run[name] for run in runs if name in run), key=lambda entry: entry["seconds"])
+                        for name in sorted({name for run in runs for name in run})
+                    },
+                }
+                self.stdout.write(self._summary(size, results[size]))
+
+        report = {
+            "commit": git_commit(),
+            "created_at": started_at.isoformat(),
+            "python": platform.python_version(),
+            "database": connections[options["database"]].vendor,
+            "seed": seed,
+            "repeat": repeat,
+            "sizes": results,
+        }
+        output.parent.mkdir(parents=True, exist_ok=True)
+        partial = output.with_name(f"{output.name}.tmp")
+        partial.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(partial, output)
+        self.stdout.write(f"Results written to {output}")
+
+        if baseline is not None:
+            self._compare(baseline, report)
+
+    def _run(self, paths):
+        """Parse and import every book, re-import them unchanged, price them; roll it all back."""
+        try:
+            with transaction.atomic():
+                with metrics.recording() as first:
+                    books = [(path, parse_book(path)) for path in paths]
+                    for path, parsed in books:
+                        import_book(parsed, source_filename=path.name)
+                    import_pricing(_pricing_feed(books))
+                with metrics.recording() as again:
+                    for path, parsed in books:
+                        import_book(parsed, source_filename=path.name)
+                raise _Rollback
+        except _Rollback:
+            pass
+        stages = first.snapshot()["stages"]
+        stages["reimport_book"] = again.snapshot()["stages"]["import_book"]
+        return stages
+
+    def _summary(self, size, result):
+        stages = result["stages"]
+        parts = stages["parse_book"]["rows"]
+        timings = ", ".join(f"{name} {stages[name]['seconds']:.2f}s" for name in STAGES if name in stages)
+        return (
+            f"{size}: {result['books']} books, {parts} parts, {result['bytes'] / 1e6:.1f} MB; {timings}."
+        )
+
+    def _compare(self, baseline, report):
+        self.stdout.write(f"Against {baseline.get('commit') or 'baseline'}:")
+        for size, result in report["sizes"].items():
+            before = baseline.get("sizes", {}).get(size)
+            if not before:
+                continue
+            for name in STAGES:
+                old = before["stages"].get(name, {}).get("seconds")
+                new = result["stages"].get(name, {}).get("seconds")
+                if not old or new is None:
+                    continue
+                self.stdout.write(f"  {size} {name}: {old:.2f}s -> {new:.2f}s ({(new - old) / old:+.0%})")
@@ -0,0 +1,59 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parts.ingestion import escher_images, storage
+from parts.management.commands import _escher_reference
+
+
+def _best_of(repeat, func, *args):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def _reference_extract_diagrams(path):
+    """The extractor before offset indexing, kept verbatim in ``_escher_reference``."""
+    return _escher_reference.extract_diagrams(path)
+
+
+class Command(BaseCommand):
+    help = "Time diagram extraction on SYM books against the original decode-every-blip extractor."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "books",
+            nargs="*",
+            help="Books to time. Defaults to the sample .xls files in the SYM parts data directory.",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per book; the fastest is reported.")
+
+    def handle(self, *args, **options):
+        books = [Path(book) for book in options["books"]] or sorted(storage.BASE_DIR.glob("*.xls"))
+        if not books:
+            raise CommandError(f"No .xls books to benchmark in {storage.BASE_DIR}.")
+        repeat = max(options["repeat"], 1)
+
+        disagreed = []
+        for book in books:
+            diagrams, lazy_seconds = _best_of(repeat, escher_images.extract_diagrams, str(book))
+            reference, reference_seconds = _best_of(repeat, _reference_extract_diagrams, str(book))
+            copied = sum(len(data) for data in diagrams.values())
+            speedup = reference_seconds / lazy_seconds if lazy_seconds else 0
+            self.stdout.write(
+                f"{book.name}: extract_diagrams {lazy_seconds:.3f}s "
+                f"({len(diagrams)} diagrams, {copied / 1e6:.1f} MB copied); "
+                f"original {reference_seconds:.3f}s ({len(reference)} diagrams); {speedup:.1f}x."
+            )
+            if diagrams != reference:
+                disagreed.append(book.name)
+
+        if disagreed:
+            raise CommandError("extract_diagrams disagrees with the original on: " + ", ".join(disagreed))
+        self.stdout.write(self.style.SUCCESS("Both extractors chose identical diagrams."))
@@ -0,0 +1,58 @@
+import csv
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parts.ingestion.pa_csv import iter_pa_rows, iter_pa_rows_pandas
+
+PARSERS = {
+    "csv": iter_pa_rows,
+    "pandas": iter_pa_rows_pandas,
+}
+
+
+def write_synthetic_feed(path, count):
+    """Write a PA CSV of ``count`` rows shaped like the real feed."""
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["PART NUMBER", "DESCRIPTION", "AVAILABLE", " RRP+GST ", "ADD GST"])
+        for index in range(count):
+            suffix = "-rd" if index % 5 == 0 else ""
+            writer.writerow([
+                f"{index % 99999:05d}-k{index % 26:02d}-{index:06d}{suffix}",
+                f"BENCHMARK PART {index}" + (" (R-010CA)" if suffix else ""),
+                "" if index % 13 == 0 else index % 17,
+                f"${10 + index % 2500:,}.{index % 100:02d}",
+                "ADD GST",
+            ])
+
+
+class Command(BaseCommand):
+    help = "Time the csv and pandas PA parsers on a synthetic feed and check they agree."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="Rows in the synthetic feed.")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per parser; the fastest is reported.")
+
+    def handle(self, *args, **options):
+        rows = max(options["rows"], 1)
+        repeat = max(options["repeat"], 1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "PA-benchmark.csv"
+            write_synthetic_feed(path, rows)
+            results = {}
+            for name, parser in PARSERS.items():
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    parsed = list(parser(str(path)))
+                    timings.append(time.perf_counter() - started)
+                results[name] = parsed
+                best = min(timings)
+                self.stdout.write(f"{name}: {best:.2f}s, {len(parsed) / best:,.0f} rows/sec; {len(parsed)} rows.")
+
+        if results["pandas"] != results["csv"]:
+            raise CommandError("The pandas parser disagrees with the csv parser.")
+        self.stdout.write(self.style.SUCCESS("Both parsers yielded identical rows."))
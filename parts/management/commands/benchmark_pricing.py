@@ -0,0 +1,75 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from parts.ingestion.importer import import_pricing
+from parts.ingestion.staged_pricing import import_pricing_staged
+from parts.management.utils.benchmark_database import add_database_argument, benchmark_database
+
+ENGINES = {
+    "batched": import_pricing,
+    "staged": import_pricing_staged,
+}
+
+
+def synthetic_rows(count, *, price_step=0):
+    """A PA feed of ``count`` distinct parts; ``price_step`` shifts every price."""
+    for index in range(count):
+        suffix = "-RD" if index % 5 == 0 else ""
+        yield {
+            "part_number": f"BENCH-{index:06d}{suffix}",
+            "description": f"Benchmark part {index}" + (" (R-010CA)" if suffix else ""),
+            "available": index % 17,
+            "price": Decimal(10 + index % 500 + price_step) + Decimal("0.95"),
+        }
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Time the batched and staged PA pricing imports on a synthetic feed, rolling back every run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000, help="Parts in the synthetic feed.")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per engine; the fastest is reported.")
+        add_database_argument(parser)
+
+    def handle(self, *args, **options):
+        rows = max(options["rows"], 1)
+        repeat = max(options["repeat"], 1)
+        with benchmark_database(options["database"]):
+            self._benchmark(rows, repeat)
+
+    def _benchmark(self, rows, repeat):
+        for name, engine in ENGINES.items():
+            runs = [self._time(engine, rows) for _ in range(repeat)]
+            (load_seconds, load_queries), _ = min(runs, key=lambda run: run[0][0])
+            _, (reimport_seconds, reimport_queries) = min(runs, key=lambda run: run[1][0])
+            self.stdout.write(
+                f"{name}: first load {load_seconds:.2f}s ({load_queries} queries); "
+                f"re-import with new prices {reimport_seconds:.2f}s ({reimport_queries} queries); "
+                f"{rows} rows."
+            )
+
+    def _time(self, engine, rows):
+        """Time a first load and a re-import of the feed, then roll both back.
+
+        Both runs include the ``in_pa_feed`` sweep, as a real import does.
+        """
+        timings = []
+        try:
+            with transaction.atomic():
+                for price_step in (0, 1):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        engine(synthetic_rows(rows, price_step=price_step))
+                        timings.append((time.perf_counter() - started, len(queries)))
+                raise _Rollback
+        except _Rollback:
+            pass
+        return timings
@@ -1,10 +1,43 @@
+import json
+import os
+import time
+from collections import deque
 from pathlib import Path
 
 from django.core.files.base import ContentFile
 from django.core.management.base import BaseCommand
 
-from parts.ingestion.diagram_images import diagram_webp_bytes
-from parts.models import PartSection
+from parts.ingestion import pool, storage
+from parts.ingestion.diagram_cache import cached_webp_bytes
+from parts.models import PartSection, PartsSettings
+
+CHECKPOINT_FILENAME = "convert_parts_diagrams_webp.checkpoint.json"
+
+
+def checkpoint_path():
+    return Path(storage.BASE_DIR) / CHECKPOINT_FILENAME
+
+
+def read_checkpoint(field_names):
+    """The last fully converted section id for this field selection, or None."""
+    try:
+        state = json.loads(checkpoint_path().read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if state.get("fields") != list(field_names):
+        return None
+    return state.get("last_section_id")
+
+
+def write_checkpoint(field_names, last_section_id):
+    path = checkpoint_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f"{path.name}.tmp")
+    partial.write_text(
+        json.dumps({"fields": list(field_names), "last_section_id": last_section_id}),
+        encoding="utf-8",
+    )
+    os.replace(partial, path)
 
 
 class Command(BaseCommand):
@@ -27,6 +60,17 @@ class Command(BaseCommand):
             action="store_true",
             help="Report how many files would be converted without changing storage or database records.",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Encode diagrams in this many processes; storage and database writes stay in this one.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint left by an interrupted run and start from the first section.",
+        )
 
     def handle(self, *args, **options):
         dry_run = options["dry_run"]
@@ -35,51 +79,127 @@ class Command(BaseCommand):
             field_names = ("diagram_image",)
         elif options["curated_only"]:
             field_names = ("curated_diagram_image",)
-        converted = 0
-        already_webp = 0
-        missing = 0
+        self.converted = 0
+        self.already_webp = 0
+        self.missing = 0
+        self.bytes_saved = 0
+        # (field, old name) -> WebP name, for files already converted this run.
+        self.renamed = {}
+
+        sections = PartSection.objects.order_by("pk")
+        resume_after = None if options["restart"] else read_checkpoint(field_names)
+        if resume_after is not None:
+            sections = sections.filter(pk__gt=resume_after)
+            self.stdout.write(f"Resuming after section {resume_after}.")
 
-        for section in PartSection.objects.iterator():
-            changed_fields = []
-            old_files = []
+        started = time.perf_counter()
+        if dry_run:
+            self._count(sections, field_names)
+        else:
+            try:
+                self._convert(sections, field_names, workers=options["workers"])
+            finally:
+                if self.converted:
+                    # Cached payloads still name the deleted originals.
+                    PartsSettings.bump_catalogue_version()
+            checkpoint_path().unlink(missing_ok=True)
+        elapsed = time.perf_counter() - started
+
+        action = "Would convert" if dry_run else "Converted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {self.converted} diagram files; {self.already_webp} already WebP; {self.missing} missing."
+            )
+        )
+        if not dry_run and self.converted:
+            self.stdout.write(
+                f"{self.converted / elapsed:.1f} images/sec over {elapsed:.1f}s; "
+                f"{self.bytes_saved / 1e6:.1f} MB saved."
+            )
+
+    def _count(self, sections, field_names):
+        pending = set()
+        for section in sections.iterator():
+            for field_name in field_names:
+                image = getattr(section, field_name)
+                if not image:
+                    continue
+                if image.name.lower().endswith(".webp"):
+                    self.already_webp += 1
+                elif (field_name, image.name) not in pending:
+                    # Builds share unchanged files; each is converted once.
+                    pending.add((field_name, image.name))
+                    self.converted += 1
+
+    def _sources(self, sections, field_names, jobs):
+        """Yield each image still to convert, queueing its ``(section, field)``.
+
+        Results come back from the pool in input order, so ``jobs`` lines up
+        with them without sending anything but the raw bytes to a worker.
+        """
+        for section in sections.iterator():
             for field_name in field_names:
                 image = getattr(section, field_name)
                 if not image:
                     continue
                 if image.name.lower().endswith(".webp"):
-                    already_webp += 1
+                    self.already_webp += 1
                     continue
-                if dry_run:
-                    converted += 1
+                if (field_name, image.name) in self.renamed:
+                    # Rewritten with an earlier row that shared the file.
                     continue
                 try:
                     with image.open("rb") as source:
-                        webp = diagram_webp_bytes(source.read())
+                        data = source.read()
                 except FileNotFoundError:
-                    missing += 1
+                    self.missing += 1
                     self.stderr.write(f"Missing {field_name} for section {section.id}: {image.name}")
                     continue
+                jobs.append((section, field_name))
+                yield data
 
-                converted += 1
+    def _convert(self, sections, field_names, *, workers):
+        jobs = deque()
+        current = None
+        changed_fields = []
+        old_files = []
 
-                old_name = image.name
-                image.save(
-                    f"{Path(image.name).stem}.webp",
-                    ContentFile(webp),
-                    save=False,
-                )
-                old_files.append((image.storage, old_name, image.name))
-                changed_fields.append(field_name)
+        for data, webp, _ in pool.bounded_map(
+            cached_webp_bytes, self._sources(sections, field_names, jobs), workers=workers,
+            # Spawned workers would otherwise cache under the default directory.
+            initializer=storage.use_base_dir, initargs=(storage.BASE_DIR,),
+        ):
+            section, field_name = jobs.popleft()
+            if current is not None and section.pk != current.pk:
+                self._finish_section(current, changed_fields, old_files, field_names)
+                changed_fields, old_files = [], []
+            current = section
 
-            if changed_fields and not dry_run:
-                section.save(update_fields=changed_fields)
-                for storage, old_name, new_name in old_files:
-                    if old_name != new_name:
-                        storage.delete(old_name)
+            image = getattr(section, field_name)
+            if (field_name, image.name) in self.renamed:
+                # Queued again before the first copy's row was finished.
+                continue
+            old_name = image.name
+            image.save(f"{Path(image.name).stem}.webp", ContentFile(webp), save=False)
+            self.renamed[field_name, old_name] = image.name
+            old_files.append((field_name, old_name, image.name))
+            changed_fields.append(field_name)
+            self.converted += 1
+            self.bytes_saved += len(data) - len(webp)
 
-        action = "Would convert" if dry_run else "Converted"
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"{action} {converted} diagram files; {already_webp} already WebP; {missing} missing."
-            )
+        if current is not None:
+            self._finish_section(current, changed_fields, old_files, field_names)
+
+    def _finish_section(self, section, changed_fields, old_files, field_names):
+        if changed_fields:
+            section.save(update_fields=changed_fields)
+        # Other builds' rows naming the same file move to the WebP with this one,
+        # and the original goes only once nothing names it.
+        for field_name, old_name, new_name in old_files:
+            PartSection.objects.filter(**{field_name: old_name}).update(**{field_name: new_name})
+        PartSection.objects.delete_unused_images(
+            old_name for _, old_name, new_name in old_files if old_name != new_name
         )
+        # Sections are converted in primary-key order, so everything up to this
+        # one is done and an interrupted run can pick up after it.
+        write_checkpoint(field_names, section.pk)
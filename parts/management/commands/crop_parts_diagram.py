@@ -3,7 +3,7 @@ from django.core.management.base import BaseCommand, CommandError
 from PIL import Image
 
 from parts.ingestion.diagram_images import diagram_webp_from_image
-from parts.models import PartSection
+from parts.models import PartSection, PartsSettings
 
 
 class Command(BaseCommand):
@@ -21,7 +21,7 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        section = PartSection.objects.select_related("parts_model").filter(
+        section = PartSection.objects.live().select_related("parts_model").filter(
             parts_model__model_code__iexact=options["model_code"],
             code__iexact=options["section_code"],
         ).first()
@@ -39,6 +39,7 @@ class Command(BaseCommand):
 
         crop = image.crop((left, top, right, bottom))
         old_name = section.curated_diagram_image.name if section.curated_diagram_image else ""
+        # Saved under a name no other file has; the rollback build may show the old crop.
         section.curated_diagram_image.save(
             f"{section.parts_model.model_code}_{section.code}.webp",
             ContentFile(diagram_webp_from_image(crop, source_format="PNG")),
@@ -46,6 +47,6 @@ class Command(BaseCommand):
         )
         section.curated_source_hash = section.diagram_source_hash
         section.save(update_fields=["curated_diagram_image", "curated_source_hash"])
-        if old_name and old_name != section.curated_diagram_image.name:
-            section.curated_diagram_image.storage.delete(old_name)
+        PartSection.objects.delete_unused_images([old_name])
+        PartsSettings.bump_catalogue_version()
         self.stdout.write(self.style.SUCCESS(f"Saved curated crop for {section.parts_model.model_code} {section.code}."))
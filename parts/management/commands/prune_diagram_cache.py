@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+
+from parts.ingestion import diagram_cache, storage
+from parts.management.utils import update_curated
+from parts.models import PartSection
+
+
+def _pending_source_hashes(stderr):
+    """Hashes of images ``convert_parts_diagrams_webp`` and ``update --curated`` have yet to encode.
+
+    Both key their entries by the bytes they convert: a stored non-WebP
+    diagram, or a file waiting in the curated-diagrams folder. Once converted
+    those bytes are gone, and so is any use for the entry.
+    """
+    hashes = set()
+    for section in PartSection.objects.only("diagram_image", "curated_diagram_image").iterator():
+        for image in (section.diagram_image, section.curated_diagram_image):
+            if not image or image.name.lower().endswith(".webp"):
+                continue
+            try:
+                with image.open("rb") as source:
+                    hashes.add(storage.sha256_bytes(source.read()))
+            except FileNotFoundError:
+                stderr.write(f"Missing diagram for section {section.id}: {image.name}")
+
+    directory = update_curated._curated_directory()
+    if directory.exists():
+        for path in directory.iterdir():
+            match = update_curated.CURATED_FILENAME.match(path.name)
+            if path.is_file() and match and match["extension"].lower() != "webp":
+                hashes.add(storage.sha256_file(path))
+    return hashes
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete cached WebP diagrams whose source image no parts section references any more "
+        "and no pending conversion will read."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be deleted without deleting it.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        referenced = set(
+            PartSection.objects.exclude(diagram_source_hash="").values_list("diagram_source_hash", flat=True)
+        )
+        referenced |= _pending_source_hashes(self.stderr)
+        removed = 0
+        removed_bytes = 0
+        kept = 0
+
+        for source_hash, path in diagram_cache.iter_entries():
+            if source_hash in referenced:
+                kept += 1
+                continue
+            removed += 1
+            removed_bytes += path.stat().st_size
+            if not dry_run:
+                path.unlink(missing_ok=True)
+
+        action = "Would remove" if dry_run else "Removed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {removed} cached diagrams ({removed_bytes / 1e6:.1f} MB); kept {kept}."
+            )
+        )
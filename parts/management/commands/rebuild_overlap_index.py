@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from parts.models import PartsModel, PartSection, PartsSettings
+from parts.overlap import (
+    indexed_models_sharing_parts_with,
+    indexed_models_using_each_part_in,
+    models_sharing_parts_with,
+    models_using_each_part_in,
+    rebuild_model_overlaps,
+    rebuild_part_usage,
+    refresh_part_sets,
+    section_part_sets,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute each section's part-set hash, the ModelOverlap ranking and the PartUsage "
+        "index the catalogue pages read, or with --check compare them with a fresh computation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Report books and live sections whose stored overlap is out of date; change nothing.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            self._check()
+            return
+        refreshed = refresh_part_sets(PartSection.objects.all())
+        overlaps = rebuild_model_overlaps()
+        usages = rebuild_part_usage()
+        PartsSettings.bump_catalogue_version()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed {refreshed} part-set hashes; indexed {overlaps} model overlaps "
+                f"and {usages} part usages."
+            )
+        )
+
+    def _check(self):
+        mismatched = 0
+        books = 0
+        checked = 0
+        for model in PartsModel.objects.filter(is_active=True).order_by("model_code"):
+            books += 1
+            if models_sharing_parts_with(model) != indexed_models_sharing_parts_with(model):
+                mismatched += 1
+                self.stderr.write(f"{model.model_code}: stored books sharing parts differ from the computed ones.")
+            sections = list(model.sections.live())
+            checked += len(sections)
+            part_sets = section_part_sets(model.sections.live())
+            for section in sections:
+                if (section.part_set_hash, section.part_count) != part_sets.get(section.id, ("", 0)):
+                    problem = "stored part-set hash does not match its parts"
+                elif models_using_each_part_in(section) != indexed_models_using_each_part_in(section):
+                    problem = "stored books using its parts differ from the computed ones"
+                else:
+                    continue
+                mismatched += 1
+                self.stderr.write(f"{model.model_code} {section.code}: {problem}.")
+        if mismatched:
+            raise CommandError(
+                f"{mismatched} books or sections are out of date; run rebuild_overlap_index to recompute them."
+            )
+        self.stdout.write(self.style.SUCCESS(f"Index matches for all {books} books and {checked} live sections."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from parts.ingestion.importer import rollback_book
+from parts.models import PartsModel
+
+
+class Command(BaseCommand):
+    help = "Republish the catalogue version a book's last import replaced."
+
+    def add_arguments(self, parser):
+        parser.add_argument("model_code", help="SYM model code of the book, e.g. AX15W2-6.")
+
+    def handle(self, *args, **options):
+        model = PartsModel.objects.filter(model_code__iexact=options["model_code"]).first()
+        if model is None:
+            raise CommandError(f"No parts model {options['model_code']}.")
+        try:
+            model = rollback_book(model)
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(self.style.SUCCESS(f"{model} is back on catalogue version {model.catalog_version}."))
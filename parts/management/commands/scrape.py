@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand, CommandError
 
+from parts.ingestion import source_page
 from parts.management.utils import scrape_parts, scrape_prices
 
 
@@ -12,6 +13,17 @@ class Command(BaseCommand):
         source.add_argument('--prices', action='store_true', help='Scrape Price & Availability.')
         parser.add_argument('--url', help='Override the Select Portal source page URL.')
         parser.add_argument('--force', action='store_true', help='Queue data already present in the archive.')
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Rehash every archived file and rebuild the archive hash manifest.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=source_page.DOWNLOAD_WORKERS,
+            help='With --parts, download this many books at once.',
+        )
 
     def handle(self, *args, **options):
         try:
@@ -21,12 +33,15 @@ class Command(BaseCommand):
                     stderr=self.stderr,
                     url=options.get('url'),
                     force=options['force'],
+                    verify=options['verify'],
+                    workers=options['workers'],
                 )
             else:
                 scrape_prices.run(
                     stdout=self.stdout,
                     url=options.get('url'),
                     force=options['force'],
+                    verify=options['verify'],
                 )
         except RuntimeError as exc:
             raise CommandError(str(exc)) from exc
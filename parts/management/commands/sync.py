@@ -1,5 +1,22 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from parts.ingestion import metrics, storage
+from parts.management.utils import scrape_parts, scrape_prices, update_parts
+from parts.models import SyncRun
+
+# Downloaded books waiting for the parser. Bounded so a fast scrape cannot
+# run unboundedly ahead of a slow import.
+PIPELINE_QUEUE_SIZE = 8
+_POLL_SECONDS = 0.2
 
 
 class Command(BaseCommand):
@@ -12,11 +29,54 @@ class Command(BaseCommand):
         parser.add_argument('--force', action='store_true', help='Queue data already present in the archive.')
         parser.add_argument('--parts-url', help='Override the Select Portal source page URL for --parts.')
         parser.add_argument('--prices-url', help='Override the Select Portal source page URL for --prices.')
+        parser.add_argument(
+            '--pipeline',
+            action='store_true',
+            help=(
+                'Overlap the stages: parse and import each book as soon as it downloads, '
+                'and import pricing as soon as its scrape finishes.'
+            ),
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='With --pipeline, parse books in this many processes.',
+        )
+        parser.add_argument(
+            '--import-partial-scrape',
+            action='store_true',
+            help=(
+                'With --pipeline, still import the books a failed parts scrape '
+                'queued before it failed.'
+            ),
+        )
 
     def handle(self, *args, **options):
-        scrape_ok = {}
         failures = []
+        started_at = timezone.now()
+        started = time.perf_counter()
 
+        with metrics.recording() as recorder:
+            if options['pipeline']:
+                self._pipeline(options, failures)
+            else:
+                self._sequential(options, failures)
+
+        self._report(
+            recorder.snapshot(),
+            started_at=started_at,
+            seconds=time.perf_counter() - started,
+            pipeline=options['pipeline'],
+            failures=failures,
+        )
+        if failures:
+            raise CommandError('Sync finished with failures: ' + ', '.join(failures))
+
+        self.stdout.write(self.style.SUCCESS('Sync complete.'))
+
+    def _sequential(self, options, failures):
+        scrape_ok = {}
         for target in ('parts', 'prices'):
             label = f'scrape --{target}'
             scrape_options = {target: True, 'force': options['force']}
@@ -28,14 +88,145 @@ class Command(BaseCommand):
         for target in ('parts', 'prices'):
             label = f'update --{target}'
             if not scrape_ok[target]:
-                self.stdout.write(self.style.WARNING(f'Skipping {label}: its scrape step failed.'))
+                self._skip(label)
                 continue
             self._run('update', label, {target: True}, failures)
 
-        if failures:
-            raise CommandError('Sync finished with failures: ' + ', '.join(failures))
+    def _pipeline(self, options, failures):
+        """Scrape on threads while this thread parses (via a pool) and imports.
 
-        self.stdout.write(self.style.SUCCESS('Sync complete.'))
+        Database writes stay on this thread. Pricing is imported between books
+        as soon as its scrape is done. A failed scrape still skips its update:
+        once the parts scrape has failed no further book is imported, and the
+        rest stay in the inbox for the next run. Books imported while it was
+        still running are kept. With ``--import-partial-scrape`` the books it
+        queued before failing are imported too. Books left in the inbox by
+        earlier runs are only imported after a successful scrape.
+        """
+        books = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        stop = threading.Event()
+        prices_pending = [True]
+
+        def on_queued(path):
+            while not stop.is_set():
+                try:
+                    books.put(path, timeout=_POLL_SECONDS)
+                    return
+                except queue.Full:
+                    continue
+
+        def import_prices_when_scraped(block=False):
+            if not prices_pending[0] or not (block or prices_scrape.done()):
+                return
+            prices_pending[0] = False
+            if self._scrape_failed('scrape --prices', prices_scrape, failures):
+                self._skip('update --prices')
+            else:
+                self._run('update', 'update --prices', {'prices': True}, failures)
+
+        def parts_scrape_failed():
+            return (
+                not options['import_partial_scrape']
+                and parts_scrape.done()
+                and parts_scrape.exception() is not None
+            )
+
+        def scraped_books():
+            seen = set()
+            while True:
+                import_prices_when_scraped()
+                if parts_scrape_failed():
+                    return
+                try:
+                    path = books.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    if parts_scrape.done() and books.empty():
+                        break
+                    continue
+                seen.add(path)
+                yield path
+            if parts_scrape.exception() is None:
+                # Books left in the inbox by an earlier run, as update --parts would.
+                for path in sorted(storage.inbox_dir('books').glob('*.xls')):
+                    if path not in seen:
+                        yield path
+
+        self.stdout.write(self.style.MIGRATE_HEADING('==> scrape --parts | scrape --prices | update --parts'))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            parts_scrape = executor.submit(
+                scrape_parts.run,
+                stdout=self.stdout,
+                stderr=self.stderr,
+                url=options.get('parts_url'),
+                force=options['force'],
+                on_queued=on_queued,
+            )
+            prices_scrape = executor.submit(
+                scrape_prices.run,
+                stdout=self.stdout,
+                url=options.get('prices_url'),
+                force=options['force'],
+            )
+            try:
+                update_parts.import_books(
+                    scraped_books(),
+                    stdout=self.stdout,
+                    workers=options['workers'],
+                    remove_after=True,
+                    stop=parts_scrape_failed,
+                )
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f'update --parts failed: {exc}'))
+                failures.append('update --parts')
+            finally:
+                # Let a scrape blocked on a full queue run to completion.
+                stop.set()
+
+            if self._scrape_failed('scrape --parts', parts_scrape, failures):
+                self._skip('update --parts')
+            import_prices_when_scraped(block=True)
+
+    def _report(self, snapshot, *, started_at, seconds, pipeline, failures):
+        """Write the run's JSON report beside the archive, record a SyncRun and summarise."""
+        finished_at = timezone.now()
+        report = {
+            'started_at': started_at.isoformat(),
+            'finished_at': finished_at.isoformat(),
+            'seconds': seconds,
+            'pipeline': pipeline,
+            'succeeded': not failures,
+            'failures': failures,
+            **snapshot,
+        }
+        path = storage.reports_dir() / f'sync-{started_at:%Y%m%dT%H%M%S}.json'
+        partial = path.with_name(f'{path.name}.tmp')
+        partial.write_text(json.dumps(report, indent=2, sort_keys=True), encoding='utf-8')
+        os.replace(partial, path)
+        SyncRun.objects.create(
+            started_at=started_at,
+            finished_at=finished_at,
+            seconds=seconds,
+            pipeline=pipeline,
+            succeeded=not failures,
+            failures=failures,
+            stages=snapshot['stages'],
+            report_path=str(path),
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'==> {seconds:.1f}s; report written to {path}'))
+        for line in metrics.summary_lines(snapshot):
+            self.stdout.write(f'  {line}')
+
+    def _scrape_failed(self, label, future, failures):
+        exc = future.exception()
+        if exc is None:
+            return False
+        self.stderr.write(self.style.ERROR(f'{label} failed: {exc}'))
+        failures.append(label)
+        return True
+
+    def _skip(self, label):
+        self.stdout.write(self.style.WARNING(f'Skipping {label}: its scrape step failed.'))
 
     def _run(self, command, label, command_options, failures):
         self.stdout.write(self.style.MIGRATE_HEADING(f'==> {label}'))
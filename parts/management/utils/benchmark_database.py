@@ -0,0 +1,54 @@
+"""Where the ingestion benchmarks may run.
+
+The benchmarks drive the real importers, ``in_pa_feed`` sweep included,
+inside one long transaction that is rolled back. On a live catalogue that
+transaction holds row locks on the whole parts table for the entire run, so
+they refuse the default database unless its catalogue is empty, and can be
+pointed at a dedicated ``--database`` alias instead.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from parts.models import Part, PartsModel
+
+
+def add_database_argument(parser):
+    parser.add_argument(
+        "--database",
+        default=DEFAULT_DB_ALIAS,
+        help=(
+            "A scratch database alias to run against. The default database is only used "
+            "while it holds no parts catalogue."
+        ),
+    )
+
+
+@contextmanager
+def benchmark_database(alias):
+    """Send every query in the block, ORM and raw SQL alike, to ``alias``.
+
+    Raises ``CommandError`` for an unknown alias, or for the default database
+    while it holds any parts or books.
+    """
+    if alias not in settings.DATABASES:
+        raise CommandError(f"Unknown database alias {alias!r}.")
+    if alias == DEFAULT_DB_ALIAS:
+        if Part.objects.exists() or PartsModel.objects.exists():
+            raise CommandError(
+                "The default database holds a parts catalogue; the benchmark would lock it for the "
+                "whole run. Pass --database with a scratch database alias."
+            )
+        yield
+        return
+
+    # The importers use the default connection throughout; borrow the scratch
+    # one for it, as scratch_storage borrows the storage directory.
+    default = connections[DEFAULT_DB_ALIAS]
+    connections[DEFAULT_DB_ALIAS] = connections[alias]
+    try:
+        yield
+    finally:
+        connections[DEFAULT_DB_ALIAS] = default
@@ -1,29 +1,51 @@
 import logging
 from urllib.parse import urlparse
 
-import requests
-
-from parts.ingestion import source_page, storage
+from parts.ingestion import metrics, source_page, storage
 
 logger = logging.getLogger(__name__)
 
 
-def run(*, stdout, stderr, url=None, force=False):
+def run(
+    *, stdout, stderr, url=None, force=False, verify=False,
+    workers=source_page.DOWNLOAD_WORKERS, on_queued=None,
+):
+    """Download new or changed books into the archive and import inbox.
+
+    ``on_queued`` is called with each inbox path as soon as it is written, so
+    a caller can start on a book while the rest are still downloading.
+    """
     page_url = url or source_page.SOURCE_URL
     books = source_page.parse_books(source_page.fetch_page(page_url))
     if not books:
         raise RuntimeError('No book links found on the page.')
 
-    archived = storage.archived_files_by_hash('books')
+    archived = storage.archived_files_by_hash('books', verify=verify)
+    # Only ask "has it changed?" about a file we still hold; --force needs bodies.
+    conditional = {} if force else {
+        source_url: validators for source_url, validators in storage.source_validators().items()
+        if validators.get('sha256') in archived
+    }
     queued = 0
-    for book in books:
-        try:
-            data = source_page.download_bytes(book['url'], timeout=120)
-        except requests.RequestException as exc:
+    not_modified = 0
+    seen_validators = {}
+    downloads = source_page.download_many(
+        [book['url'] for book in books], timeout=120, validators=conditional, workers=workers,
+    )
+    # Downloads overlap; hashing and queueing stay in listing order.
+    for book, (_, data, validators, exc) in zip(books, downloads):
+        if exc is not None:
             logger.error('Failed to download %s: %s', book['url'], exc)
             stderr.write(f"Failed: {book['name']} ({exc})")
             continue
-        digest = storage.sha256_bytes(data)
+        if data is None:
+            # 304: the server vouches the archived copy is still current.
+            digest = conditional[book['url']]['sha256']
+            not_modified += 1
+        else:
+            digest = storage.sha256_bytes(data)
+            if validators:
+                seen_validators[book['url']] = {**validators, 'sha256': digest}
         metadata = {
             'name': book['name'],
             'cc_class': book['cc_class'],
@@ -34,12 +56,16 @@ def run(*, stdout, stderr, url=None, force=False):
             # authoritative listing even when the workbook itself is unchanged.
             for archive_path in archived[digest]:
                 storage.write_metadata_sidecar(archive_path, metadata)
-        if not force and digest in archived:
-            continue
         source_filename = urlparse(book['url']).path.rsplit('/', 1)[-1] or f"{book['name']}.xls"
         stem, _, suffix = source_filename.rpartition('.')
         filename = f"{stem or source_filename}-{digest[:12]}.{suffix or 'xls'}"
-        storage.queue_file(
+        # The download was recorded against its URL; parse and import use the file's name.
+        metrics.rename_book(book['url'], filename)
+        if data is None:
+            continue
+        if not force and digest in archived:
+            continue
+        inbox_path = storage.queue_file(
             'books',
             filename,
             data,
@@ -48,6 +74,12 @@ def run(*, stdout, stderr, url=None, force=False):
         archived.setdefault(digest, []).append(storage.archive_dir('books') / filename)
         queued += 1
         stdout.write(f"Queued {filename} ({book['name']}).")
+        if on_queued is not None:
+            on_queued(inbox_path)
 
-    stdout.write(f"Scraped parts: {queued} new/changed of {len(books)} listed.")
+    storage.record_source_validators(seen_validators)
+    stdout.write(
+        f"Scraped parts: {queued} new/changed of {len(books)} listed "
+        f"({not_modified} not modified)."
+    )
     return queued
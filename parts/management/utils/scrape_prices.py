@@ -1,15 +1,23 @@
 from parts.ingestion import source_page, storage
 
 
-def run(*, stdout, url=None, force=False):
+def run(*, stdout, url=None, force=False, verify=False):
     page_url = url or source_page.SOURCE_URL
     pa_url, pa_date = source_page.parse_pa_link(source_page.fetch_page(page_url))
     if not pa_url:
         raise RuntimeError('Could not find the Price & Availability link on the page.')
 
-    data = source_page.download_bytes(pa_url, timeout=60)
+    archived = storage.archived_hashes('pricing', verify=verify)
+    known = storage.source_validators().get(pa_url, {})
+    conditional = None if force or known.get('sha256') not in archived else known
+    data, validators = source_page.download(pa_url, timeout=60, validators=conditional)
+    if data is None:
+        stdout.write('No change — the pricing file is not modified since the last scrape.')
+        return 0
     digest = storage.sha256_bytes(data)
-    if not force and digest in storage.archived_hashes('pricing'):
+    if validators:
+        storage.record_source_validators({pa_url: {**validators, 'sha256': digest}})
+    if not force and digest in archived:
         stdout.write('No change — current pricing file is already archived.')
         return 0
 
@@ -4,12 +4,17 @@ from pathlib import Path
 import re
 
 from django.conf import settings
+from django.core.files.base import ContentFile
 
-from parts.ingestion.diagram_images import diagram_webp_bytes
-from parts.models import PartSection
+from parts.ingestion.diagram_cache import cached_webp_bytes
+from parts.models import PartSection, PartsSettings
 
 
 CURATED_DIRECTORY = Path("parts/curated-diagrams")
+# Linked files move here under a name no other file has, so relinking a
+# section never rewrites the crop an earlier build still shows.
+# (Relative to the field's upload_to, which is CURATED_DIRECTORY.)
+LINKED_DIRECTORY = "linked"
 CURATED_FILENAME = re.compile(
     r"^(?P<model_code>.+)_(?P<section_code>[EF]\d{2})\.(?P<extension>webp|png|jpe?g)$",
     re.IGNORECASE,
@@ -40,12 +45,19 @@ def _matching_files(directory):
     return grouped, ignored
 
 
+def _image_name(path):
+    return (CURATED_DIRECTORY / path.name).as_posix()
+
+
 def run(*, stdout, stderr):
     """Link files in ``mediafiles/parts/curated-diagrams`` to their sections.
 
     A manually saved image must be named ``MODEL_CODE_E01`` (or ``F01``) with
     a PNG, JPEG or WebP extension. PNG/JPEG files are converted to WebP while
     preserving the original source fingerprint used to invalidate stale crops.
+    Each linked file moves to ``linked/``; the section's previous crop is
+    deleted once no build shows it. A file a section already uses (linked in
+    place by an older version of this command) is left alone.
     """
     directory = _curated_directory()
     if not directory.exists():
@@ -53,11 +65,17 @@ def run(*, stdout, stderr):
         return {"updated": 0, "unmatched": 0, "skipped": 0}
 
     grouped, ignored = _matching_files(directory)
+    linked = PartSection.objects.image_names_in_use(
+        _image_name(path) for candidates in grouped.values() for path, _ in candidates
+    )
     updated = 0
     unmatched = 0
     skipped = 0
 
     for (model_code, section_code), candidates in sorted(grouped.items()):
+        candidates = [candidate for candidate in candidates if _image_name(candidate[0]) not in linked]
+        if not candidates:
+            continue
         path, extension = candidates[0]
         if len(candidates) > 1:
             ignored += len(candidates) - 1
@@ -65,7 +83,7 @@ def run(*, stdout, stderr):
                 f"Using {path.name} for {model_code} {section_code}; ignored duplicate formats."
             )
 
-        section = PartSection.objects.select_related("parts_model").filter(
+        section = PartSection.objects.live().select_related("parts_model").filter(
             parts_model__model_code__iexact=model_code,
             code__iexact=section_code,
         ).first()
@@ -78,26 +96,31 @@ def run(*, stdout, stderr):
             stderr.write(f"Skipped {path.name}: {model_code} {section_code} has no imported source diagram.")
             continue
 
-        selected_path = path
-        if extension != "webp":
-            try:
-                webp = diagram_webp_bytes(path.read_bytes())
-            except Exception as exc:
-                skipped += 1
-                stderr.write(f"Skipped {path.name}: unable to read image ({exc}).")
-                continue
-
-            selected_path = directory / f"{section.parts_model.model_code}_{section.code}.webp"
-            selected_path.write_bytes(webp)
-            path.unlink()
-
-        image_name = str(CURATED_DIRECTORY / selected_path.name).replace("\\", "/")
-        section.curated_diagram_image.name = image_name
+        try:
+            webp = path.read_bytes() if extension == "webp" else cached_webp_bytes(path.read_bytes())
+        except Exception as exc:
+            skipped += 1
+            stderr.write(f"Skipped {path.name}: unable to read image ({exc}).")
+            continue
+
+        previous_name = section.curated_diagram_image.name
+        section.curated_diagram_image.save(
+            f"{LINKED_DIRECTORY}/{section.parts_model.model_code}_{section.code}.webp",
+            ContentFile(webp),
+            save=False,
+        )
         section.curated_source_hash = section.diagram_source_hash
         section.save(update_fields=["curated_diagram_image", "curated_source_hash"])
+        path.unlink()
+        PartSection.objects.delete_unused_images([previous_name])
         updated += 1
-        stdout.write(f"Linked curated diagram for {section.parts_model.model_code} {section.code}: {selected_path.name}")
+        stdout.write(
+            f"Linked curated diagram for {section.parts_model.model_code} {section.code}: "
+            f"{path.name} as {section.curated_diagram_image.name}"
+        )
 
+    if updated:
+        PartsSettings.bump_catalogue_version()
     if ignored:
         stdout.write(f"Ignored {ignored} unrecognised or duplicate curated file(s).")
     stdout.write(f"Updated {updated} curated diagram(s); {unmatched} unmatched; {skipped} skipped.")
@@ -2,15 +2,11 @@ import json
 import re
 import time
 
-from django.db import OperationalError, close_old_connections
-from parts.ingestion import storage
+from parts.ingestion import pool, storage
 from parts.ingestion.importer import import_book, unique_model_slug
 from parts.ingestion.xls_parser import parse_book, read_model_code
 from parts.models import PartsModel
 
-DEADLOCK_CODES = {1205, 1213}
-MAX_IMPORT_ATTEMPTS = 3
-
 
 def _metadata(path):
     sidecar = path.with_name(f'{path.name}.json')
@@ -48,70 +44,143 @@ def _fallback_cc_class(*values):
 
 
 def _latest_archived_books(*, stderr):
+    """Newest archived book per model code, in model-code order.
+
+    Model codes come from the archive manifest; only books it has not seen
+    yet are opened, and what they yield is recorded for the next rebuild.
+    """
+    directory = storage.archive_dir('books')
+    learned = {}
     latest = {}
-    for path in storage.archive_dir('books').glob('*.xls'):
-        try:
-            model_code = read_model_code(str(path))
-        except Exception as exc:
-            stderr.write(f'Could not identify archived book {path.name}: {exc}')
+    for filename, entry in storage.archive_manifest('books').items():
+        if not filename.endswith('.xls'):
             continue
+        model_code = entry.get('model_code')
+        if model_code is None:
+            try:
+                model_code = read_model_code(str(directory / filename))
+            except Exception as exc:
+                stderr.write(f'Could not identify archived book {filename}: {exc}')
+                continue
+            learned[filename] = {'model_code': model_code or ''}
         if not model_code:
-            stderr.write(f'Could not identify archived book {path.name}: no model code.')
+            stderr.write(f'Could not identify archived book {filename}: no model code.')
             continue
-        candidate_key = (path.stat().st_mtime_ns, path.name)
+        candidate_key = (entry['mtime_ns'], filename)
         current = latest.get(model_code)
         if current is None or candidate_key > current[0]:
-            latest[model_code] = (candidate_key, path)
+            latest[model_code] = (candidate_key, directory / filename)
+    if learned:
+        storage.annotate_archive('books', learned)
     return [latest[code][1] for code in sorted(latest)]
 
 
-def _import_one(path, *, stdout, remove_after=False):
-    meta = _metadata(path)
-    book_hash = storage.sha256_file(path)
+def _already_imported(path, meta, book_hash, *, stdout):
+    """Handle a book whose exact file was imported before. True if it was."""
     existing_model = PartsModel.objects.filter(book_hash=book_hash).first()
-    if existing_model:
-        if _repair_existing_metadata(existing_model, meta, path):
-            stdout.write(
-                f'Updated metadata for {existing_model.model_code} from {path.name}.'
-            )
-        else:
-            stdout.write(f'Skipped {path.name}: already imported (hash match).')
+    if existing_model is None:
+        return False
+    if _repair_existing_metadata(existing_model, meta, path):
+        stdout.write(
+            f'Updated metadata for {existing_model.model_code} from {path.name}.'
+        )
     else:
-        parsed = parse_book(str(path))
-        display_name = meta.get('name') or parsed.get('model_name_hint') or parsed['model_code']
-        import_kwargs = {
-            'name': display_name,
-            'cc_class': meta.get('cc_class') or _fallback_cc_class(
-                display_name, parsed['model_code'], path.name
-            ),
-            'source_url': meta.get('url', ''),
-            'source_filename': path.name,
-            'book_hash': book_hash,
-        }
-        for attempt in range(1, MAX_IMPORT_ATTEMPTS + 1):
-            try:
-                model = import_book(parsed, **import_kwargs)
-                break
-            except OperationalError as exc:
-                code = exc.args[0] if exc.args else None
-                if code not in DEADLOCK_CODES or attempt == MAX_IMPORT_ATTEMPTS:
-                    raise
-                close_old_connections()
-                stdout.write(
-                    f'Database lock while importing {path.name}; retrying '
-                    f'({attempt}/{MAX_IMPORT_ATTEMPTS - 1}).'
-                )
-                time.sleep(0.25 * attempt)
-        stdout.write(f'Imported {model} — {model.sections.count()} sections.')
+        stdout.write(f'Skipped {path.name}: already imported (hash match).')
+    return True
 
-    if remove_after:
-        path.unlink()
-        sidecar = path.with_name(f'{path.name}.json')
-        if sidecar.exists():
-            sidecar.unlink()
+
+def _write_book(path, parsed, *, meta, book_hash, parse_seconds, stdout):
+    """Import one parsed book. The only place book rows are written."""
+    display_name = meta.get('name') or parsed.get('model_name_hint') or parsed['model_code']
+    started = time.perf_counter()
+    model = import_book(
+        parsed,
+        name=display_name,
+        cc_class=meta.get('cc_class') or _fallback_cc_class(
+            display_name, parsed['model_code'], path.name
+        ),
+        source_url=meta.get('url', ''),
+        source_filename=path.name,
+        book_hash=book_hash,
+    )
+    import_seconds = time.perf_counter() - started
+    # Inbox books share their filename with the archive copy queued beside them.
+    storage.annotate_archive('books', {path.name: {'model_code': model.model_code}})
+    stdout.write(
+        f'Imported {model} — {model.sections.live().count()} sections '
+        f'(parse {parse_seconds:.1f}s, import {import_seconds:.1f}s).'
+    )
+    return model
+
+
+def _remove_from_inbox(path):
+    path.unlink()
+    sidecar = path.with_name(f'{path.name}.json')
+    if sidecar.exists():
+        sidecar.unlink()
 
 
-def run(*, stdout, stderr, archive=False):
+def _import_one(path, *, stdout, remove_after=False):
+    meta = _metadata(path)
+    book_hash = storage.sha256_file(path)
+    if not _already_imported(path, meta, book_hash, stdout=stdout):
+        parsed, parse_seconds = pool.timed(parse_book, str(path))
+        _write_book(
+            path, parsed, meta=meta, book_hash=book_hash,
+            parse_seconds=parse_seconds, stdout=stdout,
+        )
+
+    if remove_after:
+        _remove_from_inbox(path)
+
+
+def import_books(paths, *, stdout, workers, remove_after=False, stop=None):
+    """Parse books in a process pool and import them here, one at a time.
+
+    ``paths`` may still be growing (``sync --pipeline`` feeds it as downloads
+    land); each book is hash-checked as it is taken, in this process. Parsed
+    books reach the writer in input order through a bounded window, so memory
+    stays flat however far the parsers run ahead. Returns the books taken.
+
+    A book whose file matches one already taken this run is skipped: the hash
+    check cannot see it, because the earlier copy may still be in the window.
+    Once ``stop()`` returns true, no further book is written; books not yet
+    written stay in the inbox for the next run.
+    """
+    jobs = {}
+    queued = {}  # book_hash -> name of the file taken with it
+    taken = 0
+
+    def unimported():
+        nonlocal taken
+        for path in paths:
+            taken += 1
+            meta = _metadata(path)
+            book_hash = storage.sha256_file(path)
+            if book_hash in queued:
+                stdout.write(f'Skipped {path.name}: same file as {queued[book_hash]}.')
+            elif not _already_imported(path, meta, book_hash, stdout=stdout):
+                queued[book_hash] = path.name
+                jobs[str(path)] = (path, meta, book_hash)
+                yield str(path)
+                continue
+            if remove_after:
+                _remove_from_inbox(path)
+
+    for key, parsed, parse_seconds in pool.bounded_map(parse_book, unimported(), workers=workers):
+        if stop is not None and stop():
+            break
+        path, meta, book_hash = jobs.pop(key)
+        _write_book(
+            path, parsed, meta=meta, book_hash=book_hash,
+            parse_seconds=parse_seconds, stdout=stdout,
+        )
+        if remove_after:
+            _remove_from_inbox(path)
+    return taken
+
+
+def run(*, stdout, stderr, archive=False, workers=1):
     if archive:
         files = _latest_archived_books(stderr=stderr)
         source_label = 'parts archive'
@@ -123,7 +192,14 @@ def run(*, stdout, stderr, archive=False):
         stdout.write(f'No model books found in the {source_label}.')
         return 0
 
-    for path in files:
-        _import_one(path, stdout=stdout, remove_after=not archive)
-    stdout.write(f'Updated parts from {len(files)} model books in the {source_label}.')
+    started = time.perf_counter()
+    if workers > 1:
+        import_books(files, stdout=stdout, workers=workers, remove_after=not archive)
+    else:
+        for path in files:
+            _import_one(path, stdout=stdout, remove_after=not archive)
+    stdout.write(
+        f'Updated parts from {len(files)} model books in the {source_label} '
+        f'in {time.perf_counter() - started:.1f}s.'
+    )
     return len(files)
@@ -1,17 +1,25 @@
+from itertools import islice
+
 from parts.ingestion import storage
 from parts.ingestion.importer import import_pricing
-from parts.ingestion.pa_csv import iter_pa_rows
+from parts.ingestion.pa_csv import iter_pa_rows, iter_pa_rows_pandas
+from parts.ingestion.staged_pricing import import_pricing_staged
 
 MIN_PRICING_ROWS = 100
 
 
-def _validated_rows(path):
-    rows = list(iter_pa_rows(str(path)))
-    if len(rows) < MIN_PRICING_ROWS:
+def _validated_rows(path, parse=iter_pa_rows):
+    """Stream the rows of ``path`` once it is known to hold enough of them.
+
+    The count stops at the minimum, so the guard costs a partial read; the
+    rows themselves are streamed to the importer rather than held in memory.
+    """
+    counted = sum(1 for _ in islice(parse(str(path)), MIN_PRICING_ROWS))
+    if counted < MIN_PRICING_ROWS:
         raise ValueError(
-            f'Pricing file {path} has only {len(rows)} rows; refusing to replace live availability.'
+            f'Pricing file {path} has only {counted} rows; refusing to replace live availability.'
         )
-    return rows
+    return parse(str(path))
 
 
 def _newest_archived_price():
@@ -19,7 +27,7 @@ def _newest_archived_price():
     return max(files, key=lambda path: (path.stat().st_mtime_ns, path.name), default=None)
 
 
-def run(*, stdout, archive=False):
+def run(*, stdout, archive=False, staged=False, pandas=False):
     if archive:
         newest = _newest_archived_price()
         files = [newest] if newest else []
@@ -33,7 +41,8 @@ def run(*, stdout, archive=False):
         return 0
 
     for path in files:
-        applied = import_pricing(_validated_rows(path))
+        rows = _validated_rows(path, iter_pa_rows_pandas) if pandas else _validated_rows(path)
+        applied = import_pricing_staged(rows) if staged else import_pricing(rows)
         stdout.write(f'Imported {applied} pricing rows from {path.name}.')
         if not archive:
             path.unlink()
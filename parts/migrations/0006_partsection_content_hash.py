@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0005_remove_partsmodel_confirmed_years"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="partsection",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0006_partsection_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PartPriceStaging",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("run", models.CharField(max_length=32)),
+                ("part_number", models.CharField(max_length=60)),
+                ("description", models.CharField(blank=True, max_length=255)),
+                ("available", models.IntegerField(blank=True, null=True)),
+                ("price", models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ("base_part_number", models.CharField(blank=True, max_length=60)),
+                ("colour_suffix", models.CharField(blank=True, max_length=10)),
+                ("paint_code", models.CharField(blank=True, max_length=30)),
+                ("colour_name", models.CharField(blank=True, max_length=50)),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("run", "part_number"), name="unique_staged_part_per_run")],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 15:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0007_partpricestaging"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PartPriceChange",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("changed_at", models.DateTimeField(db_index=True)),
+                ("wholesale_price_incl_gst", models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ("available_qty", models.IntegerField(blank=True, null=True)),
+                ("previous_price", models.DecimalField(blank=True, decimal_places=2, help_text="Price before this change; null for a part's first appearance in the feed.", max_digits=10, null=True)),
+                ("previous_available", models.IntegerField(blank=True, null=True)),
+                ("part", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="price_changes", to="parts.part")),
+            ],
+            options={
+                "ordering": ["part", "changed_at"],
+            },
+        ),
+    ]
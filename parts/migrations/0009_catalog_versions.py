@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0008_partpricechange"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="partsection",
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name="partsection",
+            name="added_in_version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="partsection",
+            name="retired_in_version",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="partsmodel",
+            name="catalog_version",
+            field=models.PositiveIntegerField(default=1, help_text="The published build of this book's sections."),
+        ),
+        migrations.AddField(
+            model_name="partsmodel",
+            name="previous_catalog_version",
+            field=models.PositiveIntegerField(blank=True, help_text="The build replaced by the last import, kept so it can be rolled back to.", null=True),
+        ),
+        migrations.AlterField(
+            model_name="sectionpart",
+            name="fitment_key",
+            field=models.CharField(db_index=True, help_text="Stable model/section/callout/part identity used by carts across book re-imports. Unique within a catalogue build.", max_length=200),
+        ),
+        migrations.AlterUniqueTogether(
+            name="partsection",
+            unique_together={("parts_model", "code", "added_in_version")},
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0009_catalog_versions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncRun",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("started_at", models.DateTimeField(db_index=True)),
+                ("finished_at", models.DateTimeField()),
+                ("seconds", models.FloatField()),
+                ("pipeline", models.BooleanField(default=False)),
+                ("succeeded", models.BooleanField()),
+                ("failures", models.JSONField(blank=True, default=list, help_text="Labels of the steps that failed.")),
+                ("stages", models.JSONField(default=dict, help_text="{stage: {calls, seconds, rows, bytes}} for the run.")),
+                ("report_path", models.CharField(blank=True, max_length=500)),
+            ],
+            options={
+                "ordering": ["-started_at"],
+            },
+        ),
+    ]
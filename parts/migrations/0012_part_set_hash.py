@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0010_syncrun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="partsection",
+            name="part_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="partsection",
+            name="part_set_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 16:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0012_part_set_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ModelOverlap",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("shared_part_count", models.PositiveIntegerField()),
+                ("shared_part_percentage", models.FloatField()),
+                ("model", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="overlaps", to="parts.partsmodel")),
+                ("other_model", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="parts.partsmodel")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["model", "-shared_part_count"], name="parts_model_model_i_2ad9c5_idx")],
+                "unique_together": {("model", "other_model")},
+            },
+        ),
+    ]
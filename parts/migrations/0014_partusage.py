@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 16:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0013_modeloverlap"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PartUsage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("ref_number", models.CharField(max_length=20)),
+                ("model", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="part_usages", to="parts.partsmodel")),
+                ("part", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="usages", to="parts.part")),
+                ("section", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="parts.partsection")),
+            ],
+            options={
+                "unique_together": {("part", "model")},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0014_partusage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="partssettings",
+            name="catalogue_version",
+            field=models.CharField(blank=True, editable=False, help_text="Changes whenever the catalogue or these settings change; keys the cached catalogue payloads.", max_length=32),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 16:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0015_partssettings_catalogue_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RetiredFitment",
+            fields=[
+                ("id", models.BigIntegerField(help_text="The pruned fitment's pk.", primary_key=True, serialize=False)),
+                ("fitment_key", models.CharField(max_length=200)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RetiredSection",
+            fields=[
+                ("id", models.BigIntegerField(help_text="The pruned section's pk.", primary_key=True, serialize=False)),
+                ("code", models.CharField(max_length=10)),
+                ("parts_model", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="parts.partsmodel")),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+from parts.keys import part_set_hash
+
+
+def backfill_part_set_hashes(apps, schema_editor):
+    """Hash every section stored before 0012 added the field.
+
+    Imports only hash the sections they rebuild, and unchanged sections are
+    carried over as they are, so without this they would never match a twin.
+    """
+    PartSection = apps.get_model('parts', 'PartSection')
+    SectionPart = apps.get_model('parts', 'SectionPart')
+
+    numbers = defaultdict(list)
+    for section_id, part_number in SectionPart.objects.values_list('section_id', 'part__part_number').iterator():
+        numbers[section_id].append(part_number)
+
+    stale = []
+    for section in PartSection.objects.filter(part_set_hash='').only('id').iterator():
+        if section.id not in numbers:
+            continue
+        section.part_set_hash, section.part_count = part_set_hash(numbers[section.id])
+        stale.append(section)
+    PartSection.objects.bulk_update(stale, ['part_set_hash', 'part_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0016_retired_rows'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_part_set_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+from collections import Counter, defaultdict
+
+from django.db import migrations
+from django.db.models import F, Q
+
+
+def backfill_model_overlaps(apps, schema_editor):
+    """Fill the "books sharing parts" ranking for books imported before 0013.
+
+    The model page reads only ``ModelOverlap``, which imports otherwise fill
+    in book by book. Counts distinct part numbers in each book's live build,
+    as ``parts.overlap.rebuild_model_overlaps`` does.
+    """
+    SectionPart = apps.get_model('parts', 'SectionPart')
+    ModelOverlap = apps.get_model('parts', 'ModelOverlap')
+
+    published = F('section__parts_model__catalog_version')
+    live = SectionPart.objects.filter(
+        Q(section__added_in_version__lte=published)
+        & (Q(section__retired_in_version__isnull=True) | Q(section__retired_in_version__gt=published))
+    )
+    parts = defaultdict(set)
+    for model_id, part_id in live.values_list('section__parts_model_id', 'part_id').order_by().distinct():
+        parts[model_id].add(part_id)
+
+    models_by_part = defaultdict(list)
+    for model_id, part_ids in parts.items():
+        for part_id in part_ids:
+            models_by_part[part_id].append(model_id)
+    shared = Counter()
+    for model_ids in models_by_part.values():
+        for model_id in model_ids:
+            for other_id in model_ids:
+                if other_id != model_id:
+                    shared[model_id, other_id] += 1
+
+    ModelOverlap.objects.bulk_create(
+        [
+            ModelOverlap(
+                model_id=model_id,
+                other_model_id=other_id,
+                shared_part_count=count,
+                shared_part_percentage=round(100 * count / len(parts[model_id]), 1),
+            )
+            for (model_id, other_id), count in shared.items()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0017_backfill_part_set_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_model_overlaps, migrations.RunPython.noop),
+    ]
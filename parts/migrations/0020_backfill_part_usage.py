@@ -0,0 +1,40 @@
+from django.db import migrations
+from django.db.models import F, Q
+
+
+def backfill_part_usage(apps, schema_editor):
+    """Record the books printing each part for books imported before 0014.
+
+    The section page's "also in" lists and the search results read only
+    ``PartUsage``. One row per (part, book) at the book's first live listing
+    of the part, as ``parts.overlap.rebuild_part_usage`` does.
+    """
+    SectionPart = apps.get_model('parts', 'SectionPart')
+    PartUsage = apps.get_model('parts', 'PartUsage')
+
+    published = F('section__parts_model__catalog_version')
+    live = SectionPart.objects.filter(
+        Q(section__added_in_version__lte=published)
+        & (Q(section__retired_in_version__isnull=True) | Q(section__retired_in_version__gt=published))
+    )
+    rows = {}
+    for model_id, part_id, section_id, ref_number in (
+        live.order_by('section__parts_model_id', 'section__sort_order', 'section__code', 'sort_order')
+        .values_list('section__parts_model_id', 'part_id', 'section_id', 'ref_number')
+        .iterator()
+    ):
+        rows.setdefault((part_id, model_id), PartUsage(
+            part_id=part_id, model_id=model_id, section_id=section_id, ref_number=ref_number,
+        ))
+    PartUsage.objects.bulk_create(list(rows.values()), batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0019_backfill_model_overlaps'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_part_usage, migrations.RunPython.noop),
+    ]
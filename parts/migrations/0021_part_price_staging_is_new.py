@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0020_backfill_part_usage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="partpricestaging",
+            name="is_new",
+            field=models.BooleanField(default=False, help_text="Set before the insert when no Part has this number, so its first ledger row can follow."),
+        ),
+    ]
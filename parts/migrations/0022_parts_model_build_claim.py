@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parts", "0021_part_price_staging_is_new"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="partsmodel",
+            name="build_started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="partsmodel",
+            name="build_token",
+            field=models.CharField(blank=True, help_text="Set while an import builds the next version.", max_length=32),
+        ),
+    ]
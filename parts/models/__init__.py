@@ -1,7 +1,13 @@
 from .parts_model import PartsModel
 from .part_section import PartSection
 from .part import Part
+from .part_price_change import PartPriceChange
+from .part_price_staging import PartPriceStaging
 from .section_part import SectionPart
+from .model_overlap import ModelOverlap
+from .part_usage import PartUsage
+from .retired_rows import RetiredFitment, RetiredSection
 from .parts_settings import PartsSettings
 from .parts_order import PartsOrder
 from .parts_order_item import PartsOrderItem
+from .sync_run import SyncRun
@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class ModelOverlap(models.Model):
+    """How many distinct part numbers two books' live builds share.
+
+    One row per ordered pair, so ``shared_part_percentage`` can be relative to
+    ``model``: the portion of its parts that also appear in ``other_model``.
+    The importer recomputes a book's rows, in both directions, when its live
+    build changes (see :func:`parts.overlap.index_model_overlaps`);
+    ``rebuild_overlap_index`` recomputes the whole catalogue. Readers filter
+    out inactive books.
+    """
+
+    model = models.ForeignKey('parts.PartsModel', on_delete=models.CASCADE, related_name='overlaps')
+    other_model = models.ForeignKey('parts.PartsModel', on_delete=models.CASCADE, related_name='+')
+    shared_part_count = models.PositiveIntegerField()
+    shared_part_percentage = models.FloatField()
+
+    class Meta:
+        unique_together = [('model', 'other_model')]
+        indexes = [models.Index(fields=['model', '-shared_part_count'])]
+
+    def __str__(self):
+        return f"{self.model_id} ~ {self.other_model_id}: {self.shared_part_count}"
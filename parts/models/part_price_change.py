@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class PartPriceChange(models.Model):
+    """One change to a part's PA price or availability, appended by each import.
+
+    Only rows whose price or stock actually moved are written, so this stays
+    small while giving the price and stock history of every part without
+    keeping every raw CSV.
+    """
+
+    part = models.ForeignKey('parts.Part', on_delete=models.CASCADE, related_name='price_changes')
+    changed_at = models.DateTimeField(db_index=True)
+    wholesale_price_incl_gst = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    available_qty = models.IntegerField(null=True, blank=True)
+    previous_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True,
+        help_text="Price before this change; null for a part's first appearance in the feed.",
+    )
+    previous_available = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['part', 'changed_at']
+
+    def __str__(self):
+        return f"{self.part_id} @ {self.changed_at:%Y-%m-%d}"
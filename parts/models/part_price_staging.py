@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class PartPriceStaging(models.Model):
+    """One PA feed row, staged for the set-based pricing import.
+
+    Rows live only for the duration of one import (tagged by ``run``) and carry
+    the colour fields already derived, so the import can insert and update
+    ``Part`` rows with a few statements joined on ``part_number``.
+    """
+
+    run = models.CharField(max_length=32)
+    part_number = models.CharField(max_length=60)
+    description = models.CharField(max_length=255, blank=True)
+    available = models.IntegerField(null=True, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    base_part_number = models.CharField(max_length=60, blank=True)
+    colour_suffix = models.CharField(max_length=10, blank=True)
+    paint_code = models.CharField(max_length=30, blank=True)
+    colour_name = models.CharField(max_length=50, blank=True)
+    is_new = models.BooleanField(
+        default=False,
+        help_text="Set before the insert when no Part has this number, so its first ledger row can follow.",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'part_number'], name='unique_staged_part_per_run'),
+        ]
+
+    def __str__(self):
+        return f"{self.run}: {self.part_number}"
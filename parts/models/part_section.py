@@ -1,4 +1,67 @@
 from django.db import models
+from django.db.models import F, Q
+
+from parts.models.retired_rows import RetiredSection
+
+
+def in_catalog_version(version, prefix=""):
+    """Q for sections that belong to catalogue build ``version``.
+
+    ``prefix`` reaches the section through a relation, e.g. ``"section__"``.
+    """
+    return Q(**{f"{prefix}added_in_version__lte": version}) & (
+        Q(**{f"{prefix}retired_in_version__isnull": True})
+        | Q(**{f"{prefix}retired_in_version__gt": version})
+    )
+
+
+class PartSectionQuerySet(models.QuerySet):
+    def in_version(self, version):
+        return self.filter(in_catalog_version(version))
+
+    def live(self):
+        """Sections of each book's published build."""
+        return self.filter(in_catalog_version(F("parts_model__catalog_version")))
+
+    def live_successor(self, pk):
+        """The live section ``pk``, else the live sheet that replaced it, else None.
+
+        A changed sheet gets a new row (and pk) in every build, so an old pk
+        is resolved through its book and section code, which are stable. A
+        build that is not published yet has no links to follow.
+        """
+        section = self.live().filter(pk=pk).first()
+        if section is not None:
+            return section
+        old = (
+            PartSection.objects.filter(pk=pk, added_in_version__lte=F("parts_model__catalog_version"))
+            .values("parts_model_id", "code").first()
+            or RetiredSection.objects.filter(pk=pk).values("parts_model_id", "code").first()
+        )
+        if old is None:
+            return None
+        return self.live().filter(parts_model_id=old["parts_model_id"], code=old["code"]).first()
+
+    def image_names_in_use(self, names):
+        """The names in ``names`` that any section's diagram or curated diagram uses.
+
+        Builds share unchanged diagram files, so a file is only safe to delete
+        once no row of any build, the rollback build included, names it.
+        """
+        names = set(names)
+        sections = PartSection.objects.all()
+        return set(
+            sections.filter(diagram_image__in=names).values_list("diagram_image", flat=True)
+        ) | set(
+            sections.filter(curated_diagram_image__in=names).values_list("curated_diagram_image", flat=True)
+        )
+
+    def delete_unused_images(self, names):
+        """Delete the files in ``names`` that no section uses any more."""
+        names = {name for name in names if name}
+        storage = PartSection._meta.get_field("diagram_image").storage
+        for name in sorted(names - self.image_names_in_use(names)):
+            storage.delete(name)
 
 
 class PartSection(models.Model):
@@ -23,11 +86,25 @@ class PartSection(models.Model):
     diagram_source_hash = models.CharField(max_length=64, blank=True)
     curated_diagram_image = models.ImageField(upload_to='parts/curated-diagrams/', null=True, blank=True)
     curated_source_hash = models.CharField(max_length=64, blank=True)
+    # Fingerprint of the parsed rows and metadata. An unchanged fingerprint lets
+    # a re-import skip every part and fitment write for this section.
+    content_hash = models.CharField(max_length=64, blank=True)
+    # The distinct part numbers listed (see parts.keys.part_set_hash). Sections
+    # in other books with the same hash list exactly the same parts.
+    part_set_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    part_count = models.PositiveIntegerField(default=0)
     sort_order = models.PositiveIntegerField(default=0)
+    # A section row is never rewritten by an import. A changed sheet gets a new
+    # row in the next build and this one is retired from it, so the row stays
+    # readable by the live build until the pointer on PartsModel moves.
+    added_in_version = models.PositiveIntegerField(default=1)
+    retired_in_version = models.PositiveIntegerField(null=True, blank=True)
+
+    objects = PartSectionQuerySet.as_manager()
 
     class Meta:
         ordering = ['parts_model', 'sort_order', 'code']
-        unique_together = [('parts_model', 'code')]
+        unique_together = [('parts_model', 'code', 'added_in_version')]
 
     @property
     def display_diagram_image(self):
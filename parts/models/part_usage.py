@@ -0,0 +1,23 @@
+from django.db import models
+
+
+class PartUsage(models.Model):
+    """A book whose live build prints a part: one row per (part, book).
+
+    ``section`` and ``ref_number`` are where the book first lists it, in book
+    order, for search results to link to. The importer rewrites a book's rows
+    when its live build changes (see :func:`parts.overlap.index_part_usage`);
+    ``rebuild_overlap_index`` recomputes them all. Readers filter out
+    inactive books.
+    """
+
+    part = models.ForeignKey('parts.Part', on_delete=models.CASCADE, related_name='usages')
+    model = models.ForeignKey('parts.PartsModel', on_delete=models.CASCADE, related_name='part_usages')
+    section = models.ForeignKey('parts.PartSection', on_delete=models.CASCADE, related_name='+')
+    ref_number = models.CharField(max_length=20)
+
+    class Meta:
+        unique_together = [('part', 'model')]
+
+    def __str__(self):
+        return f"{self.part_id} in {self.model_id}"
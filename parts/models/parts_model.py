@@ -21,6 +21,16 @@ class PartsModel(models.Model):
     book_hash = models.CharField(max_length=64, blank=True, help_text="sha256 of the last-imported .xls, for change detection.")
     last_ingested_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True, help_text="False if the book disappears from the source page.")
+    # Imports build the next version beside the live one and publish it by
+    # moving this pointer; see parts.ingestion.importer.import_book.
+    catalog_version = models.PositiveIntegerField(default=1, help_text="The published build of this book's sections.")
+    previous_catalog_version = models.PositiveIntegerField(
+        null=True, blank=True, help_text="The build replaced by the last import, kept so it can be rolled back to.",
+    )
+    # Claimed by an import for the whole of its build, so a second import of
+    # the same book cannot discard the rows of one still being written.
+    build_token = models.CharField(max_length=32, blank=True, help_text="Set while an import builds the next version.")
+    build_started_at = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1,3 +1,4 @@
+import uuid
 from decimal import Decimal
 
 from django.db import models
@@ -24,6 +25,10 @@ class PartsSettings(models.Model):
         default=7,
         help_text="Days an order can wait for a backordered part before the operator refunds it.",
     )
+    catalogue_version = models.CharField(
+        max_length=32, blank=True, editable=False,
+        help_text="Changes whenever the catalogue or these settings change; keys the cached catalogue payloads.",
+    )
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -35,6 +40,10 @@ class PartsSettings(models.Model):
 
     def save(self, *args, **kwargs):
         self.pk = 1
+        self.catalogue_version = uuid.uuid4().hex
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "catalogue_version"}
         super().save(*args, **kwargs)
 
     @classmethod
@@ -42,6 +51,17 @@ class PartsSettings(models.Model):
         obj, _ = cls.objects.get_or_create(pk=1)
         return obj
 
+    @classmethod
+    def bump_catalogue_version(cls):
+        """Retire every cached catalogue payload by moving to a fresh version.
+
+        A random token rather than a counter, so a save from an instance
+        loaded before the bump can never bring an old version back. Without
+        a settings row there is nothing to retire: :meth:`get` creates one
+        with a version of its own.
+        """
+        cls.objects.filter(pk=1).update(catalogue_version=uuid.uuid4().hex)
+
     def apply_markup(self, wholesale_price):
         """Wholesale price with markup applied, rounded to 2dp. None if price is None."""
         if wholesale_price is None:
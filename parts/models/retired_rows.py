@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class RetiredSection(models.Model):
+    """What a pruned ``PartSection`` was, so links to its pk still resolve.
+
+    A changed sheet gets a new row in each build, and old builds are pruned
+    (see :mod:`parts.ingestion.importer`). Public section URLs carry the pk;
+    this keeps enough of the deleted row to find the book's live sheet with
+    the same code.
+    """
+
+    id = models.BigIntegerField(primary_key=True, help_text="The pruned section's pk.")
+    parts_model = models.ForeignKey('parts.PartsModel', on_delete=models.CASCADE, related_name='+')
+    code = models.CharField(max_length=10)
+
+    def __str__(self):
+        return f"{self.id} -> {self.parts_model_id} {self.code}"
+
+
+class RetiredFitment(models.Model):
+    """The fitment key of a pruned ``SectionPart``, for carts that saved only its pk."""
+
+    id = models.BigIntegerField(primary_key=True, help_text="The pruned fitment's pk.")
+    fitment_key = models.CharField(max_length=200)
+
+    def __str__(self):
+        return f"{self.id} -> {self.fitment_key}"
@@ -1,6 +1,26 @@
 from django.db import models
+from django.db.models import F
 
 from parts.keys import build_fitment_key
+from parts.models.part_section import in_catalog_version
+from parts.models.retired_rows import RetiredFitment
+
+
+class SectionPartQuerySet(models.QuerySet):
+    def live(self):
+        """Fitments in sections of each book's published build."""
+        return self.filter(in_catalog_version(F("section__parts_model__catalog_version"), prefix="section__"))
+
+    def fitment_key_for(self, pk):
+        """The fitment key of fitment ``pk`` in any build, pruned or not; None if unknown.
+
+        Old carts saved only the pk, which changes whenever the fitment's
+        section is rebuilt; the key does not.
+        """
+        return (
+            SectionPart.objects.filter(pk=pk).values_list("fitment_key", flat=True).first()
+            or RetiredFitment.objects.filter(pk=pk).values_list("fitment_key", flat=True).first()
+        )
 
 
 class SectionPart(models.Model):
@@ -18,8 +38,11 @@ class SectionPart(models.Model):
     )
     fitment_key = models.CharField(
         max_length=200,
-        unique=True,
-        help_text="Stable model/section/callout/part identity used by carts across book re-imports.",
+        db_index=True,
+        help_text=(
+            "Stable model/section/callout/part identity used by carts across book re-imports. "
+            "Unique within a catalogue build."
+        ),
     )
     part = models.ForeignKey(
         'parts.Part',
@@ -33,6 +56,8 @@ class SectionPart(models.Model):
     superseded_flag = models.CharField(max_length=50, blank=True, help_text="The book's supersession flag/note (usually Y/N).")
     sort_order = models.PositiveIntegerField(default=0)
 
+    objects = SectionPartQuerySet.as_manager()
+
     class Meta:
         ordering = ['section', 'sort_order']
 
@@ -47,7 +72,7 @@ class SectionPart(models.Model):
             )
             occurrence = 1
             key = base
-            while type(self).objects.filter(fitment_key=key).exclude(pk=self.pk).exists():
+            while type(self).objects.live().filter(fitment_key=key).exclude(pk=self.pk).exists():
                 occurrence += 1
                 key = f"{base}:{occurrence}"
             self.fitment_key = key
@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class SyncRun(models.Model):
+    """One run of ``manage.py sync`` with the time each ingestion stage took.
+
+    ``stages`` holds the run totals from :mod:`parts.ingestion.metrics`, keyed
+    by stage name; the per-book breakdown lives in the JSON report at
+    ``report_path``.
+    """
+
+    started_at = models.DateTimeField(db_index=True)
+    finished_at = models.DateTimeField()
+    seconds = models.FloatField()
+    pipeline = models.BooleanField(default=False)
+    succeeded = models.BooleanField()
+    failures = models.JSONField(default=list, blank=True, help_text="Labels of the steps that failed.")
+    stages = models.JSONField(default=dict, help_text="{stage: {calls, seconds, rows, bytes}} for the run.")
+    report_path = models.CharField(max_length=500, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        outcome = "ok" if self.succeeded else "failed"
+        return f"sync {self.started_at:%Y-%m-%d %H:%M} ({outcome}, {self.seconds:.0f}s)"
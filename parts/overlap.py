@@ -17,104 +17,106 @@ interchangeable, and saying so invites a customer to order from the wrong
 book.
 
 This is a statement about part numbers printed in books, not about fitment.
+
+Each section stores a hash of the distinct part numbers it lists, so exact
+twins are sections with the same hash, found by one indexed lookup in
+:func:`equivalent_sections_for`. The "books sharing parts" ranking is kept in
+``ModelOverlap``, and the books printing each part in ``PartUsage``; the pages
+read those tables, and ``rebuild_overlap_index --check`` compares them with
+the computations here.
 """
 
 from __future__ import annotations
 
-from collections import defaultdict
+from collections import Counter, defaultdict
 
-from django.db.models import Count
+from django.db import transaction
+from django.db.models import Count, Q
 
-from parts.models import SectionPart
+from parts.keys import part_set_hash
+from parts.models import ModelOverlap, PartSection, PartUsage, SectionPart
 
 # Below this a match is coincidence rather than a shared assembly - a
 # two-bolt section matches half the catalogue and tells a customer nothing.
 MINIMUM_PARTS = 3
 
 
-def _part_numbers_by_section(section_ids):
-    parts = defaultdict(set)
-    rows = SectionPart.objects.filter(section_id__in=section_ids).values_list(
+def section_part_sets(sections):
+    """``{section_id: (part_set_hash, part_count)}`` read from the fitments of ``sections``."""
+    numbers = defaultdict(list)
+    for section_id, part_number in SectionPart.objects.filter(section__in=sections).values_list(
         "section_id", "part__part_number"
-    )
-    for section_id, part_number in rows:
-        parts[section_id].add(part_number)
-    return parts
+    ):
+        numbers[section_id].append(part_number)
+    return {section_id: part_set_hash(part_numbers) for section_id, part_numbers in numbers.items()}
+
+
+def refresh_part_sets(sections):
+    """Recompute the stored part-set hash of ``sections`` from their fitments.
+
+    The importer sets it as it builds a section; this repairs rows written by
+    anything else. Returns the number of sections that changed.
+    """
+    computed = section_part_sets(sections)
+    stale = []
+    for section in sections.only("id", "part_set_hash", "part_count"):
+        values = computed.get(section.id, ("", 0))
+        if (section.part_set_hash, section.part_count) != values:
+            section.part_set_hash, section.part_count = values
+            stale.append(section)
+    PartSection.objects.bulk_update(stale, ["part_set_hash", "part_count"], batch_size=1000)
+    return len(stale)
+
+
+def _hashes(sections):
+    return {
+        section.id: section.part_set_hash
+        for section in sections
+        if section.part_set_hash and section.part_count >= MINIMUM_PARTS
+    }
 
 
 def equivalent_sections_for(sections):
     """Map each given section id to the identical sections in other books.
 
     ``sections`` is an iterable of ``PartSection`` belonging to one model.
-    Runs in a fixed number of queries regardless of how many sections are
-    passed, so a whole model costs the same as a single diagram.
+    Identical means the same part-set hash, so a whole model costs one
+    indexed query, the same as a single diagram.
     """
     sections = list(sections)
-    if not sections:
-        return {}
-    model_id = sections[0].parts_model_id
-    own = _part_numbers_by_section([s.id for s in sections])
-    wanted = {s.id: own.get(s.id, set()) for s in sections if len(own.get(s.id, set())) >= MINIMUM_PARTS}
+    wanted = _hashes(sections)
     if not wanted:
         return {}
-
-    universe = set().union(*wanted.values())
-    # Every section in another book that shares at least one of these parts.
-    candidate_rows = (
-        SectionPart.objects.filter(part__part_number__in=universe)
-        .exclude(section__parts_model_id=model_id)
-        .filter(section__parts_model__is_active=True)
-        .values_list(
-            "section_id",
-            "part__part_number",
-            "section__code",
-            "section__name",
-            "section__parts_model__name",
-            "section__parts_model__model_code",
-            "section__parts_model__slug",
+    rows = (
+        PartSection.objects.live()
+        .filter(part_set_hash__in=set(wanted.values()), parts_model__is_active=True)
+        .exclude(parts_model_id=sections[0].parts_model_id)
+        .values(
+            "part_set_hash",
+            "code",
+            "name",
+            "parts_model__name",
+            "parts_model__model_code",
+            "parts_model__slug",
         )
     )
-    overlap = defaultdict(set)
-    candidate_meta = {}
-    for section_id, part_number, code, name, model_name, model_code, slug in candidate_rows:
-        overlap[section_id].add(part_number)
-        candidate_meta[section_id] = (code, name, model_name, model_code, slug)
-    if not overlap:
-        return {}
-
-    # A candidate's own size is what separates an exact twin from a larger
-    # section that merely happens to contain these parts.
-    sizes = {
-        section_id: len(numbers)
-        for section_id, numbers in _part_numbers_by_section(list(overlap)).items()
+    by_hash = defaultdict(list)
+    for row in rows:
+        by_hash[row["part_set_hash"]].append(
+            {
+                "section_code": row["code"],
+                "section_name": row["name"],
+                "model_name": row["parts_model__name"],
+                "model_code": row["parts_model__model_code"],
+                "model_slug": row["parts_model__slug"],
+            }
+        )
+    return {
+        section_id: sorted(by_hash[digest], key=lambda m: (m["model_name"], m["section_code"]))
+        for section_id, digest in wanted.items()
+        if by_hash.get(digest)
     }
 
-    results = {}
-    for section_id, numbers in wanted.items():
-        matches = []
-        for candidate_id, shared in overlap.items():
-            # Only parts from *this* section were fetched, so a full overlap
-            # plus an equal size means the two sections list the same parts.
-            if len(shared & numbers) != len(numbers):
-                continue
-            if sizes.get(candidate_id, 0) != len(numbers):
-                continue
-            code, name, model_name, model_code, slug = candidate_meta[candidate_id]
-            matches.append(
-                {
-                    "section_code": code,
-                    "section_name": name,
-                    "model_name": model_name,
-                    "model_code": model_code,
-                    "model_slug": slug,
-                }
-            )
-        if matches:
-            results[section_id] = sorted(
-                matches, key=lambda m: (m["model_name"], m["section_code"])
-            )
-    return results
-
 
 def models_sharing_parts_with(model):
     """Return the five active books sharing the most distinct part numbers.
@@ -124,13 +126,13 @@ def models_sharing_parts_with(model):
     other book?" A shared part number is useful discovery information, not
     a guarantee that every part in either book fits the other vehicle.
     """
-    source_part_ids = SectionPart.objects.filter(section__parts_model=model).values("part_id")
+    source_part_ids = SectionPart.objects.live().filter(section__parts_model=model).values("part_id")
     source_part_count = source_part_ids.distinct().count()
     if source_part_count == 0:
         return []
 
     overlaps = (
-        SectionPart.objects.filter(
+        SectionPart.objects.live().filter(
             part_id__in=source_part_ids,
             section__parts_model__is_active=True,
         )
@@ -159,6 +161,116 @@ def models_sharing_parts_with(model):
     ]
 
 
+def _percentage(shared, total):
+    return round(100 * shared / total, 1)
+
+
+def _live_parts_by_model(section_parts):
+    """``{model_id: {part_id, ...}}`` for the live fitments in ``section_parts``."""
+    parts = defaultdict(set)
+    for model_id, part_id in (
+        section_parts.live().values_list("section__parts_model_id", "part_id").order_by().distinct()
+    ):
+        parts[model_id].add(part_id)
+    return parts
+
+
+def indexed_models_sharing_parts_with(model):
+    """:func:`models_sharing_parts_with`, read from the ``ModelOverlap`` table."""
+    overlaps = (
+        ModelOverlap.objects.filter(model=model, other_model__is_active=True)
+        .order_by("-shared_part_count", "other_model__name", "other_model__model_code")
+        .values(
+            "other_model__name",
+            "other_model__model_code",
+            "other_model__slug",
+            "shared_part_count",
+            "shared_part_percentage",
+        )[:5]
+    )
+    return [
+        {
+            "name": overlap["other_model__name"],
+            "model_code": overlap["other_model__model_code"],
+            "slug": overlap["other_model__slug"],
+            "shared_part_count": overlap["shared_part_count"],
+            "shared_part_percentage": overlap["shared_part_percentage"],
+        }
+        for overlap in overlaps
+    ]
+
+
+@transaction.atomic
+def index_model_overlaps(model):
+    """Recompute ``model``'s ``ModelOverlap`` rows, both ways, from its live build.
+
+    Called whenever the book's live build changes. Every other book's part
+    count comes from one aggregate, so this costs the same few queries however
+    many books share parts with this one.
+    """
+    live = SectionPart.objects.live()
+    parts = _live_parts_by_model(
+        SectionPart.objects.filter(part_id__in=live.filter(section__parts_model_id=model.id).values("part_id"))
+    )
+    own = parts.pop(model.id, set())
+    totals = {}
+    if parts:
+        totals = dict(
+            live.filter(section__parts_model_id__in=list(parts))
+            .order_by()
+            .values_list("section__parts_model_id")
+            .annotate(total=Count("part_id", distinct=True))
+        )
+    rows = []
+    for other_id, shared in parts.items():
+        rows.append(ModelOverlap(
+            model_id=model.id,
+            other_model_id=other_id,
+            shared_part_count=len(shared),
+            shared_part_percentage=_percentage(len(shared), len(own)),
+        ))
+        rows.append(ModelOverlap(
+            model_id=other_id,
+            other_model_id=model.id,
+            shared_part_count=len(shared),
+            shared_part_percentage=_percentage(len(shared), totals[other_id]),
+        ))
+    ModelOverlap.objects.filter(Q(model_id=model.id) | Q(other_model_id=model.id)).delete()
+    ModelOverlap.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+@transaction.atomic
+def rebuild_model_overlaps():
+    """Recompute every ``ModelOverlap`` row from one read of the live fitments.
+
+    Returns the number of rows.
+    """
+    parts = _live_parts_by_model(SectionPart.objects.all())
+    models_by_part = defaultdict(list)
+    for model_id, part_ids in parts.items():
+        for part_id in part_ids:
+            models_by_part[part_id].append(model_id)
+    shared = Counter()
+    for model_ids in models_by_part.values():
+        for model_id in model_ids:
+            for other_id in model_ids:
+                if other_id != model_id:
+                    shared[model_id, other_id] += 1
+    rows = [
+        ModelOverlap(
+            model_id=model_id,
+            other_model_id=other_id,
+            shared_part_count=count,
+            shared_part_percentage=_percentage(count, len(parts[model_id])),
+        )
+        for (model_id, other_id), count in shared.items()
+    ]
+    ModelOverlap.objects.all().delete()
+    ModelOverlap.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
 def models_using_each_part_in(section):
     """Map each part number in this section to the other books that use it.
 
@@ -171,7 +283,7 @@ def models_using_each_part_in(section):
     if not numbers:
         return {}
     rows = (
-        SectionPart.objects.filter(
+        SectionPart.objects.live().filter(
             part__part_number__in=numbers,
             section__parts_model__is_active=True,
         )
@@ -195,3 +307,51 @@ def models_using_each_part_in(section):
         number: sorted(models.values(), key=lambda m: (m["name"], m["model_code"]))
         for number, models in shared.items()
     }
+
+
+def indexed_models_using_each_part_in(section):
+    """:func:`models_using_each_part_in`, read from the ``PartUsage`` index."""
+    rows = (
+        PartUsage.objects.filter(part_id__in=section.parts.values("part_id"), model__is_active=True)
+        .exclude(model_id=section.parts_model_id)
+        .values_list("part__part_number", "model__name", "model__model_code", "model__slug")
+    )
+    shared = defaultdict(list)
+    for part_number, name, model_code, slug in rows:
+        shared[part_number].append({"name": name, "model_code": model_code, "slug": slug})
+    return {
+        number: sorted(models, key=lambda m: (m["name"], m["model_code"]))
+        for number, models in shared.items()
+    }
+
+
+def _usage_rows(section_parts):
+    """One ``PartUsage`` per (part, book): the first live listing in book order."""
+    rows = {}
+    for model_id, part_id, section_id, ref_number in (
+        section_parts.live()
+        .order_by("section__parts_model_id", "section__sort_order", "section__code", "sort_order")
+        .values_list("section__parts_model_id", "part_id", "section_id", "ref_number")
+    ):
+        rows.setdefault((part_id, model_id), PartUsage(
+            part_id=part_id, model_id=model_id, section_id=section_id, ref_number=ref_number,
+        ))
+    return list(rows.values())
+
+
+@transaction.atomic
+def index_part_usage(model):
+    """Rewrite ``model``'s ``PartUsage`` rows from its live build. Returns their number."""
+    rows = _usage_rows(SectionPart.objects.filter(section__parts_model_id=model.id))
+    PartUsage.objects.filter(model_id=model.id).delete()
+    PartUsage.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+@transaction.atomic
+def rebuild_part_usage():
+    """Recompute every ``PartUsage`` row from one read of the live fitments."""
+    rows = _usage_rows(SectionPart.objects.all())
+    PartUsage.objects.all().delete()
+    PartUsage.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
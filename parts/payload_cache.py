@@ -0,0 +1,64 @@
+"""Cache of the public catalogue payloads.
+
+Section pages are read far more often than the catalogue changes, and each
+one groups callouts, prices variants, reads the overlap indexes and stats the
+diagram files. Payloads are cached under the ``PartsSettings`` catalogue
+version, which imports, pricing, curated diagrams, rollbacks and settings
+changes replace (:meth:`~parts.models.PartsSettings.bump_catalogue_version`).
+Old entries are never deleted; nothing asks for their version again and the
+cache expires them.
+
+The version lives in the database rather than the cache so that a bump made
+by a cron command reaches every web process. Image URLs are absolute, so the
+requesting origin is part of the key too.
+
+Payloads live in their own ``parts_payloads`` cache, sized for the whole
+catalogue, so they neither cull nor are culled by the default cache's
+throttling and stock-alert entries.
+
+Hits and misses are counted per process; see :func:`counts`.
+"""
+import threading
+from collections import Counter
+
+from django.core.cache import caches
+
+CACHE_ALIAS = "parts_payloads"
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+
+
+def _key(kind, identity, version, request):
+    origin = request.build_absolute_uri("/") if request else ""
+    return f"parts:{kind}:{identity}:{version}:{origin}"
+
+
+def _count(outcome):
+    with _counts_lock:
+        _counts[outcome] += 1
+
+
+def cached_payload(kind, identity, settings, request, build):
+    """Return the cached ``kind`` payload for ``identity``, calling ``build`` on a miss."""
+    cache = caches[CACHE_ALIAS]
+    key = _key(kind, identity, settings.catalogue_version, request)
+    payload = cache.get(key)
+    if payload is not None:
+        _count("hits")
+        return payload
+    _count("misses")
+    payload = build()
+    cache.set(key, payload)
+    return payload
+
+
+def counts():
+    """Hits and misses in this process since it started or :func:`reset_counts`."""
+    with _counts_lock:
+        return {"hits": _counts["hits"], "misses": _counts["misses"]}
+
+
+def reset_counts():
+    with _counts_lock:
+        _counts.clear()
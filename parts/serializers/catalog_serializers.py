@@ -12,8 +12,8 @@ from rest_framework import serializers
 from parts.models import PartsModel, PartSection
 from parts.overlap import (
     equivalent_sections_for,
-    models_sharing_parts_with,
-    models_using_each_part_in,
+    indexed_models_sharing_parts_with,
+    indexed_models_using_each_part_in,
 )
 
 
@@ -72,12 +72,12 @@ class PartsModelDetailSerializer(serializers.ModelSerializer):
         fields = ["name", "model_code", "cc_class", "slug", "last_ingested_at", "sections", "shared_models"]
 
     def get_sections(self, obj):
-        sections = list(obj.sections.all())
+        sections = list(obj.sections.live())
         context = {**self.context, "equivalent_sections": equivalent_sections_for(sections)}
         return PartSectionSummarySerializer(sections, many=True, context=context).data
 
     def get_shared_models(self, obj):
-        return models_sharing_parts_with(obj)
+        return indexed_models_sharing_parts_with(obj)
 
 
 def _variant_label(section_part, axis):
@@ -128,7 +128,7 @@ def build_section_payload(section, settings, request=None):
     groups = OrderedDict()
     for sp in section.parts.select_related("part").all():
         groups.setdefault(sp.ref_number, []).append(sp)
-    shared_models = models_using_each_part_in(section)
+    shared_models = indexed_models_using_each_part_in(section)
     equivalent = equivalent_sections_for([section]).get(section.id, [])
 
     callouts = []
@@ -0,0 +1,11 @@
+import pytest
+
+from parts.ingestion import storage
+
+
+@pytest.fixture(autouse=True)
+def isolated_sym_parts_files(tmp_path, monkeypatch):
+    """Keep the diagram cache and other pipeline state out of the real data directory."""
+    base_dir = tmp_path / "sym_parts_files"
+    monkeypatch.setattr(storage, "BASE_DIR", base_dir)
+    return base_dir
@@ -0,0 +1,10 @@
+import pytest
+
+from parts.ingestion.synthetic_books import write_book
+from parts.tests.ingestion_tests.sample_files import SYNTHETIC_BOOK
+
+
+@pytest.fixture(scope="session")
+def synthetic_xls(tmp_path_factory):
+    """A synthetic parts book shaped like the sample, written once per run."""
+    return write_book(tmp_path_factory.mktemp("books") / "synthetic.xls", **SYNTHETIC_BOOK)
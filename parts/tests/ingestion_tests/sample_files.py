@@ -1,4 +1,9 @@
-"""Paths to the sample SYM source files committed under data_management/."""
+"""Paths to the sample SYM source files committed under data_management/.
+
+The sample book is not always present, so parser tests run against a
+synthetic book (see ``parts.ingestion.synthetic_books``) written with
+:data:`SYNTHETIC_BOOK`; the sample-file tests are extras on top.
+"""
 from pathlib import Path
 
 from django.conf import settings
@@ -7,3 +12,12 @@ _DATA = Path(settings.BASE_DIR) / "data_management" / "data" / "sym_parts_files"
 
 SAMPLE_XLS = _DATA / "Spare-Parts-Book-Classic-150-AX15W2-6.xls"
 SAMPLE_PA_CSV = _DATA / "PA-16-Jul-26 (1).csv"
+
+SYNTHETIC_BOOK = {
+    "model_code": "SB07W1-2",
+    "name_hint": "FIDDLE",
+    "sections": 6,
+    "parts_per_section": 30,
+    "diagram_size": (640, 480),
+    "seed": 3,
+}
@@ -0,0 +1,100 @@
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
+
+from parts.ingestion import diagram_cache
+from parts.ingestion.diagram_images import diagram_webp_bytes
+from parts.tests.factories.parts_factories import PartSectionFactory
+
+
+def _png_bytes(colour):
+    image = Image.new("RGB", (4, 4), colour)
+    output = BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_cached_webp_bytes_encodes_once_per_source_image():
+    png = _png_bytes("red")
+
+    with patch.object(diagram_cache, "diagram_webp_bytes", wraps=diagram_webp_bytes) as encode:
+        first = diagram_cache.cached_webp_bytes(png)
+        second = diagram_cache.cached_webp_bytes(png)
+
+    assert encode.call_count == 1
+    assert first == second
+    assert first[:4] == b"RIFF"
+    assert [source_hash for source_hash, _ in diagram_cache.iter_entries()] == [
+        diagram_cache.storage.sha256_bytes(png)
+    ]
+
+
+def test_cache_entries_are_keyed_by_encoder_options():
+    source_hash = "ab" * 32
+
+    lossless = diagram_cache.entry_path(source_hash, {"method": 6, "lossless": True, "quality": 100})
+    lossy = diagram_cache.entry_path(source_hash, {"method": 6, "quality": 90})
+
+    assert lossless != lossy
+    assert lossless.parent.name == "ab"
+
+
+@pytest.mark.django_db
+def test_prune_diagram_cache_removes_only_unreferenced_entries():
+    kept_png = _png_bytes("red")
+    dropped_png = _png_bytes("blue")
+    kept_hash = diagram_cache.storage.sha256_bytes(kept_png)
+    diagram_cache.cached_webp_bytes(kept_png)
+    diagram_cache.cached_webp_bytes(dropped_png)
+    PartSectionFactory(diagram_source_hash=kept_hash)
+
+    call_command("prune_diagram_cache", "--dry-run")
+    assert len(list(diagram_cache.iter_entries())) == 2
+
+    call_command("prune_diagram_cache")
+    assert [source_hash for source_hash, _ in diagram_cache.iter_entries()] == [kept_hash]
+
+
+@pytest.mark.django_db
+def test_prune_keeps_entries_for_stored_diagrams_still_to_convert(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        section = PartSectionFactory(diagram_source_hash="a" * 64)
+        section.diagram_image.save("legacy.png", ContentFile(_png_bytes("red")), save=False)
+        section.save()
+        stored_hash = diagram_cache.storage.sha256_bytes(_png_bytes("red"))
+        # What an interrupted convert_parts_diagrams_webp run leaves behind.
+        diagram_cache.cached_webp_bytes(_png_bytes("red"))
+
+        call_command("prune_diagram_cache", stdout=StringIO())
+        assert [source_hash for source_hash, _ in diagram_cache.iter_entries()] == [stored_hash]
+
+        call_command("convert_parts_diagrams_webp", stdout=StringIO())
+        call_command("prune_diagram_cache", stdout=StringIO())
+        assert list(diagram_cache.iter_entries()) == []
+
+
+@pytest.mark.django_db
+def test_prune_keeps_entries_for_curated_files_still_to_link(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        section = PartSectionFactory(
+            parts_model__model_code="AE05W6-RU", code="F06", diagram_source_hash="a" * 64,
+        )
+        section.diagram_image.save("source.webp", ContentFile(b"RIFF"), save=False)
+        section.save()
+        curated_dir = tmp_path / "parts" / "curated-diagrams"
+        curated_dir.mkdir(parents=True)
+        (curated_dir / "AE05W6-RU_F06.png").write_bytes(_png_bytes("blue"))
+        curated_hash = diagram_cache.storage.sha256_bytes(_png_bytes("blue"))
+        diagram_cache.cached_webp_bytes(_png_bytes("blue"))
+
+        call_command("prune_diagram_cache", stdout=StringIO())
+        assert [source_hash for source_hash, _ in diagram_cache.iter_entries()] == [curated_hash]
+
+        call_command("update", "--curated", stdout=StringIO(), stderr=StringIO())
+        call_command("prune_diagram_cache", stdout=StringIO())
+        assert list(diagram_cache.iter_entries()) == []
@@ -0,0 +1,170 @@
+"""Book downloads against a local HTTP stand-in for the supplier site."""
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+import pytest
+import requests
+
+from parts.ingestion import metrics, source_page, storage
+from parts.management.utils import scrape_parts
+
+
+class _SupplierHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+        try:
+            time.sleep(server.delays.get(self.path, 0.02))
+            if hits <= server.failures.get(self.path, 0):
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = server.files.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            etag = server.etags.get(self.path)
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def supplier():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SupplierHandler)
+    server.lock = threading.Lock()
+    server.active = server.peak = 0
+    server.hits, server.files, server.failures, server.delays, server.etags = {}, {}, {}, {}, {}
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_many_keeps_input_order_and_limits_each_host(supplier):
+    for index in range(6):
+        supplier.files[f"/book-{index}.xls"] = f"book {index}".encode()
+    # The first book is the slowest, so completion order differs from input order.
+    supplier.delays["/book-0.xls"] = 0.2
+    urls = [f"{supplier.url}/book-{index}.xls" for index in range(6)]
+
+    results = list(source_page.download_many(urls, timeout=5, workers=4, per_host=2))
+
+    assert [url for url, _, _, _ in results] == urls
+    assert [content for _, content, _, _ in results] == [f"book {index}".encode() for index in range(6)]
+    assert all(error is None for _, _, _, error in results)
+    assert supplier.peak == 2
+
+
+def test_download_bytes_retries_server_errors_with_backoff(supplier):
+    supplier.files["/flaky.xls"] = b"eventually"
+    supplier.failures["/flaky.xls"] = 2
+
+    assert source_page.download_bytes(f"{supplier.url}/flaky.xls", timeout=5, backoff=0) == b"eventually"
+    assert supplier.hits["/flaky.xls"] == 3
+
+
+def test_download_many_reports_failures_without_stopping(supplier, monkeypatch):
+    monkeypatch.setattr(source_page, "RETRY_BACKOFF", 0)
+    supplier.files["/good.xls"] = b"good"
+    # Retried at once: download reads RETRY_BACKOFF when it is called.
+    supplier.failures["/good.xls"] = 1
+    urls = [f"{supplier.url}/missing.xls", f"{supplier.url}/good.xls"]
+
+    (_, missing, _, error), (_, good, _, good_error) = source_page.download_many(urls, timeout=5)
+
+    assert missing is None and isinstance(error, requests.HTTPError)
+    assert good == b"good" and good_error is None
+    assert supplier.hits["/good.xls"] == 2
+
+
+def test_download_many_sizes_the_connection_pool_to_its_workers(supplier, monkeypatch):
+    monkeypatch.setattr(source_page, "_session", None)
+    monkeypatch.setattr(source_page, "_pool_size", 0)
+    supplier.files["/book.xls"] = b"workbook"
+
+    list(source_page.download_many([f"{supplier.url}/book.xls"], timeout=5, workers=8))
+    list(source_page.download_many([f"{supplier.url}/book.xls"], timeout=5, workers=2))
+
+    assert source_page.session().get_adapter(supplier.url)._pool_maxsize == 8
+
+
+def test_scrape_parts_queues_downloaded_books_in_listing_order(supplier, monkeypatch):
+    books = []
+    for name in ("Classic 150", "Jet 14", "Fiddle II"):
+        path = f"/{name.replace(' ', '-')}.xls"
+        supplier.files[path] = f"{name} workbook".encode()
+        books.append({"name": name, "cc_class": "100_165", "url": f"{supplier.url}{path}"})
+    supplier.delays["/Classic-150.xls"] = 0.2
+    monkeypatch.setattr(scrape_parts.source_page, "fetch_page", lambda url: "<html/>")
+    monkeypatch.setattr(scrape_parts.source_page, "parse_books", lambda html: books)
+    stdout = StringIO()
+
+    with metrics.recording() as recorder:
+        queued = scrape_parts.run(stdout=stdout, stderr=StringIO(), workers=3)
+
+    assert queued == 3
+    assert re.findall(r"Queued \S+ \((.+?)\)", stdout.getvalue()) == ["Classic 150", "Jet 14", "Fiddle II"]
+    inbox = sorted(path.name for path in storage.inbox_dir("books").glob("*.xls"))
+    assert len(inbox) == 3
+    # Each download is reported under the name its file is queued with.
+    books = recorder.snapshot()["books"]
+    assert sorted(books) == inbox
+    assert all(stages["download"]["calls"] == 1 for stages in books.values())
+
+
+def test_download_sends_validators_and_returns_nothing_on_not_modified(supplier):
+    supplier.files["/book.xls"] = b"workbook"
+    supplier.etags["/book.xls"] = '"v1"'
+    url = f"{supplier.url}/book.xls"
+
+    content, validators = source_page.download(url, timeout=5)
+    assert content == b"workbook" and validators == {"etag": '"v1"'}
+
+    assert source_page.download(url, timeout=5, validators=validators) == (None, validators)
+
+    supplier.etags["/book.xls"] = '"v2"'
+    assert source_page.download(url, timeout=5, validators=validators) == (b"workbook", {"etag": '"v2"'})
+
+
+def test_scrape_parts_skips_books_the_server_reports_unmodified(supplier, monkeypatch):
+    supplier.files["/Jet-14.xls"] = b"Jet 14 workbook"
+    supplier.etags["/Jet-14.xls"] = '"jet"'
+    book = {"name": "Jet 14", "cc_class": "100_165", "url": f"{supplier.url}/Jet-14.xls"}
+    monkeypatch.setattr(scrape_parts.source_page, "fetch_page", lambda url: "<html/>")
+    monkeypatch.setattr(scrape_parts.source_page, "parse_books", lambda html: [book])
+
+    assert scrape_parts.run(stdout=StringIO(), stderr=StringIO()) == 1
+    stdout = StringIO()
+    assert scrape_parts.run(stdout=stdout, stderr=StringIO()) == 0
+
+    assert "(1 not modified)" in stdout.getvalue()
+    assert storage.source_validators()[book["url"]] == {
+        "etag": '"jet"', "sha256": storage.sha256_bytes(b"Jet 14 workbook"),
+    }
+    # A server that ignores validators still ends in the hash comparison.
+    supplier.etags.clear()
+    assert scrape_parts.run(stdout=StringIO(), stderr=StringIO()) == 0
@@ -1,13 +1,15 @@
 import io
 import re
+import struct
 
 import pytest
 from PIL import Image
 
+from parts.ingestion import escher_images
 from parts.ingestion.escher_images import extract_diagrams
-from parts.tests.ingestion_tests.sample_files import SAMPLE_XLS
+from parts.tests.ingestion_tests.sample_files import SAMPLE_XLS, SYNTHETIC_BOOK
 
-pytestmark = pytest.mark.skipif(not SAMPLE_XLS.exists(), reason="sample .xls not present")
+requires_sample = pytest.mark.skipif(not SAMPLE_XLS.exists(), reason="sample .xls not present")
 
 
 @pytest.fixture(scope="module")
@@ -15,12 +17,32 @@ def diagrams():
     return extract_diagrams(str(SAMPLE_XLS))
 
 
+@pytest.fixture(params=["synthetic", pytest.param("sample", marks=requires_sample)])
+def source(request, synthetic_xls):
+    return str(SAMPLE_XLS if request.param == "sample" else synthetic_xls)
+
+
+def test_every_synthetic_section_gets_its_own_diagram_not_the_shared_logo(synthetic_xls):
+    found = extract_diagrams(str(synthetic_xls))
+
+    assert list(found) == ["E01", "E02", "E03", "F01", "F02", "F03"]
+    assert len(set(found.values())) == len(found)
+    for data in found.values():
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        assert image.size == SYNTHETIC_BOOK["diagram_size"]
+    # Every third diagram is a JPEG, as in the real books' mix.
+    assert [Image.open(io.BytesIO(data)).format for data in found.values()] == ["PNG", "PNG", "JPEG"] * 2
+
+
+@requires_sample
 def test_every_ef_section_has_a_diagram(diagrams):
     sections = [name for name in diagrams if re.match(r"^[EF]\d\d$", name)]
     # Sample book: 14 engine (E01-E14) + 23 frame (F01-F23) = 37 sections.
     assert len(sections) == 37
 
 
+@requires_sample
 def test_diagrams_are_valid_images_of_plausible_size(diagrams):
     im = Image.open(io.BytesIO(diagrams["E01"]))
     im.load()
@@ -29,8 +51,74 @@ def test_diagrams_are_valid_images_of_plausible_size(diagrams):
     assert w >= 300 and h >= 200
 
 
+@requires_sample
 def test_e01_diagram_is_the_largest_referenced_blip(diagrams):
     # E01 (Shroud Assy) should map to a substantial line-art diagram, not a
     # tiny overlaid thumbnail.
     im = Image.open(io.BytesIO(diagrams["E01"]))
     assert im.size[0] * im.size[1] > 150_000
+
+
+def test_candidates_put_the_chosen_diagram_first_then_smaller_blips(source):
+    diagrams = extract_diagrams(source)
+    candidates = escher_images.extract_diagram_candidates(source)
+    assert candidates.keys() == diagrams.keys()
+    for name, found in candidates.items():
+        assert found[0] == diagrams[name]
+        areas = [w * h for w, h in (Image.open(io.BytesIO(data)).size for data in found)]
+        assert areas == sorted(areas, reverse=True)
+
+
+def test_header_sizes_match_decoded_sizes_for_every_blip(source):
+    drawing_group, _, _ = escher_images.collect_drawings(escher_images.read_workbook_stream(source))
+    for span in filter(None, escher_images._index_blips(drawing_group)):
+        image = Image.open(io.BytesIO(drawing_group[span[0]:span[1]]))
+        assert escher_images._image_size(drawing_group, *span) == image.size
+
+
+def _encoded(fmt, size, **options):
+    output = io.BytesIO()
+    Image.new("RGB", size, "red").save(output, format=fmt, **options)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("fmt,options", [
+    ("PNG", {}),
+    ("JPEG", {}),
+    ("JPEG", {"progressive": True}),
+])
+def test_image_size_reads_only_the_header(fmt, options):
+    data = b"bse-header" + _encoded(fmt, (321, 123), **options)
+    start = 10
+
+    assert escher_images._image_size(data, start, len(data)) == (321, 123)
+    # The header alone is enough: truncating the pixel data changes nothing.
+    assert escher_images._image_size(data[:start + 700], start, start + 700) == (321, 123)
+
+
+def test_unrecognised_or_truncated_blips_have_no_size():
+    png = _encoded("PNG", (10, 10))
+
+    assert escher_images._image_size(b"not an image", 0, 12) is None
+    assert escher_images._image_size(png[:20], 0, 20) is None
+
+
+def _biff(rtype, body):
+    return struct.pack("<HH", rtype, len(body)) + body
+
+
+def test_biff_records_are_views_unless_continue_records_are_stitched():
+    stream = (
+        _biff(0x0809, b"bof")
+        + _biff(0x00EB, b"drawing-")
+        + _biff(0x003C, b"group-")
+        + _biff(0x003C, b"continued")
+        + _biff(0x000A, b"")
+    )
+
+    records = list(escher_images._iter_biff_records(stream))
+
+    assert [rtype for rtype, _ in records] == [0x0809, 0x00EB, 0x000A]
+    assert isinstance(records[0][1], memoryview)
+    assert bytes(records[0][1]) == b"bof"
+    assert records[1][1] == b"drawing-group-continued"
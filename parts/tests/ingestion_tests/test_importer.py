@@ -7,10 +7,18 @@ from unittest.mock import patch
 import pytest
 from django.core.files.base import ContentFile
 from django.test import override_settings
+from django.utils import timezone
 from PIL import Image
 
-from parts.ingestion.importer import resolve_display_name, import_book, import_pricing
-from parts.models import Part, PartsModel, PartSection, SectionPart
+from parts.ingestion import importer
+from parts.ingestion.importer import resolve_display_name, import_book, import_pricing, rollback_book
+from parts.models import Part, PartPriceChange, PartsModel, PartSection, SectionPart
+from parts.overlap import (
+    equivalent_sections_for,
+    indexed_models_sharing_parts_with,
+    indexed_models_using_each_part_in,
+    models_using_each_part_in,
+)
 
 pytestmark = pytest.mark.django_db
 
@@ -120,6 +128,42 @@ class TestImportBook:
             assert image.read(4) == b"RIFF"
         assert section.diagram_source_hash == hashlib.sha256(source_bytes).hexdigest()
 
+    def test_an_unreadable_diagram_does_not_abort_the_book(self):
+        parsed = _parsed()
+        parsed["sections"][0]["diagram_bytes"] = b"\x89PNG\r\n\x1a\n corrupt"
+
+        model = import_book(parsed, name="Classic 150", cc_class="100_165")
+
+        section = model.sections.get(code="E01")
+        assert not section.diagram_image
+        assert section.parts.count() == 2
+
+    def test_an_unreadable_diagram_falls_back_to_the_next_largest_blip(self):
+        parsed = _parsed()
+        corrupt = b"\x89PNG\r\n\x1a\n corrupt"
+        parsed["sections"][0]["diagram_bytes"] = corrupt
+        parsed["sections"][0]["diagram_fallbacks"] = [b"also corrupt", _png_bytes("red")]
+
+        model = import_book(parsed, name="Classic 150", cc_class="100_165")
+
+        section = model.sections.get(code="E01")
+        with section.diagram_image.open("rb") as image:
+            assert image.read(4) == b"RIFF"
+        assert section.diagram_source_hash == hashlib.sha256(corrupt).hexdigest()
+
+    def test_an_unreadable_diagram_is_recorded_and_not_decoded_again(self):
+        parsed = _parsed()
+        corrupt = b"\x89PNG\r\n\x1a\n corrupt"
+        parsed["sections"][0]["diagram_bytes"] = corrupt
+        model = import_book(parsed, name="Classic 150", cc_class="100_165")
+        assert model.sections.get(code="E01").diagram_source_hash == hashlib.sha256(corrupt).hexdigest()
+
+        with patch.object(importer, "cached_webp_bytes") as encode:
+            import_book(parsed, name="Classic 150", cc_class="100_165")
+
+        encode.assert_not_called()
+        assert not model.sections.get(code="E01").diagram_image
+
     def test_changed_source_diagram_clears_a_reviewed_crop(self):
         parsed = _parsed()
         parsed["sections"][0]["diagram_bytes"] = _png_bytes("red")
@@ -132,11 +176,16 @@ class TestImportBook:
 
         import_book(parsed, name="Classic 150", cc_class="100_165")
 
+        live = model.sections.live().get(code="E01")
+        assert not live.curated_diagram_image
+        assert live.curated_source_hash == ""
+        # The replaced build keeps its crop for a rollback.
         section.refresh_from_db()
-        assert not section.curated_diagram_image
-        assert section.curated_source_hash == ""
+        assert section.curated_diagram_image
 
-    def test_removing_a_section_deletes_its_curated_diagram(self, django_capture_on_commit_callbacks):
+    def test_removing_a_section_deletes_its_curated_diagram_once_it_cannot_be_rolled_back_to(
+        self, django_capture_on_commit_callbacks,
+    ):
         parsed = _parsed()
         parsed["sections"][0]["diagram_bytes"] = _png_bytes("red")
         model = import_book(parsed, name="Classic 150", cc_class="100_165")
@@ -149,10 +198,257 @@ class TestImportBook:
         with patch.object(storage, "delete") as delete:
             with django_capture_on_commit_callbacks(execute=True):
                 import_book(parsed, name="Classic 150", cc_class="100_165")
+            assert not model.sections.live().exists()
+            assert not delete.called
+
+            with django_capture_on_commit_callbacks(execute=True):
+                import_book(parsed, name="Classic 150", cc_class="100_165")
 
         assert not model.sections.exists()
         assert any(call.args == (curated_name,) for call in delete.call_args_list)
 
+    def test_query_count_does_not_grow_with_the_number_of_rows(self, django_assert_max_num_queries):
+        parsed = _parsed()
+        row = parsed["sections"][0]["parts"][0]
+        parsed["sections"][0]["parts"] = [
+            {**row, "ref_number": str(n), "part_number": f"1961A-F6A-{n:03d}", "sort_order": n}
+            for n in range(200)
+        ]
+        # A fixed handful of these claim the build and recompute the book's
+        # overlap and part-usage indexes.
+        with django_assert_max_num_queries(40):
+            import_book(parsed, name="Classic 150", cc_class="100_165")
+        parsed["sections"][0]["parts"][0]["description"] = "Changed"
+        with django_assert_max_num_queries(40):
+            import_book(parsed, name="Classic 150", cc_class="100_165")
+        assert SectionPart.objects.live().count() == 200
+        assert SectionPart.objects.live().filter(description="Changed").count() == 1
+
+    def test_repeated_source_rows_get_occurrence_keys_and_removed_rows_are_deleted(self):
+        parsed = _parsed()
+        first = parsed["sections"][0]["parts"][0]
+        parsed["sections"][0]["parts"].append({**first, "sort_order": 2})
+        model = import_book(parsed, name="Classic 150", cc_class="100_165")
+        keys = set(model.sections.get(code="E01").parts.values_list("fitment_key", flat=True))
+        assert "AX15W2-6:E01:1:1961A-F6A-000:original:2" in keys
+
+        parsed["sections"][0]["parts"].pop()
+        import_book(parsed, name="Classic 150", cc_class="100_165")
+
+        keys = set(model.sections.live().get(code="E01").parts.values_list("fitment_key", flat=True))
+        assert keys == {
+            "AX15W2-6:E01:1:1961A-F6A-000:original",
+            "AX15W2-6:E01:6:53205-ALA-000-RD:2013-05-01",
+        }
+
+    def test_book_refreshes_colour_structure_but_keeps_feed_description(self):
+        Part.objects.create(
+            part_number="53205-ALA-000-RD",
+            description="FEED DESCRIPTION",
+            wholesale_price_incl_gst=Decimal("143.00"),
+        )
+
+        import_book(_parsed(), name="Classic 150", cc_class="100_165")
+
+        part = Part.objects.get(part_number="53205-ALA-000-RD")
+        assert part.description == "FEED DESCRIPTION"
+        assert part.base_part_number == "53205-ALA-000"
+        assert part.colour_name == "Red"
+        assert part.wholesale_price_incl_gst == Decimal("143.00")
+
+    def test_unchanged_sections_are_skipped_and_changed_ones_reconciled(self):
+        parsed = _parsed()
+        second = {**parsed["sections"][0], "code": "E02", "name": "Crankcase", "sort_order": 1}
+        second["parts"] = [dict(row) for row in second["parts"]]
+        parsed["sections"].append(second)
+        model = import_book(parsed, name="Classic 150", cc_class="100_165")
+        assert all(model.sections.values_list("content_hash", flat=True))
+        # Mark rows of both sections so a rewrite would be visible.
+        SectionPart.objects.update(description="untouched")
+
+        parsed["sections"][1]["parts"][0]["quantity"] = 2
+        import_book(parsed, name="Classic 150", cc_class="100_165")
+
+        e01 = model.sections.live().get(code="E01")
+        e02 = model.sections.live().get(code="E02")
+        assert set(e01.parts.values_list("description", flat=True)) == {"untouched"}
+        assert e02.parts.get(ref_number="1").quantity == 2
+        assert e02.parts.get(ref_number="1").description == "Fan Cover Assy"
+        # Only the changed section got a new row in the new build.
+        model.refresh_from_db()
+        assert e01.added_in_version == model.previous_catalog_version
+        assert e02.added_in_version == model.catalog_version
+
+
+class TestCatalogVersions:
+    def _changed(self, parsed):
+        parsed["sections"][0]["parts"][0]["quantity"] = 3
+        return parsed
+
+    def test_a_new_build_is_invisible_until_published(self):
+        model = import_book(_parsed(), name="Classic 150", cc_class="100_165")
+        live_ids = set(SectionPart.objects.live().values_list("id", flat=True))
+        seen_mid_build = []
+
+        def publish(model, version, **kwargs):
+            seen_mid_build.append(set(SectionPart.objects.live().values_list("id", flat=True)))
+            return real_publish(model, version, **kwargs)
+
+        real_publish = importer._publish
+        with patch.object(importer, "_publish", publish):
+            import_book(self._changed(_parsed()), name="Classic 150", cc_class="100_165")
+
+        assert seen_mid_build == [live_ids]
+        assert SectionPart.objects.live().get(ref_number="1").quantity == 3
+        model.refresh_from_db()
+        assert (model.previous_catalog_version, model.catalog_version) == (2, 3)
+
+    def test_a_failed_build_leaves_the_live_catalogue_alone(self):
+        model = import_book(_parsed(), name="Classic 150", cc_class="100_165")
+
+        with patch.object(importer, "_create_fitments", side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError):
+                import_book(self._changed(_parsed()), name="Classic 150", cc_class="100_165")
+
+        model.refresh_from_db()
+        assert model.catalog_version == 2
+        assert model.build_token == ""
+        assert SectionPart.objects.live().get(ref_number="1").quantity == 1
+        import_book(self._changed(_parsed()), name="Classic 150", cc_class="100_165")
+        assert SectionPart.objects.live().get(ref_number="1").quantity == 3
+
+    def test_an_overlapping_import_of_the_same_book_is_refused(self):
+        model = import_book(_parsed(), name="Classic 150", cc_class="100_165")
+        refused = []
+
+        def publish(model, version, **kwargs):
+            # A second run (say cron alongside a manual update) reaches the book mid-build.
+            with pytest.raises(RuntimeError, match="being imported by another run") as excinfo:
+                import_book(_parsed(), name="Classic 150", cc_class="100_165")
+            refused.append(excinfo.value)
+            return real_publish(model, version, **kwargs)
+
+        real_publish = importer._publish
+        with patch.object(importer, "_publish", publish):
+            import_book(self._changed(_parsed()), name="Classic 150", cc_class="100_165")
+
+        assert len(refused) == 1
+        model.refresh_from_db()
+        assert (model.catalog_version, model.build_token) == (3, "")
+        assert SectionPart.objects.live().get(ref_number="1").quantity == 3
+
+    def test_a_claim_left_by_a_dead_import_expires(self):
+        model = import_book(_parsed(), name="Classic 150", cc_class="100_165")
+        PartsModel.objects.filter(pk=model.pk).update(
+            build_token="dead", build_started_at=timezone.now() - importer.BUILD_CLAIM_TIMEOUT * 2,
+        )
+
+        import_book(self._changed(_parsed()), name="Classic 150", cc_class="100_165")
+
+        assert SectionPart.objects.live().get(ref_number="1").quantity == 3
+
+    def test_rollback_republishes_the_previous_build(self):
+        model = import_book(_parsed(), name="Classic 150", cc_class="100_165")
+        import_book(self._changed(_parsed()), name="Classic 150", cc_class="100_165")
+
+        model = rollback_book(model)
+
+        assert model.catalog_version == 2
+        assert SectionPart.objects.live().get(ref_number="1").quantity == 1
+        assert model.sections.live().count() == 1
+        with pytest.raises(ValueError, match="no previous catalogue version"):
+            rollback_book(model)
+
+        # The next import starts again from the rolled-back build.
+        import_book(_parsed(), name="Classic 150", cc_class="100_165")
+        assert PartSection.objects.count() == 1
+
+    def test_a_new_book_is_not_listed_until_published_and_cannot_be_rolled_back(self):
+        seen_mid_build = []
+
+        def publish(model, version, **kwargs):
+            seen_mid_build.append(PartsModel.objects.filter(is_active=True).exists())
+            return real_publish(model, version, **kwargs)
+
+        real_publish = importer._publish
+        with patch.object(importer, "_publish", publish):
+            model = import_book(_parsed(), name="Classic 150", cc_class="100_165")
+
+        assert seen_mid_build == [False]
+        assert model.is_active
+        with pytest.raises(ValueError):
+            rollback_book(model)
+
+
+class TestOverlapFollowsTheLiveBuild:
+    def _three_part_book(self, model_code):
+        parsed = _parsed(model_code)
+        row = parsed["sections"][0]["parts"][0]
+        parsed["sections"][0]["parts"].append({**row, "ref_number": "7", "part_number": "90101-KYK-000", "sort_order": 2})
+        return parsed
+
+    def _twins(self, model):
+        section = model.sections.live().get(code="E01")
+        return [match["model_code"] for match in equivalent_sections_for([section]).get(section.id, [])]
+
+    def test_identical_sections_match_both_ways_and_follow_the_live_build(self):
+        classic = import_book(self._three_part_book("AX15W2-6"), name="Classic 150")
+        fiddle = import_book(self._three_part_book("AW12W-6"), name="Fiddle 125")
+        section = classic.sections.live().get(code="E01")
+        assert section.part_count == 3
+        assert section.part_set_hash == fiddle.sections.live().get(code="E01").part_set_hash
+        assert self._twins(classic) == ["AW12W-6"]
+        assert self._twins(fiddle) == ["AX15W2-6"]
+
+        changed = self._three_part_book("AW12W-6")
+        changed["sections"][0]["parts"].pop()
+        fiddle = import_book(changed, name="Fiddle 125")
+        assert self._twins(classic) == []
+
+        # The replaced build's sections keep their hashes, so rolling back needs no re-index.
+        rollback_book(fiddle)
+        assert self._twins(classic) == ["AW12W-6"]
+
+    def test_books_sharing_parts_follow_each_live_build(self):
+        classic = import_book(self._three_part_book("AX15W2-6"), name="Classic 150")
+        changed = self._three_part_book("AW12W-6")
+        changed["sections"][0]["parts"].pop()
+        fiddle = import_book(changed, name="Fiddle 125")
+
+        [shared] = indexed_models_sharing_parts_with(classic)
+        assert (shared["model_code"], shared["shared_part_count"], shared["shared_part_percentage"]) == (
+            "AW12W-6", 2, 66.7,
+        )
+        assert indexed_models_sharing_parts_with(fiddle)[0]["shared_part_percentage"] == 100.0
+
+        import_book(self._three_part_book("AW12W-6"), name="Fiddle 125")
+        assert indexed_models_sharing_parts_with(classic)[0]["shared_part_count"] == 3
+
+        rollback_book(fiddle)
+        assert indexed_models_sharing_parts_with(classic)[0]["shared_part_count"] == 2
+
+    def test_books_using_each_part_follow_each_live_build(self):
+        classic = import_book(self._three_part_book("AX15W2-6"), name="Classic 150")
+        changed = self._three_part_book("AW12W-6")
+        changed["sections"][0]["parts"].pop()
+        fiddle = import_book(changed, name="Fiddle 125")
+        section = classic.sections.live().get(code="E01")
+
+        def using():
+            return {number: [m["model_code"] for m in models]
+                    for number, models in indexed_models_using_each_part_in(section).items()}
+
+        assert "90101-KYK-000" not in using()
+        import_book(self._three_part_book("AW12W-6"), name="Fiddle 125")
+        assert using()["90101-KYK-000"] == ["AW12W-6"]
+
+        rollback_book(fiddle)
+        assert "90101-KYK-000" not in using()
+        assert using() == {
+            number: [m["model_code"] for m in models]
+            for number, models in models_using_each_part_in(section).items()
+        }
+
 
 class TestImportPricing:
     def test_applies_price_and_availability(self):
@@ -201,6 +497,47 @@ class TestImportPricing:
         part = Part.objects.get(part_number='1640A-XJA-000')
         assert part.wholesale_price_incl_gst == Decimal('600.00')
 
+    def test_streams_rows_in_batches_with_last_row_winning(self):
+        Part.objects.create(part_number="OLD-PART", in_pa_feed=True)
+
+        def rows():
+            for index in range(5):
+                yield {"part_number": f"p-{index}", "description": f"Part {index}",
+                       "available": index, "price": Decimal("1.00")}
+            # A repeat in a later batch overrides the first row.
+            yield {"part_number": "P-0", "description": "Part 0", "available": 9, "price": Decimal("2.00")}
+
+        applied = import_pricing(rows(), batch_size=2)
+
+        assert applied == 5
+        assert Part.objects.filter(part_number__startswith="P-").count() == 5
+        repeated = Part.objects.get(part_number="P-0")
+        assert (repeated.available_qty, repeated.wholesale_price_incl_gst) == (9, Decimal("2.00"))
+        assert Part.objects.get(part_number="OLD-PART").in_pa_feed is False
+
+    def test_reimport_writes_only_changed_parts_and_records_price_history(self):
+        rows = [
+            {"part_number": "1961A-F6A-000", "description": "Fan Cover Assy", "available": 5, "price": Decimal("60.00")},
+            {"part_number": "1640A-XJA-000", "description": "ECU SET", "available": 1, "price": Decimal("600.00")},
+        ]
+        import_pricing(rows)
+        fan_cover = Part.objects.get(part_number="1961A-F6A-000")
+
+        rows[1] = {**rows[1], "price": Decimal("620.00")}
+        import_pricing(rows)
+
+        unchanged = Part.objects.get(part_number="1961A-F6A-000")
+        assert (unchanged.updated_at, unchanged.price_updated_at) == (fan_cover.updated_at, fan_cover.price_updated_at)
+        assert list(
+            PartPriceChange.objects.order_by("changed_at", "part__part_number").values_list(
+                "part__part_number", "previous_price", "wholesale_price_incl_gst",
+            )
+        ) == [
+            ("1640A-XJA-000", None, Decimal("600.00")),
+            ("1961A-F6A-000", None, Decimal("60.00")),
+            ("1640A-XJA-000", Decimal("600.00"), Decimal("620.00")),
+        ]
+
 
 # --- display names ---------------------------------------------------------
 
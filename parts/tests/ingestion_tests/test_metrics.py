@@ -0,0 +1,66 @@
+from parts.ingestion import metrics, pool
+
+
+def _square(value):
+    with metrics.stage("square", book=f"book-{value % 2}") as counts:
+        counts.rows = 1
+        counts.bytes = value
+        return value * value
+
+
+def test_stages_record_only_inside_a_recording():
+    _square(3)
+
+    with metrics.recording() as recorder:
+        _square(3)
+        with metrics.book("E01.xls"), metrics.stage("outer"):
+            _square(4)
+
+    snapshot = recorder.snapshot()
+    assert snapshot["stages"]["square"]["calls"] == 2
+    assert snapshot["stages"]["square"]["bytes"] == 7
+    assert snapshot["stages"]["outer"]["calls"] == 1
+    assert snapshot["stages"]["outer"]["seconds"] >= 0
+    assert set(snapshot["books"]) == {"book-0", "book-1", "E01.xls"}
+    assert metrics.summary_lines(snapshot)[0].startswith(("square:", "outer:"))
+
+
+def test_nested_stages_are_ranked_by_their_own_time(monkeypatch):
+    clock = iter([0.0, 1.0, 4.0, 5.0])
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(clock))
+
+    with metrics.recording() as recorder:
+        with metrics.stage("import_book"), metrics.stage("diagram_webp_bytes"):
+            pass
+
+    stages = recorder.snapshot()["stages"]
+    assert (stages["import_book"]["seconds"], stages["import_book"]["self_seconds"]) == (5.0, 2.0)
+    assert stages["diagram_webp_bytes"]["self_seconds"] == 3.0
+    assert metrics.summary_lines(recorder.snapshot()) == [
+        "diagram_webp_bytes: 3.0s over 1 calls",
+        "import_book: 5.0s over 1 calls (2.0s outside nested stages)",
+    ]
+
+
+def test_a_book_can_be_renamed_once_its_file_is_named():
+    with metrics.recording() as recorder:
+        with metrics.book("https://example.test/Jet-14.xls"), metrics.stage("download") as counts:
+            counts.bytes = 10
+        with metrics.book("Jet-14-abc.xls"), metrics.stage("parse_book"):
+            pass
+        metrics.rename_book("https://example.test/Jet-14.xls", "Jet-14-abc.xls")
+
+    assert set(recorder.snapshot()["books"]) == {"Jet-14-abc.xls"}
+    assert set(recorder.snapshot()["books"]["Jet-14-abc.xls"]) == {"download", "parse_book"}
+
+
+def test_pool_workers_report_their_stages_back():
+    with metrics.recording() as recorder:
+        results = list(pool.bounded_map(_square, range(6), workers=2))
+
+    assert [result for _, result, _ in results] == [value * value for value in range(6)]
+    snapshot = recorder.snapshot()
+    assert snapshot["stages"]["square"] == {
+        **snapshot["stages"]["square"], "calls": 6, "rows": 6, "bytes": 15,
+    }
+    assert snapshot["books"]["book-1"]["square"]["bytes"] == 1 + 3 + 5
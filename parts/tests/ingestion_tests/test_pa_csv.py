@@ -1,6 +1,8 @@
 from decimal import Decimal
 
-from parts.ingestion.pa_csv import iter_pa_rows
+import pytest
+
+from parts.ingestion.pa_csv import iter_pa_rows, iter_pa_rows_pandas
 
 
 def _write(tmp_path, text):
@@ -49,3 +51,33 @@ def test_normalizes_part_number_case(tmp_path):
     rows = list(iter_pa_rows(_write(tmp_path, csv_text)))
 
     assert rows[0]['part_number'] == '1640A-XJA-000'
+
+
+def test_pandas_parser_matches_csv_parser(tmp_path):
+    csv_text = (
+        "﻿PART NUMBER,DESCRIPTION,AVAILABLE, RRP+GST ,ADD GST\n"
+        "0454-X01-000,THRUST WASHER 14MM,10,$0.66,ADD GST\n"
+        "\n"
+        " abc-1 ,  PADDED  , 3.9 ,\"$1,234.50\",\n"
+        "PART NUMBER,DESCRIPTION,AVAILABLE,RRP+GST,ADD GST\n"
+        "SHORT-1,ONLY TWO\n"
+        "LONG-1,EXTRA,-2.5,$5.00,ADD GST,x,y\n"
+        "BAD-1,BAD NUMBERS,lots,POA,\n"
+        "INF-1,INFINITE,inf,$,\n"
+        ",NO PART NUMBER,1,$1.00,\n"
+        "53205-ala-000-rd,FR. HANDLE COVER(R-010CA),0,$143.00,ADD GST\n"
+    )
+    path = _write(tmp_path, csv_text)
+
+    expected = list(iter_pa_rows(path))
+
+    assert list(iter_pa_rows_pandas(path)) == expected
+    assert list(iter_pa_rows_pandas(path, chunksize=2)) == expected
+    assert len(expected) == 7
+
+
+def test_pandas_parser_rejects_unexpected_header(tmp_path):
+    path = _write(tmp_path, "SKU,NAME,QTY,PRICE\nABC-1,THING,1,$1.00\n")
+
+    with pytest.raises(ValueError, match="unexpected header"):
+        list(iter_pa_rows_pandas(path))
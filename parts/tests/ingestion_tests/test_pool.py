@@ -0,0 +1,24 @@
+import pytest
+
+from parts.ingestion import pool
+
+
+def test_inline_map_keeps_order_and_reports_timings():
+    results = list(pool.bounded_map(abs, [-3, 2, -1], workers=1))
+
+    assert [(item, result) for item, result, _ in results] == [(-3, 3), (2, 2), (-1, 1)]
+    assert all(seconds >= 0 for _, _, seconds in results)
+
+
+def test_process_pool_map_keeps_input_order():
+    items = list(range(-20, 0))
+
+    results = list(pool.bounded_map(abs, items, workers=2, window=3))
+
+    assert [item for item, _, _ in results] == items
+    assert [result for _, result, _ in results] == [abs(item) for item in items]
+
+
+def test_worker_errors_reach_the_consumer():
+    with pytest.raises(TypeError):
+        list(pool.bounded_map(abs, [1, "not a number"], workers=2))
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from parts.ingestion.importer import import_pricing
+from parts.ingestion.staged_pricing import import_pricing_staged
+from parts.models import Part, PartPriceChange, PartPriceStaging
+
+pytestmark = pytest.mark.django_db
+
+COMPARED_FIELDS = (
+    "part_number", "description", "base_part_number", "colour_suffix", "paint_code",
+    "colour_name", "wholesale_price_incl_gst", "available_qty", "in_pa_feed",
+)
+
+
+def _catalogue():
+    Part.objects.create(part_number="OLD-PART", description="Gone", in_pa_feed=True)
+    Part.objects.create(
+        part_number="53205-ALA-000-RD", base_part_number="53205-ALA-000", colour_suffix="RD",
+        description="Book description", in_pa_feed=True,
+    )
+    Part.objects.create(part_number="1640A-XJA-000", description="ECU SET")
+
+
+def _feed():
+    yield {"part_number": "53205-ala-000-rd", "description": "FR. Handle Cover(R-010CA)",
+           "available": 0, "price": Decimal("143.00")}
+    yield {"part_number": "1640A-XJA-000", "description": "", "available": 2, "price": None}
+    yield {"part_number": "64301-XJA-000-BK", "description": "Cover(NH-1)", "available": 7,
+           "price": Decimal("12.50")}
+    yield {"part_number": "NEW-PART", "description": "First row", "available": 1, "price": Decimal("1.00")}
+    yield {"part_number": "NEW-PART", "description": "Last row", "available": 3, "price": Decimal("3.00")}
+
+
+def _snapshot():
+    return list(Part.objects.order_by("part_number").values_list(*COMPARED_FIELDS))
+
+
+def _ledger():
+    return sorted(PartPriceChange.objects.values_list(
+        "part__part_number", "wholesale_price_incl_gst", "available_qty",
+        "previous_price", "previous_available",
+    ))
+
+
+def test_staged_import_matches_the_batched_import():
+    _catalogue()
+    expected_applied = import_pricing(_feed(), batch_size=2)
+    expected = _snapshot()
+    expected_ledger = _ledger()
+    Part.objects.all().delete()
+
+    _catalogue()
+    applied = import_pricing_staged(_feed(), batch_size=2)
+
+    assert applied == expected_applied == 4
+    assert _snapshot() == expected
+    assert _ledger() == expected_ledger
+    assert not PartPriceStaging.objects.exists()
+
+
+def test_staged_import_sets_price_timestamps_and_can_leave_missing_parts(django_assert_max_num_queries):
+    _catalogue()
+
+    with django_assert_max_num_queries(12):
+        import_pricing_staged(_feed(), mark_missing_unavailable=False)
+
+    assert Part.objects.get(part_number="OLD-PART").in_pa_feed is True
+    new_part = Part.objects.get(part_number="NEW-PART")
+    assert new_part.price_updated_at is not None
+    assert new_part.created_at == new_part.updated_at == new_part.price_updated_at
+
+
+def test_staged_reimport_writes_only_changed_parts():
+    _catalogue()
+    import_pricing_staged(_feed())
+    untouched = Part.objects.get(part_number="64301-XJA-000-BK")
+
+    def changed_feed():
+        for row in _feed():
+            if row["part_number"] == "1640A-XJA-000":
+                row = {**row, "available": 0}
+            yield row
+
+    import_pricing_staged(changed_feed())
+
+    assert Part.objects.get(part_number="64301-XJA-000-BK").updated_at == untouched.updated_at
+    assert list(
+        PartPriceChange.objects.filter(part__part_number="1640A-XJA-000")
+        .values_list("previous_available", "available_qty")
+    ) == [(None, 2), (2, 0)]
+
+
+def test_first_ledger_rows_come_only_from_parts_this_run_inserted(monkeypatch):
+    # Two runs stamped with the same instant: the earlier run's new part must
+    # not be mistaken for one this run created.
+    now = timezone.now()
+    monkeypatch.setattr(timezone, "now", lambda: now)
+    import_pricing_staged([{"part_number": "NEW-PART", "description": "", "available": 1, "price": Decimal("1.00")}])
+
+    import_pricing_staged([
+        {"part_number": "NEW-PART", "description": "", "available": 1, "price": Decimal("1.00")},
+        {"part_number": "LATER-PART", "description": "", "available": 2, "price": Decimal("2.00")},
+    ])
+
+    assert _ledger() == [
+        ("LATER-PART", Decimal("2.00"), 2, None, None),
+        ("NEW-PART", Decimal("1.00"), 1, None, None),
+    ]
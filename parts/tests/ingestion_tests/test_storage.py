@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+from unittest.mock import patch
+
+from parts.ingestion import storage
+
+
+def _hashed_names(calls):
+    return sorted(call.args[0].name for call in calls)
+
+
+def test_archive_manifest_rehashes_only_new_or_changed_files():
+    archive = storage.archive_dir("books")
+    (archive / "a.xls").write_bytes(b"first")
+    (archive / "b.xls").write_bytes(b"second")
+
+    with patch.object(storage, "sha256_file", wraps=storage.sha256_file) as hasher:
+        assert storage.archived_hashes("books") == {
+            storage.sha256_bytes(b"first"), storage.sha256_bytes(b"second"),
+        }
+        assert _hashed_names(hasher.call_args_list) == ["a.xls", "b.xls"]
+
+        hasher.reset_mock()
+        storage.archived_hashes("books")
+        assert hasher.call_count == 0
+
+        (archive / "b.xls").write_bytes(b"second, edited")
+        os.utime(archive / "b.xls", ns=(1, 1))
+        by_hash = storage.archived_files_by_hash("books")
+        assert _hashed_names(hasher.call_args_list) == ["b.xls"]
+        assert by_hash[storage.sha256_bytes(b"second, edited")] == [archive / "b.xls"]
+
+
+def test_queue_file_records_its_hash_and_verify_rebuilds_the_manifest():
+    storage.queue_file("pricing", "PA-2026-01-01.csv", b"csv")
+
+    manifest = json.loads(storage.manifest_path("pricing").read_text(encoding="utf-8"))
+    assert manifest["PA-2026-01-01.csv"]["sha256"] == storage.sha256_bytes(b"csv")
+
+    with patch.object(storage, "sha256_file", wraps=storage.sha256_file) as hasher:
+        assert storage.archived_hashes("pricing") == {storage.sha256_bytes(b"csv")}
+        assert hasher.call_count == 0
+        storage.archived_hashes("pricing", verify=True)
+        assert hasher.call_count == 1
+
+
+def test_queueing_and_annotating_from_two_threads_loses_no_manifest_entries():
+    names = [f"book-{index}.xls" for index in range(40)]
+    queued = []
+    errors = []
+
+    def scrape():
+        try:
+            for name in names:
+                storage.queue_file("books", name, name.encode())
+                queued.append(name)
+        except Exception as exc:
+            errors.append(exc)
+
+    def annotate():
+        # The pipeline's writer annotates each book soon after it is queued.
+        try:
+            while scraper.is_alive():
+                storage.annotate_archive("books", {name: {"model_code": name} for name in list(queued)})
+            storage.annotate_archive("books", {name: {"model_code": name} for name in queued})
+        except Exception as exc:
+            errors.append(exc)
+
+    scraper = threading.Thread(target=scrape)
+    writer = threading.Thread(target=annotate)
+    scraper.start()
+    writer.start()
+    scraper.join()
+    writer.join()
+
+    assert errors == []
+    manifest = json.loads(storage.manifest_path("books").read_text(encoding="utf-8"))
+    assert sorted(manifest) == sorted(names)
+    assert all(manifest[name]["model_code"] == name for name in names)
+    assert not list(storage.manifest_path("books").parent.glob("*.tmp"))
@@ -0,0 +1,67 @@
+import olefile
+
+from parts.ingestion import synthetic_books
+from parts.ingestion.escher_images import extract_diagrams
+from parts.ingestion.synthetic_books import write_book, write_catalogue
+from parts.ingestion.xls_parser import parse_book, read_model_code
+
+
+def test_synthetic_book_parses_like_a_sym_book(tmp_path):
+    path = write_book(tmp_path / "book.xls", model_code="SB07W1-2", name_hint="TEST", sections=6, parts_per_section=12)
+
+    parsed = parse_book(path)
+
+    assert parsed["model_code"] == "SB07W1-2"
+    assert parsed["model_name_hint"] == "TEST"
+    assert parsed["colour_index"] == {"R-010CA": "Red", "BK-001": "Black", "WH-204P": "White", "BU-2957C": "Blue"}
+    assert [section["code"] for section in parsed["sections"]] == ["E01", "E02", "E03", "F01", "F02", "F03"]
+    assert {section["group"] for section in parsed["sections"][:3]} == {"engine"}
+    for section in parsed["sections"]:
+        assert len(section["parts"]) == 12
+        assert section["name"] != section["code"]
+        assert all(part["effective_date"] is not None for part in section["parts"])
+    # Every third diagram is a JPEG; the shared logo is never picked.
+    formats = [section["diagram_bytes"][:3] for section in parsed["sections"]]
+    assert formats == [b"\x89PN", b"\x89PN", b"\xff\xd8\xff"] * 2
+    # ...but is kept as the fallback should a diagram not encode.
+    logos = {section["diagram_fallbacks"][-1] for section in parsed["sections"]}
+    assert len(logos) == 1
+
+
+def test_synthetic_book_has_colour_variants_under_one_callout(tmp_path):
+    parsed = parse_book(write_book(tmp_path / "book.xls", sections=8, parts_per_section=30))
+
+    painted = [part for section in parsed["sections"] for part in section["parts"] if part["colour_suffix"]]
+    assert painted
+    assert all(part["paint_code"] and part["colour_name"] for part in painted)
+
+
+def test_synthetic_book_is_deterministic(tmp_path):
+    first = write_book(tmp_path / "a.xls", seed=4).read_bytes()
+    second = write_book(tmp_path / "b.xls", seed=4).read_bytes()
+
+    assert first == second
+    assert write_book(tmp_path / "c.xls", seed=5).read_bytes() != first
+
+
+def test_catalogue_books_share_part_numbers(tmp_path):
+    paths = write_catalogue(tmp_path, "small")
+
+    assert len(paths) == synthetic_books.CATALOGUE_SIZES["small"]["books"]
+    assert len({read_model_code(path) for path in paths}) == len(paths)
+    numbers = [
+        {part["base_part_number"] for section in parse_book(path)["sections"] for part in section["parts"]}
+        for path in paths
+    ]
+    assert numbers[0] & numbers[1]
+    assert len(extract_diagrams(paths[0])) == synthetic_books.CATALOGUE_SIZES["small"]["sections"]
+
+
+def test_compound_file_with_more_fat_sectors_than_the_header_lists(tmp_path):
+    # 8 MB needs more than the header's 109 FAT sectors, so DIFAT sectors follow.
+    stream = bytes(range(256)) * (8 * 1024 * 1024 // 256)
+    path = tmp_path / "big.xls"
+    path.write_bytes(synthetic_books._compound_file(stream))
+
+    with olefile.OleFileIO(str(path)) as ole:
+        assert ole.openstream("Workbook").read() == stream
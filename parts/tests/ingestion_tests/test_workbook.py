@@ -0,0 +1,48 @@
+import pytest
+
+from parts.ingestion import workbook
+from parts.ingestion.workbook import WorkbookFile
+from parts.ingestion.xls_parser import parse_book, read_model_code
+from parts.tests.ingestion_tests.sample_files import SAMPLE_XLS, SYNTHETIC_BOOK
+
+requires_sample = pytest.mark.skipif(not SAMPLE_XLS.exists(), reason="sample .xls not present")
+
+
+@pytest.fixture(params=["synthetic", pytest.param("sample", marks=requires_sample)])
+def book(request, synthetic_xls):
+    """``(path, model code)`` of the synthetic book, and of the sample when present."""
+    if request.param == "sample":
+        return SAMPLE_XLS, "AX15W2-6"
+    return synthetic_xls, SYNTHETIC_BOOK["model_code"]
+
+
+def test_parse_book_reads_and_unpacks_the_file_once(monkeypatch, book):
+    path, model_code = book
+    calls = []
+    original = workbook._workbook_stream
+    monkeypatch.setattr(workbook, "_workbook_stream", lambda data: calls.append(1) or original(data))
+
+    parsed = parse_book(str(path))
+
+    assert calls == [1]
+    assert parsed["model_code"] == model_code
+    assert all(section["diagram_bytes"] for section in parsed["sections"])
+
+
+def test_mmap_and_plain_reads_yield_the_same_stream(book):
+    path, _ = book
+    assert WorkbookFile(path, use_mmap=True).stream == WorkbookFile(path).stream
+
+
+def test_model_code_from_a_shared_handle(book):
+    path, model_code = book
+    assert read_model_code(WorkbookFile(path)) == model_code
+
+
+def test_the_stream_is_read_at_most_once(monkeypatch, synthetic_xls):
+    book = WorkbookFile(synthetic_xls, use_mmap=True)
+    first = book.stream
+    monkeypatch.setattr(workbook, "_workbook_stream", lambda data: pytest.fail("stream read twice"))
+
+    assert book.stream is first
+    assert book.open_book(on_demand=True).sheet_names()[0] == "No.index"
@@ -1,9 +1,13 @@
+from collections import defaultdict
+
 import pytest
 
+from parts.ingestion import synthetic_books
+from parts.ingestion.synthetic_books import part_number_pool
 from parts.ingestion.xls_parser import parse_book
-from parts.tests.ingestion_tests.sample_files import SAMPLE_XLS
+from parts.tests.ingestion_tests.sample_files import SAMPLE_XLS, SYNTHETIC_BOOK
 
-pytestmark = pytest.mark.skipif(not SAMPLE_XLS.exists(), reason="sample .xls not present")
+requires_sample = pytest.mark.skipif(not SAMPLE_XLS.exists(), reason="sample .xls not present")
 
 
 @pytest.fixture(scope="module")
@@ -11,15 +15,71 @@ def parsed():
     return parse_book(str(SAMPLE_XLS))
 
 
+@pytest.fixture(scope="module")
+def synthetic(synthetic_xls):
+    return parse_book(str(synthetic_xls))
+
+
+def test_synthetic_model_code_and_name_hint(synthetic):
+    assert synthetic["model_code"] == SYNTHETIC_BOOK["model_code"]
+    assert synthetic["model_name_hint"] == SYNTHETIC_BOOK["name_hint"]
+
+
+def test_synthetic_sections_in_sheet_order(synthetic):
+    assert [(s["code"], s["group"], s["sort_order"]) for s in synthetic["sections"]] == [
+        ("E01", "engine", 0), ("E02", "engine", 1), ("E03", "engine", 2),
+        ("F01", "frame", 3), ("F02", "frame", 4), ("F03", "frame", 5),
+    ]
+    titles = {english for _, english in synthetic_books._SECTION_TITLES}
+    for section in synthetic["sections"]:
+        # The English half of the bilingual title, not the sheet code or the Chinese.
+        assert section["name"] in titles
+        assert section["diagram_bytes"] is not None
+        assert len(section["parts"]) == SYNTHETIC_BOOK["parts_per_section"]
+
+
+def test_synthetic_parts_rows(synthetic):
+    pool = set(part_number_pool(
+        SYNTHETIC_BOOK["sections"] * SYNTHETIC_BOOK["parts_per_section"], seed=SYNTHETIC_BOOK["seed"],
+    ))
+    for section in synthetic["sections"]:
+        assert [part["sort_order"] for part in section["parts"]] == list(range(len(section["parts"])))
+        for part in section["parts"]:
+            assert part["base_part_number"] in pool
+            assert part["ref_number"].isdigit()
+            assert part["quantity"] in (1, 2, 4)
+            assert part["effective_date"].year in range(2012, 2025)
+            assert part["superseded_flag"] in ("", "*")
+
+
+def test_synthetic_colour_variants_share_a_callout_and_a_base_part(synthetic):
+    callouts = defaultdict(list)
+    for section in synthetic["sections"]:
+        for part in section["parts"]:
+            if part["colour_suffix"]:
+                callouts[section["code"], part["ref_number"]].append(part)
+    assert callouts
+    names = {paint_code: word.title() for _, word, paint_code in synthetic_books.COLOURS}
+    for variants in callouts.values():
+        assert len(variants) > 1
+        assert len({part["base_part_number"] for part in variants}) == 1
+        for part in variants:
+            assert part["part_number"] == f"{part['base_part_number']}-{part['colour_suffix']}"
+            assert part["colour_name"] == names[part["paint_code"]]
+
+
+@requires_sample
 def test_model_code(parsed):
     assert parsed["model_code"] == "AX15W2-6"
 
 
+@requires_sample
 def test_section_count(parsed):
     # 14 engine (E01-E14) + 23 frame (F01-F23) = 37.
     assert len(parsed["sections"]) == 37
 
 
+@requires_sample
 def test_e01_shroud_section(parsed):
     e01 = next(s for s in parsed["sections"] if s["code"] == "E01")
     assert e01["group"] == "engine"
@@ -29,12 +89,14 @@ def test_e01_shroud_section(parsed):
     assert "1961A-F6A-000" in part_numbers  # Fan Cover Assy, callout 1
 
 
+@requires_sample
 def test_e01_dated_variant_parsed(parsed):
     e01 = next(s for s in parsed["sections"] if s["code"] == "E01")
     dated = [p for p in e01["parts"] if p["effective_date"] is not None]
     assert dated, "expected at least one running-change (dated) part in E01"
 
 
+@requires_sample
 def test_f05_colour_variants(parsed):
     f05 = next(s for s in parsed["sections"] if s["code"] == "F05")
     colour_variants = [p for p in f05["parts"] if p["colour_suffix"]]
@@ -0,0 +1,60 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from parts.ingestion.synthetic_books import write_catalogue
+from parts.models import Part, PartsModel
+
+pytestmark = pytest.mark.django_db
+
+
+def test_benchmark_catalogue_saves_stage_timings_and_rolls_back(tmp_path, settings):
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    output = tmp_path / "results.json"
+    out = StringIO()
+
+    call_command("benchmark_catalogue", "--sizes", "small", "--output", str(output), stdout=out)
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    stages = report["sizes"]["small"]["stages"]
+    for name in ("parse_book", "extract_diagrams", "import_book", "reimport_book", "import_pricing"):
+        assert stages[name]["calls"] >= 1
+    assert report["sizes"]["small"]["books"] == 2
+    assert stages["parse_book"]["rows"] == 2 * 8 * 15
+    assert "small: 2 books, 240 parts" in out.getvalue()
+    assert not PartsModel.objects.exists()
+    assert not Part.objects.exists()
+    assert not (tmp_path / "media").exists()
+
+
+def test_benchmark_catalogue_reuses_books_and_compares_against_an_earlier_run(tmp_path):
+    books = tmp_path / "books"
+    written = {path: path.stat().st_mtime_ns for path in write_catalogue(books / "small-0", "small")}
+    baseline = tmp_path / "baseline.json"
+    stage = {"calls": 1, "seconds": 100.0, "rows": 0, "bytes": 0}
+    baseline.write_text(json.dumps({"commit": "abc123", "sizes": {"small": {"stages": {"import_book": stage}}}}))
+    out = StringIO()
+
+    call_command(
+        "benchmark_catalogue", "--sizes", "small", "--books-dir", str(books),
+        "--output", str(tmp_path / "results.json"), "--compare", str(baseline), stdout=out,
+    )
+
+    assert {path: path.stat().st_mtime_ns for path in written} == written
+    assert "Against abc123:" in out.getvalue()
+    assert "small import_book: 100.00s -> " in out.getvalue()
+    assert "small parse_book" not in out.getvalue()
+
+
+def test_benchmark_catalogue_refuses_a_database_holding_a_catalogue(tmp_path):
+    PartsModel.objects.create(name="Fiddle II", model_code="AX15W2-6", slug="fiddle-ii")
+
+    with pytest.raises(CommandError, match="holds a parts catalogue"):
+        call_command(
+            "benchmark_catalogue", "--sizes", "small", "--output", str(tmp_path / "results.json"),
+            stdout=StringIO(),
+        )
+    assert not (tmp_path / "results.json").exists()
@@ -0,0 +1,41 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from parts.ingestion import storage
+from parts.ingestion.escher_images import extract_diagrams
+from parts.ingestion.synthetic_books import write_book
+from parts.management.commands import _escher_reference, benchmark_ingestion
+
+
+def test_benchmark_requires_books(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'BASE_DIR', tmp_path)
+
+    with pytest.raises(CommandError):
+        call_command('benchmark_ingestion', stdout=StringIO())
+
+
+def test_benchmark_times_the_original_extractor_and_checks_agreement(tmp_path):
+    book = write_book(tmp_path / 'book.xls', sections=4, parts_per_section=3, diagram_size=(64, 48))
+    out = StringIO()
+
+    call_command('benchmark_ingestion', str(book), '--repeat', '1', stdout=out)
+
+    assert 'book.xls: extract_diagrams ' in out.getvalue()
+    assert 'original ' in out.getvalue() and '(4 diagrams)' in out.getvalue()
+    assert 'Both extractors chose identical diagrams.' in out.getvalue()
+
+
+def test_the_reference_extractor_is_the_original_decode_every_blip_path(tmp_path, monkeypatch):
+    book = write_book(tmp_path / 'book.xls', sections=2, parts_per_section=3, diagram_size=(64, 48))
+    decoded = []
+    original = _escher_reference._decode_blip_body
+    monkeypatch.setattr(
+        _escher_reference, '_decode_blip_body', lambda body: decoded.append(1) or original(body),
+    )
+
+    assert benchmark_ingestion._reference_extract_diagrams(str(book)) == extract_diagrams(str(book))
+    # The logo and both diagrams, referenced or not.
+    assert len(decoded) == 3
@@ -0,0 +1,14 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+
+def test_benchmark_pa_csv_times_both_parsers_and_checks_they_agree():
+    out = StringIO()
+
+    call_command("benchmark_pa_csv", "--rows", "200", "--repeat", "1", stdout=out)
+
+    assert "csv: " in out.getvalue()
+    assert "pandas: " in out.getvalue()
+    assert "200 rows" in out.getvalue()
+    assert "Both parsers yielded identical rows." in out.getvalue()
@@ -0,0 +1,29 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from parts.models import Part
+
+
+@pytest.mark.django_db
+def test_benchmark_pricing_reports_each_engine_and_rolls_back():
+    out = StringIO()
+
+    call_command("benchmark_pricing", "--rows", "50", "--repeat", "1", stdout=out)
+
+    assert "batched: first load" in out.getvalue()
+    assert "staged: first load" in out.getvalue()
+    assert not Part.objects.exists()
+
+
+@pytest.mark.django_db
+def test_benchmark_pricing_refuses_a_database_holding_a_catalogue():
+    Part.objects.create(part_number="LIVE-PART", in_pa_feed=True)
+
+    with pytest.raises(CommandError, match="holds a parts catalogue"):
+        call_command("benchmark_pricing", "--rows", "50", "--repeat", "1", stdout=StringIO())
+    with pytest.raises(CommandError, match="Unknown database alias 'scratch'"):
+        call_command("benchmark_pricing", "--database", "scratch", stdout=StringIO())
+    assert list(Part.objects.values_list("part_number", "in_pa_feed")) == [("LIVE-PART", True)]
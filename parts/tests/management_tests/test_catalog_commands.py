@@ -4,10 +4,12 @@ from unittest.mock import patch
 
 import pytest
 from django.core.management import call_command
+from django.core.management.base import CommandError
 
 from parts.ingestion import storage
+from parts.ingestion.pa_csv import iter_pa_rows
 from parts.management.utils import scrape_parts, update_parts, update_prices
-from parts.models import PartsModel
+from parts.models import Part, PartsModel, PartSection, SectionPart
 
 
 def test_scrape_parts_routes_to_parts_utility():
@@ -64,6 +66,43 @@ def test_parts_archive_selects_newest_version_of_each_model(tmp_path, monkeypatc
     assert old_a.exists() and new_a.exists() and only_b.exists()
 
 
+def test_parallel_parts_update_skips_hash_matches_and_imports_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'BASE_DIR', tmp_path)
+    inbox = storage.inbox_dir('books')
+    for name in ('a.xls', 'b.xls', 'c.xls'):
+        (inbox / name).write_bytes(name.encode())
+
+    monkeypatch.setattr(
+        update_parts,
+        '_already_imported',
+        lambda path, meta, book_hash, **kwargs: path.name == 'b.xls',
+    )
+    # Run the pool stage inline; the real process pool is covered in test_pool.
+    monkeypatch.setattr(
+        update_parts.pool,
+        'bounded_map',
+        lambda func, items, workers: ((item, {'model_code': item}, 0.0) for item in items),
+    )
+    written = []
+    monkeypatch.setattr(
+        update_parts,
+        '_write_book',
+        lambda path, parsed, **kwargs: written.append((path.name, parsed['model_code'])),
+    )
+
+    count = update_parts.run(stdout=StringIO(), stderr=StringIO(), workers=2)
+
+    assert count == 3
+    assert written == [('a.xls', str(inbox / 'a.xls')), ('c.xls', str(inbox / 'c.xls'))]
+    assert list(inbox.glob('*.xls')) == []
+
+
+def test_update_workers_flag_is_forwarded():
+    with patch('data_management.management.commands.update.update_parts.run') as run:
+        call_command('update', '--parts', '--workers', '4', stdout=StringIO(), stderr=StringIO())
+    assert run.call_args.kwargs['workers'] == 4
+
+
 def test_parts_scrape_adds_metadata_to_matching_legacy_archive(tmp_path, monkeypatch):
     monkeypatch.setattr(storage, 'BASE_DIR', tmp_path)
     legacy = storage.archive_dir('books') / 'legacy.xls'
@@ -77,8 +116,8 @@ def test_parts_scrape_adds_metadata_to_matching_legacy_archive(tmp_path, monkeyp
     monkeypatch.setattr(scrape_parts.source_page, 'parse_books', lambda html: [book])
     monkeypatch.setattr(
         scrape_parts.source_page,
-        'download_bytes',
-        lambda url, timeout: b'unchanged workbook',
+        'download',
+        lambda url, timeout, validators: (b'unchanged workbook', {}),
     )
 
     queued = scrape_parts.run(stdout=StringIO(), stderr=StringIO())
@@ -151,3 +190,106 @@ def test_normal_prices_update_consumes_inbox(tmp_path, monkeypatch):
     update_prices.run(stdout=StringIO(), archive=False)
 
     assert not inbox_file.exists()
+
+
+def test_scrape_verify_flag_is_forwarded():
+    with patch('parts.management.commands.scrape.scrape_prices.run') as run:
+        call_command('scrape', '--prices', '--verify', stdout=StringIO(), stderr=StringIO())
+    assert run.call_args.kwargs['verify'] is True
+
+
+def test_parts_archive_reads_each_model_code_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'BASE_DIR', tmp_path)
+    archive = storage.archive_dir('books')
+    _touch(archive / 'model-a.xls', 1)
+    _touch(archive / 'unknown.xls', 1)
+    opened = []
+
+    def read_model_code(path):
+        opened.append(os.path.basename(path))
+        return 'MODEL-A' if 'model-a' in path else None
+
+    monkeypatch.setattr(update_parts, 'read_model_code', read_model_code)
+
+    assert update_parts._latest_archived_books(stderr=StringIO()) == [archive / 'model-a.xls']
+    assert update_parts._latest_archived_books(stderr=StringIO()) == [archive / 'model-a.xls']
+    assert sorted(opened) == ['model-a.xls', 'unknown.xls']
+
+    # A book recorded at import time is never opened by the rebuild.
+    _touch(archive / 'model-a-new.xls', 2)
+    storage.archive_manifest('books')
+    storage.annotate_archive('books', {'model-a-new.xls': {'model_code': 'MODEL-A'}})
+    assert update_parts._latest_archived_books(stderr=StringIO()) == [archive / 'model-a-new.xls']
+    assert len(opened) == 2
+
+
+def _pa_csv(path, rows):
+    lines = ['PART NUMBER,DESCRIPTION,AVAILABLE,RRP+GST,ADD GST']
+    lines += [f'PN-{index},Part {index},1,$10.00,' for index in range(rows)]
+    path.write_text('\n'.join(lines), encoding='utf-8')
+    return path
+
+
+def test_pricing_guard_counts_only_up_to_the_minimum_then_streams(tmp_path):
+    with pytest.raises(ValueError, match='has only 5 rows'):
+        update_prices._validated_rows(_pa_csv(tmp_path / 'short.csv', 5))
+
+    rows = update_prices._validated_rows(_pa_csv(tmp_path / 'full.csv', update_prices.MIN_PRICING_ROWS + 50))
+
+    assert not isinstance(rows, list)
+    assert sum(1 for _ in rows) == update_prices.MIN_PRICING_ROWS + 50
+
+
+def test_pandas_flag_parses_prices_with_pandas(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'BASE_DIR', tmp_path)
+    _pa_csv(storage.inbox_dir('pricing') / 'PA-current.csv', update_prices.MIN_PRICING_ROWS)
+    imported = []
+    monkeypatch.setattr(update_prices, 'import_pricing', lambda rows: imported.extend(rows) or len(imported))
+    parsed = []
+    monkeypatch.setattr(
+        update_prices, 'iter_pa_rows_pandas', lambda path: parsed.append(path) or iter_pa_rows(path),
+    )
+
+    call_command('update', '--prices', '--pandas', stdout=StringIO())
+
+    assert len(parsed) == 2
+    assert len(imported) == update_prices.MIN_PRICING_ROWS
+
+
+@pytest.mark.django_db
+def test_rollback_book_flips_to_the_previous_catalogue_version():
+    model = PartsModel.objects.create(
+        name='Classic 150', model_code='AX15W2-6', cc_class='100_165', slug='classic-150',
+        catalog_version=3, previous_catalog_version=2,
+    )
+    out = StringIO()
+
+    call_command('rollback_book', 'ax15w2-6', stdout=out)
+
+    model.refresh_from_db()
+    assert (model.catalog_version, model.previous_catalog_version) == (2, None)
+    assert 'back on catalogue version 2' in out.getvalue()
+    with pytest.raises(CommandError, match='no previous catalogue version'):
+        call_command('rollback_book', 'AX15W2-6', stdout=StringIO())
+
+
+@pytest.mark.django_db
+def test_rebuild_overlap_index_rebuilds_and_checks_the_stored_overlap():
+    parts = [Part.objects.create(part_number=f'1000{n}-AAA-000') for n in range(3)]
+    for model_code in ('AX15W2-6', 'AW12W-6'):
+        model = PartsModel.objects.create(name=model_code, model_code=model_code, slug=model_code.lower())
+        section = PartSection.objects.create(parts_model=model, code='E01', group='engine', name='Shroud')
+        for part in parts:
+            SectionPart.objects.create(section=section, part=part, ref_number='1')
+
+    with pytest.raises(CommandError, match='4 books or sections are out of date'):
+        call_command('rebuild_overlap_index', '--check', stdout=StringIO(), stderr=StringIO())
+
+    out = StringIO()
+    call_command('rebuild_overlap_index', stdout=out)
+    assert (
+        'Refreshed 2 part-set hashes; indexed 2 model overlaps and 6 part usages.'
+    ) in out.getvalue()
+    out = StringIO()
+    call_command('rebuild_overlap_index', '--check', stdout=out)
+    assert 'Index matches for all 2 books and 2 live sections.' in out.getvalue()
@@ -1,4 +1,4 @@
-from io import BytesIO
+from io import BytesIO, StringIO
 
 import pytest
 from django.core.files.base import ContentFile
@@ -6,7 +6,8 @@ from django.core.management import call_command
 from django.test import override_settings
 from PIL import Image
 
-from parts.models import PartSection
+from parts.management.commands import convert_parts_diagrams_webp as command
+from parts.models import PartSection, PartsSettings
 from parts.tests.factories.parts_factories import PartSectionFactory
 
 
@@ -26,6 +27,7 @@ def test_converts_referenced_source_and_curated_diagrams(tmp_path):
         section.save()
         source_name = section.diagram_image.name
         curated_name = section.curated_diagram_image.name
+        version = PartsSettings.get().catalogue_version
 
         call_command("convert_parts_diagrams_webp")
 
@@ -39,6 +41,8 @@ def test_converts_referenced_source_and_curated_diagrams(tmp_path):
         storage = PartSection._meta.get_field("diagram_image").storage
         assert not storage.exists(source_name)
         assert not storage.exists(curated_name)
+        # Cached payloads named the deleted files.
+        assert PartsSettings.get().catalogue_version != version
 
 
 @pytest.mark.django_db
@@ -58,3 +62,62 @@ def test_dry_run_and_curated_only_leave_source_untouched(tmp_path):
         section.refresh_from_db()
         assert section.diagram_image.name.endswith(".png")
         assert section.curated_diagram_image.name.endswith(".webp")
+
+
+@pytest.mark.django_db
+def test_resumes_after_the_checkpointed_section_and_clears_it(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        done, pending = PartSectionFactory(), PartSectionFactory()
+        for section in (done, pending):
+            section.diagram_image.save("source.png", ContentFile(_png_bytes("red")), save=False)
+            section.save()
+        command.write_checkpoint(("diagram_image",), done.pk)
+
+        out = StringIO()
+        call_command("convert_parts_diagrams_webp", "--source-only", stdout=out)
+
+        done.refresh_from_db()
+        pending.refresh_from_db()
+        assert done.diagram_image.name.endswith(".png")
+        assert pending.diagram_image.name.endswith(".webp")
+        assert f"Resuming after section {done.pk}." in out.getvalue()
+        assert "images/sec" in out.getvalue()
+        assert not command.checkpoint_path().exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_workers_encode_in_parallel_and_write_from_the_main_process(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        sections = [PartSectionFactory() for _ in range(3)]
+        for index, section in enumerate(sections):
+            section.diagram_image.save(f"source-{index}.png", ContentFile(_png_bytes("red")), save=False)
+            section.save()
+
+        call_command("convert_parts_diagrams_webp", "--workers", "2")
+
+        for section in sections:
+            section.refresh_from_db()
+            with section.diagram_image.open("rb") as image:
+                assert image.read(4) == b"RIFF"
+
+
+@pytest.mark.django_db
+def test_a_file_shared_by_two_builds_is_converted_once_for_both(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        rollback = PartSectionFactory(added_in_version=1, retired_in_version=2)
+        live = PartSectionFactory(parts_model=rollback.parts_model, code=rollback.code, added_in_version=2)
+        rollback.diagram_image.save("legacy.png", ContentFile(_png_bytes("red")), save=True)
+        live.diagram_image = rollback.diagram_image.name
+        live.save()
+        legacy_name = rollback.diagram_image.name
+
+        out = StringIO()
+        call_command("convert_parts_diagrams_webp", stdout=out)
+
+        rollback.refresh_from_db()
+        live.refresh_from_db()
+        assert live.diagram_image.name == rollback.diagram_image.name
+        with live.diagram_image.open("rb") as image:
+            assert image.read(4) == b"RIFF"
+        assert not live.diagram_image.storage.exists(legacy_name)
+        assert "Converted 1 diagram files" in out.getvalue()
@@ -1,10 +1,21 @@
+import json
+import threading
+import time
 from io import StringIO
+from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 from django.core.management import call_command
 from django.core.management.base import CommandError
 
+from parts.ingestion import metrics, storage
+from parts.ingestion.synthetic_books import part_number_pool, write_book
+from parts.management.commands import sync
+from parts.models import SyncRun
+
+pytestmark = pytest.mark.django_db
+
 
 def _patch_all():
     return (
@@ -57,3 +68,236 @@ def test_failed_scrape_skips_matching_update_but_not_the_other():
     up.assert_not_called()
     upr.assert_called_once()
     assert 'portal down' in err.getvalue()
+
+
+def test_pipeline_imports_each_book_while_the_scrape_is_still_running(tmp_path, monkeypatch):
+    events = []
+    inbox = storage.inbox_dir('books')
+
+    def scrape_books(*, on_queued, **kwargs):
+        for name in ('a.xls', 'b.xls'):
+            path = inbox / name
+            path.write_bytes(name.encode())
+            events.append(f'queued {name}')
+            on_queued(path)
+            # Wait until the writer has taken this book before "downloading" the next.
+            deadline = time.monotonic() + 5
+            while f'imported {name}' not in events and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+    monkeypatch.setattr(sync.scrape_parts, 'run', scrape_books)
+    monkeypatch.setattr(sync.scrape_prices, 'run', lambda **kwargs: events.append('scraped prices'))
+    monkeypatch.setattr(sync.update_parts, '_already_imported', lambda *args, **kwargs: False)
+    monkeypatch.setattr(sync.update_parts, 'parse_book', lambda path: {'model_code': path})
+    monkeypatch.setattr(
+        sync.update_parts,
+        '_write_book',
+        lambda path, parsed, **kwargs: events.append(f'imported {path.name}'),
+    )
+
+    with patch('data_management.management.commands.update.update_prices.run') as update_prices:
+        update_prices.side_effect = lambda **kwargs: events.append('imported prices')
+        call_command('sync', '--pipeline', stdout=StringIO(), stderr=StringIO())
+
+    assert [event for event in events if 'prices' not in event] == [
+        'queued a.xls', 'imported a.xls', 'queued b.xls', 'imported b.xls',
+    ]
+    assert events.index('imported prices') > events.index('scraped prices')
+    assert list(inbox.glob('*.xls')) == []
+
+
+def test_pipeline_parses_in_spawned_workers_while_scrape_threads_run(monkeypatch):
+    inbox = storage.inbox_dir('books')
+    written = []
+
+    def scrape_books(*, on_queued, **kwargs):
+        for index, model_code in enumerate(('AX15W2-6', 'AW12W-6', 'AV12W-8')):
+            path = inbox / f'{model_code}.xls'
+            write_book(
+                path, model_code=model_code, name_hint='FIDDLE', sections=2, parts_per_section=3,
+                diagram_size=(32, 24), seed=index, part_numbers=part_number_pool(6, seed=index),
+            )
+            on_queued(path)
+
+    monkeypatch.setattr(sync.scrape_parts, 'run', scrape_books)
+    monkeypatch.setattr(sync.scrape_prices, 'run', lambda **kwargs: None)
+    monkeypatch.setattr(sync.update_parts, '_already_imported', lambda *args, **kwargs: False)
+    monkeypatch.setattr(
+        sync.update_parts,
+        '_write_book',
+        lambda path, parsed, **kwargs: written.append((path.name, parsed['model_code'], len(parsed['sections']))),
+    )
+
+    with patch('data_management.management.commands.update.update_prices.run'):
+        call_command('sync', '--pipeline', '--workers', '2', stdout=StringIO(), stderr=StringIO())
+
+    assert written == [
+        ('AX15W2-6.xls', 'AX15W2-6', 2),
+        ('AW12W-6.xls', 'AW12W-6', 2),
+        ('AV12W-8.xls', 'AV12W-8', 2),
+    ]
+
+
+def test_pipeline_imports_a_book_queued_twice_once(monkeypatch):
+    inbox = storage.inbox_dir('books')
+    written = []
+
+    def scrape_books(*, on_queued, **kwargs):
+        for name, body in (('a.xls', b'same'), ('b.xls', b'other'), ('a-copy.xls', b'same')):
+            path = inbox / name
+            path.write_bytes(body)
+            on_queued(path)
+
+    monkeypatch.setattr(sync.scrape_parts, 'run', scrape_books)
+    monkeypatch.setattr(sync.scrape_prices, 'run', lambda **kwargs: None)
+    monkeypatch.setattr(sync.update_parts, 'parse_book', lambda path: {'model_code': path})
+    # Nothing reaches the database, so only the run itself can catch the copy.
+    monkeypatch.setattr(
+        sync.update_parts, '_write_book', lambda path, parsed, **kwargs: written.append(path.name),
+    )
+    out = StringIO()
+
+    with patch('data_management.management.commands.update.update_prices.run'):
+        call_command('sync', '--pipeline', stdout=out, stderr=StringIO())
+
+    assert written == ['a.xls', 'b.xls']
+    assert 'Skipped a-copy.xls: same file as a.xls.' in out.getvalue()
+    assert list(inbox.glob('*.xls')) == []
+
+
+def test_pipeline_keeps_failure_reporting_and_skips(monkeypatch):
+    monkeypatch.setattr(sync.scrape_parts, 'run', lambda **kwargs: None)
+
+    def fail_prices(**kwargs):
+        raise RuntimeError('pricing link missing')
+
+    monkeypatch.setattr(sync.scrape_prices, 'run', fail_prices)
+    leftover = storage.inbox_dir('books') / 'left.xls'
+    leftover.write_bytes(b'left')
+    imported = []
+    monkeypatch.setattr(
+        sync.update_parts,
+        'import_books',
+        lambda paths, **kwargs: imported.extend(path.name for path in paths),
+    )
+    err = StringIO()
+    out = StringIO()
+
+    with patch('data_management.management.commands.update.update_prices.run') as update_prices:
+        with pytest.raises(CommandError, match='scrape --prices'):
+            call_command('sync', '--pipeline', stdout=out, stderr=err)
+
+    update_prices.assert_not_called()
+    assert imported == ['left.xls']
+    assert 'scrape --prices failed: pricing link missing' in err.getvalue()
+    assert 'Skipping update --prices' in out.getvalue()
+
+
+def _scrape_then_fail(events, failed):
+    inbox = storage.inbox_dir('books')
+
+    def scrape_books(*, on_queued, **kwargs):
+        for name in ('a.xls', 'b.xls'):
+            path = inbox / name
+            path.write_bytes(name.encode())
+            on_queued(path)
+            deadline = time.monotonic() + 5
+            while name == 'a.xls' and 'imported a.xls' not in events and time.monotonic() < deadline:
+                time.sleep(0.01)
+        failed.set()
+        raise RuntimeError('disk full')
+
+    return scrape_books
+
+
+def _parse_after_failure(failed):
+    def parse(path):
+        if path.endswith('b.xls'):
+            # Hold b back until the scrape has failed, as a slow parse would.
+            failed.wait(5)
+            time.sleep(0.2)
+        return {'model_code': path}
+
+    return parse
+
+
+@pytest.mark.parametrize(
+    ('flags', 'imported', 'left'),
+    [
+        ((), ['a.xls'], ['b.xls', 'left.xls']),
+        (('--import-partial-scrape',), ['a.xls', 'b.xls'], ['left.xls']),
+    ],
+)
+def test_pipeline_stops_importing_when_the_parts_scrape_fails(monkeypatch, flags, imported, left):
+    events = []
+    failed = threading.Event()
+    inbox = storage.inbox_dir('books')
+    (inbox / 'left.xls').write_bytes(b'left')
+    monkeypatch.setattr(sync.scrape_parts, 'run', _scrape_then_fail(events, failed))
+    monkeypatch.setattr(sync.scrape_prices, 'run', lambda **kwargs: None)
+    monkeypatch.setattr(sync.update_parts, 'parse_book', _parse_after_failure(failed))
+    monkeypatch.setattr(
+        sync.update_parts,
+        '_write_book',
+        lambda path, parsed, **kwargs: events.append(f'imported {path.name}'),
+    )
+    err = StringIO()
+    out = StringIO()
+
+    with patch('data_management.management.commands.update.update_prices.run') as update_prices:
+        with pytest.raises(CommandError, match='scrape --parts'):
+            call_command('sync', '--pipeline', *flags, stdout=out, stderr=err)
+
+    update_prices.assert_called_once()
+    assert events == [f'imported {name}' for name in imported]
+    assert sorted(path.name for path in inbox.glob('*.xls')) == left
+    assert 'scrape --parts failed: disk full' in err.getvalue()
+    assert 'Skipping update --parts' in out.getvalue()
+
+
+def test_pipeline_records_every_book_while_scrape_and_import_share_the_manifest(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    model_codes = [f'AX{index}W-6' for index in range(6)]
+
+    def scrape_books(*, on_queued, **kwargs):
+        for index, model_code in enumerate(model_codes):
+            source = tmp_path / f'{model_code}.xls'
+            write_book(
+                source, model_code=model_code, name_hint='FIDDLE', sections=1, parts_per_section=2,
+                diagram_size=(16, 12), seed=index, part_numbers=part_number_pool(2, seed=index),
+            )
+            # The real writer: the import thread annotates the manifest as this one adds to it.
+            on_queued(storage.queue_file('books', source.name, source.read_bytes(), metadata={'name': model_code}))
+
+    monkeypatch.setattr(sync.scrape_parts, 'run', scrape_books)
+    monkeypatch.setattr(sync.scrape_prices, 'run', lambda **kwargs: None)
+
+    with patch('data_management.management.commands.update.update_prices.run'):
+        call_command('sync', '--pipeline', stdout=StringIO(), stderr=StringIO())
+
+    manifest = storage.archive_manifest('books')
+    assert sorted(manifest) == sorted(f'{code}.xls' for code in model_codes)
+    assert all(manifest[f'{code}.xls']['model_code'] == code for code in model_codes)
+    assert all(entry['sha256'] for entry in manifest.values())
+    assert list(storage.inbox_dir('books').glob('*.xls')) == []
+
+
+def test_sync_writes_a_stage_report_and_records_the_run():
+    def update_prices(**kwargs):
+        with metrics.stage('import_pricing') as counts:
+            counts.rows = 120
+
+    patches = _patch_all()
+    with patches[0], patches[1], patches[2], patches[3] as upr:
+        upr.side_effect = update_prices
+        out = StringIO()
+        call_command('sync', stdout=out, stderr=StringIO())
+
+    run = SyncRun.objects.get()
+    assert run.succeeded and not run.pipeline
+    assert run.stages['import_pricing']['rows'] == 120
+    report = json.loads(Path(run.report_path).read_text(encoding='utf-8'))
+    assert Path(run.report_path).parent == storage.reports_dir()
+    assert report['stages'] == run.stages
+    assert report['failures'] == []
+    assert 'import_pricing: ' in out.getvalue()
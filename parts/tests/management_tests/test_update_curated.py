@@ -1,4 +1,4 @@
-from io import BytesIO
+from io import BytesIO, StringIO
 
 import pytest
 from django.core.files.base import ContentFile
@@ -6,6 +6,7 @@ from django.core.management import call_command
 from django.test import override_settings
 from PIL import Image
 
+from parts.models import PartsSettings
 from parts.tests.factories.parts_factories import PartSectionFactory
 
 
@@ -31,12 +32,62 @@ def test_update_curated_links_a_manually_saved_diagram_and_converts_it_to_webp(t
         curated_dir.mkdir(parents=True)
         source_path = curated_dir / "AE05W6-RU_F06.png"
         source_path.write_bytes(_png_bytes("blue"))
+        version = PartsSettings.get().catalogue_version
 
         call_command("update", "--curated")
 
         section.refresh_from_db()
-        assert section.curated_diagram_image.name == "parts/curated-diagrams/AE05W6-RU_F06.webp"
+        assert section.curated_diagram_image.name == "parts/curated-diagrams/linked/AE05W6-RU_F06.webp"
         assert section.curated_source_hash == "source-fingerprint"
         assert section.display_diagram_image.name == section.curated_diagram_image.name
         assert not source_path.exists()
-        assert (curated_dir / "AE05W6-RU_F06.webp").read_bytes()[:4] == b"RIFF"
+        assert (curated_dir / "linked" / "AE05W6-RU_F06.webp").read_bytes()[:4] == b"RIFF"
+        assert PartsSettings.get().catalogue_version != version
+
+
+def _rebuilt_section(tmp_path):
+    """A live section sharing its files with its rollback build, crop linked in place."""
+    rollback = PartSectionFactory(
+        parts_model__model_code="AE05W6-RU", code="F06", diagram_source_hash="source-fingerprint",
+        curated_source_hash="source-fingerprint", added_in_version=1, retired_in_version=2,
+    )
+    rollback.parts_model.catalog_version = 2
+    rollback.parts_model.save()
+    rollback.diagram_image.save("source.png", ContentFile(_png_bytes("red")), save=False)
+    rollback.curated_diagram_image.save("AE05W6-RU_F06.webp", ContentFile(_png_bytes("blue")), save=False)
+    rollback.save()
+    live = PartSectionFactory(
+        parts_model=rollback.parts_model, code="F06", added_in_version=2,
+        diagram_image=rollback.diagram_image.name, diagram_source_hash="source-fingerprint",
+        curated_diagram_image=rollback.curated_diagram_image.name, curated_source_hash="source-fingerprint",
+    )
+    return rollback, live
+
+
+@pytest.mark.django_db
+def test_relinking_a_section_leaves_the_crop_its_rollback_build_shows(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        rollback, live = _rebuilt_section(tmp_path)
+        curated_dir = tmp_path / "parts" / "curated-diagrams"
+        (curated_dir / "AE05W6-RU_F06.png").write_bytes(_png_bytes("green"))
+
+        call_command("update", "--curated")
+        call_command("update", "--curated")
+
+        rollback.refresh_from_db()
+        live.refresh_from_db()
+        assert live.curated_diagram_image.name != rollback.curated_diagram_image.name
+        with rollback.curated_diagram_image.open("rb") as image:
+            assert image.read() == _png_bytes("blue")
+
+
+@pytest.mark.django_db
+def test_a_new_crop_keeps_the_file_its_rollback_build_shows(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        rollback, live = _rebuilt_section(tmp_path)
+
+        call_command("crop_parts_diagram", "AE05W6-RU", "F06", "--box", "0", "0", "2", "2", stdout=StringIO())
+
+        live.refresh_from_db()
+        assert live.curated_diagram_image.name != rollback.curated_diagram_image.name
+        assert rollback.curated_diagram_image.storage.exists(rollback.curated_diagram_image.name)
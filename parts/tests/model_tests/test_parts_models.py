@@ -86,6 +86,18 @@ class TestPartsSettings:
         assert PartsSettings.objects.count() == 1
         assert PartsSettings.get().markup_percentage == Decimal('30')
 
+    def test_saves_and_bumps_move_to_a_fresh_catalogue_version(self):
+        s = PartsSettings.get()
+        versions = {s.catalogue_version}
+        s.save(update_fields=['markup_percentage'])
+        versions.add(PartsSettings.get().catalogue_version)
+        PartsSettings.bump_catalogue_version()
+        versions.add(PartsSettings.get().catalogue_version)
+        # A stale instance saved after the bump must not bring a version back.
+        s.save()
+        versions.add(PartsSettings.get().catalogue_version)
+        assert len(versions) == 4
+
     def test_apply_markup(self):
         s = PartsSettings.get()
         s.markup_percentage = Decimal('25')
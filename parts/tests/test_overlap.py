@@ -1,6 +1,20 @@
 import pytest
 
-from parts.overlap import MINIMUM_PARTS, equivalent_sections_for
+from parts.keys import part_set_hash
+from parts.models import ModelOverlap, PartSection, PartsModel, PartUsage
+from parts.overlap import (
+    MINIMUM_PARTS,
+    equivalent_sections_for,
+    index_model_overlaps,
+    index_part_usage,
+    indexed_models_sharing_parts_with,
+    indexed_models_using_each_part_in,
+    models_sharing_parts_with,
+    models_using_each_part_in,
+    rebuild_model_overlaps,
+    rebuild_part_usage,
+    refresh_part_sets,
+)
 from parts.tests.factories import (
     PartFactory,
     PartSectionFactory,
@@ -15,6 +29,9 @@ def build(model, code, parts):
     section = PartSectionFactory(parts_model=model, code=code)
     for index, part in enumerate(parts):
         SectionPartFactory(section=section, part=part, ref_number=str(index + 1))
+    # The importer hashes a section's parts as it builds it.
+    refresh_part_sets(PartSection.objects.filter(pk=section.pk))
+    section.refresh_from_db()
     return section
 
 
@@ -113,3 +130,104 @@ def test_a_whole_model_resolves_in_one_pass(parts):
 
 def test_no_sections_is_handled(parts):
     assert equivalent_sections_for([]) == {}
+
+
+def test_twins_outside_the_live_build_are_not_offered(parts):
+    mine = PartsModelFactory(model_code="AV12W-8", slug="orbit-125")
+    other = PartsModelFactory(model_code="AW12W-6", slug="classic-125", catalog_version=2)
+    section = build(mine, "E06", parts[:4])
+    theirs = build(other, "E06", parts[:4])
+    theirs.retired_in_version = 2
+    theirs.save()
+
+    assert equivalent_sections_for([section]) == {}
+
+
+def test_the_part_set_hash_ignores_order_case_and_repeats():
+    assert part_set_hash(["b-1", "A-1", "B-1 "]) == part_set_hash(["A-1", "B-1"])
+    assert part_set_hash(["A-1", "B-1"])[1] == 2
+    assert part_set_hash(["A-1", "B-1"]) != part_set_hash(["A-1", "B-2"])
+
+
+def test_twins_are_found_in_one_query(parts, django_assert_num_queries):
+    mine = PartsModelFactory(model_code="AV12W-8", slug="orbit-125")
+    sections = [build(mine, f"E0{n}", parts[n:n + 3]) for n in range(3)]
+    for index in range(3):
+        other = PartsModelFactory(model_code=f"AW1{index}W-6", slug=f"other-{index}")
+        build(other, "E01", parts[index:index + 3])
+
+    with django_assert_num_queries(1):
+        results = equivalent_sections_for(sections)
+
+    assert [len(results[section.id]) for section in sections] == [1, 1, 1]
+
+
+def _overlap_rows():
+    return set(
+        ModelOverlap.objects.values_list("model_id", "other_model_id", "shared_part_count", "shared_part_percentage")
+    )
+
+
+def test_stored_book_overlap_matches_the_computed_ranking(parts):
+    mine = PartsModelFactory(name="Mine", model_code="AV12W-8", slug="orbit-125")
+    build(mine, "E01", parts[:4])
+    build(mine, "E02", parts[3:6])
+    others = []
+    for index, shared in enumerate([parts[:6], parts[:2], parts[4:5]]):
+        other = PartsModelFactory(name=f"Other {index}", model_code=f"AW1{index}W-6", slug=f"other-{index}")
+        build(other, "E01", shared + [PartFactory()])
+        others.append(other)
+    PartsModelFactory(name="Retired", model_code="ZZ99W-8", slug="old", is_active=False)
+    build(PartsModel.objects.get(slug="old"), "E01", parts[:6])
+
+    rebuild_model_overlaps()
+
+    for model in [mine, *others]:
+        assert indexed_models_sharing_parts_with(model) == models_sharing_parts_with(model)
+    assert [row["shared_part_count"] for row in indexed_models_sharing_parts_with(mine)] == [6, 2, 1]
+    assert indexed_models_sharing_parts_with(others[1])[0]["shared_part_percentage"] == round(100 * 2 / 3, 1)
+
+
+def test_indexing_one_book_matches_a_full_rebuild(parts):
+    mine = PartsModelFactory(model_code="AV12W-8", slug="orbit-125")
+    other = PartsModelFactory(model_code="AW12W-6", slug="classic-125")
+    third = PartsModelFactory(model_code="AW13W-6", slug="third")
+    build(other, "E01", parts[:4])
+    build(third, "E01", parts[2:6])
+    rebuild_model_overlaps()
+    build(mine, "E01", parts[1:5])
+
+    index_model_overlaps(mine)
+    incremental = _overlap_rows()
+    rebuild_model_overlaps()
+
+    assert incremental == _overlap_rows()
+    assert len(incremental) == 6
+
+
+def test_stored_part_usage_matches_the_computed_books_per_part(parts):
+    mine = PartsModelFactory(name="Mine", model_code="AV12W-8", slug="orbit-125")
+    section = build(mine, "E01", parts[:4])
+    build(PartsModelFactory(name="Classic", model_code="AW12W-6", slug="classic"), "E01", parts[:2])
+    build(PartsModelFactory(name="Bravo", model_code="AW13W-6", slug="bravo"), "E02", parts[1:3])
+    build(PartsModelFactory(name="Old", model_code="ZZ99W-8", slug="old", is_active=False), "E01", parts[:4])
+
+    rebuild_part_usage()
+
+    indexed = indexed_models_using_each_part_in(section)
+    assert indexed == models_using_each_part_in(section)
+    assert [m["slug"] for m in indexed[parts[1].part_number]] == ["bravo", "classic"]
+    assert parts[3].part_number not in indexed
+
+
+def test_part_usage_keeps_the_first_listing_in_book_order(parts):
+    mine = PartsModelFactory(model_code="AV12W-8", slug="orbit-125")
+    later = PartSectionFactory(parts_model=mine, code="E01", sort_order=2)
+    earlier = PartSectionFactory(parts_model=mine, code="E02", sort_order=1)
+    SectionPartFactory(section=later, part=parts[0], ref_number="1")
+    SectionPartFactory(section=earlier, part=parts[0], ref_number="4")
+
+    assert index_part_usage(mine) == 1
+    assert PartUsage.objects.values_list("section_id", "ref_number").get() == (earlier.id, "4")
+    assert rebuild_part_usage() == 1
+    assert PartUsage.objects.values_list("section_id", "ref_number").get() == (earlier.id, "4")
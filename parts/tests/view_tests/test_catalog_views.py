@@ -4,7 +4,10 @@ from decimal import Decimal
 import pytest
 from rest_framework.test import APIClient
 
+from parts import payload_cache
+from parts.ingestion.importer import import_book, import_pricing
 from parts.models import PartsSettings
+from parts.overlap import rebuild_model_overlaps, rebuild_part_usage
 from parts.tests.factories import (
     PartFactory,
     PartSectionFactory,
@@ -58,6 +61,18 @@ class TestModelDetail:
         model = PartsModelFactory(is_active=False)
         assert client.get(f"/api/parts/models/{model.slug}/").status_code == 404
 
+    def test_only_the_published_catalogue_version_is_served(self, client):
+        model = PartsModelFactory(catalog_version=2)
+        PartSectionFactory(parts_model=model, code="E01", name="Retired", added_in_version=1, retired_in_version=2)
+        PartSectionFactory(parts_model=model, code="E01", name="Live", added_in_version=2)
+        shadow = PartSectionFactory(parts_model=model, code="E01", name="Shadow", added_in_version=3)
+
+        resp = client.get(f"/api/parts/models/{model.slug}/")
+
+        assert [section["name"] for section in resp.json()["sections"]] == ["Live"]
+        assert client.get(f"/api/parts/models/{model.slug}/sections/E01/").json()["name"] == "Live"
+        assert client.get(f"/api/parts/sections/{shadow.pk}/").status_code == 404
+
     def test_lists_the_top_five_models_by_shared_part_overlap(self, client):
         mine = PartsModelFactory(name="Current", model_code="CURRENT-1", slug="current")
         source = PartSectionFactory(parts_model=mine)
@@ -84,6 +99,8 @@ class TestModelDetail:
         other_book(5, 2)
         other_book(6, 1)
         other_book(7, 6, active=False)
+        # Imports keep this ranking; these fixtures were never imported.
+        rebuild_model_overlaps()
 
         response = client.get(f"/api/parts/models/{mine.slug}/")
 
@@ -94,7 +111,36 @@ class TestModelDetail:
         assert [row["shared_part_percentage"] for row in overlaps] == [100.0, 83.3, 66.7, 50.0, 33.3]
 
 
+def _book(description):
+    return {
+        "model_code": "AX15W2-6",
+        "model_name_hint": "FIDDLE II",
+        "colour_index": {},
+        "sections": [{
+            "code": "E01", "group": "engine", "name": "Shroud Assy", "sort_order": 0, "diagram_bytes": None,
+            "parts": [{
+                "ref_number": "1", "part_number": "1961A-F6A-000", "description": description,
+                "quantity": 1, "effective_date": None, "superseded_flag": "", "sort_order": 0,
+                "base_part_number": "1961A-F6A-000", "colour_suffix": "", "paint_code": "", "colour_name": "",
+            }],
+        }],
+    }
+
+
 class TestSectionDetail:
+    def test_a_rebuilt_section_keeps_answering_on_its_old_ids(self, client, settings_20pct):
+        first = import_book(_book("Fan Cover"), name="Fiddle II").sections.get()
+        import_book(_book("Fan Cover Assy"), name="Fiddle II")
+        # The third build prunes the first one's rows.
+        model = import_book(_book("Fan Cover Assy (L)"), name="Fiddle II")
+        second, live = model.sections.order_by("added_in_version")
+
+        for old in (first, second):
+            response = client.get(f"/api/parts/sections/{old.id}/")
+            assert response.status_code == 200
+            assert response.json()["id"] == live.id
+            assert response.json()["callouts"][0]["variants"][0]["description"] == "Fan Cover Assy (L)"
+        assert client.get("/api/parts/sections/999999/").status_code == 404
     def test_sales_setting_is_included_in_section_payload(self, client, settings_20pct):
         section = PartSectionFactory()
         PartsSettings.get().save()
@@ -168,12 +214,64 @@ class TestSectionDetail:
         assert any("from" in lbl for lbl in labels)
 
 
+class TestPayloadCache:
+    def test_section_payload_is_served_from_cache_until_the_catalogue_changes(self, client, settings_20pct):
+        section = PartSectionFactory(code="F05")
+        part = PartFactory(part_number="53205-ALA-000-RD", wholesale_price_incl_gst=Decimal("100"))
+        SectionPartFactory(section=section, ref_number="1", part=part)
+        payload_cache.reset_counts()
+
+        def price(url):
+            return client.get(url).json()["callouts"][0]["variants"][0]["price"]
+
+        assert price(f"/api/parts/sections/{section.id}/") == "120.00"
+        # Both section routes share the entry.
+        assert price(f"/api/parts/models/{section.parts_model.slug}/sections/F05/") == "120.00"
+        assert payload_cache.counts() == {"hits": 1, "misses": 1}
+
+        import_pricing([
+            {"part_number": part.part_number, "description": "", "available": 3, "price": Decimal("50")},
+        ])
+        assert price(f"/api/parts/sections/{section.id}/") == "60.00"
+
+        settings_20pct.markup_percentage = Decimal("10")
+        settings_20pct.save()
+        assert price(f"/api/parts/sections/{section.id}/") == "55.00"
+        assert payload_cache.counts() == {"hits": 1, "misses": 3}
+
+    def test_model_detail_is_cached_by_catalogue_version(self, client, settings_20pct):
+        section = PartSectionFactory(name="Frame Body Cover")
+        url = f"/api/parts/models/{section.parts_model.slug}/"
+        payload_cache.reset_counts()
+
+        assert client.get(url).json()["sections"][0]["name"] == "Frame Body Cover"
+        section.name = "Front Cover"
+        section.save()
+        assert client.get(url).json()["sections"][0]["name"] == "Frame Body Cover"
+        PartsSettings.bump_catalogue_version()
+        assert client.get(url).json()["sections"][0]["name"] == "Front Cover"
+        assert payload_cache.counts() == {"hits": 1, "misses": 2}
+
+    def test_payloads_use_a_cache_of_their_own(self, client, settings_20pct):
+        from django.core.cache import cache, caches
+
+        section = PartSectionFactory()
+        client.get(f"/api/parts/sections/{section.id}/")
+        cache.clear()
+        payload_cache.reset_counts()
+        client.get(f"/api/parts/sections/{section.id}/")
+        assert payload_cache.counts() == {"hits": 1, "misses": 0}
+        assert caches[payload_cache.CACHE_ALIAS] is not cache
+
+
 class TestSearch:
     def test_part_number_match(self, client, settings_20pct):
         section = PartSectionFactory()
         part = PartFactory(part_number="53205-ALA-000-RD", description="FR Handle Cover",
                            wholesale_price_incl_gst=Decimal("100"))
         SectionPartFactory(section=section, ref_number="6", part=part)
+        # Imports keep this index; these fixtures were never imported.
+        rebuild_part_usage()
         resp = client.get("/api/parts/search/?q=53205")
         assert resp.status_code == 200
         pns = [p["part_number"] for p in resp.json()["parts"]]
@@ -182,6 +280,27 @@ class TestSearch:
         assert hit["price"] == "120.00"
         assert hit["sections"][0]["section_id"] == section.id
 
+    def test_part_lists_each_active_book_once_in_name_order(self, client, settings_20pct):
+        part = PartFactory(part_number="90145-M9Q-000")
+        books = [
+            PartsModelFactory(name="Orbit", model_code="AV12W-8", slug="orbit"),
+            PartsModelFactory(name="Classic", model_code="AW12W-6", slug="classic"),
+            PartsModelFactory(name="Old", model_code="ZZ99W-8", slug="old", is_active=False),
+        ]
+        for book in books:
+            first = PartSectionFactory(parts_model=book, code="E01", sort_order=1)
+            SectionPartFactory(section=first, ref_number="3", part=part)
+            SectionPartFactory(section=PartSectionFactory(parts_model=book, code="E02", sort_order=2), part=part)
+        rebuild_part_usage()
+
+        resp = client.get("/api/parts/search/?q=90145")
+
+        sections = resp.json()["parts"][0]["sections"]
+        assert [(s["model_slug"], s["section_code"], s["ref_number"]) for s in sections] == [
+            ("classic", "E01", "3"),
+            ("orbit", "E01", "3"),
+        ]
+
     def test_model_match(self, client):
         PartsModelFactory(name="Classic 150", model_code="AX15W2-6")
         resp = client.get("/api/parts/search/?q=classic")
@@ -213,6 +332,8 @@ def test_section_payload_lists_other_books_using_the_same_part(client, settings_
     SectionPartFactory(section=section, part=only_here, ref_number="2")
     SectionPartFactory(section=PartSectionFactory(parts_model=other, code="F08"), part=shared)
     SectionPartFactory(section=PartSectionFactory(parts_model=retired, code="F08"), part=shared)
+    # Imports keep this index; these fixtures were never imported.
+    rebuild_part_usage()
 
     response = client.get(f"/api/parts/models/{mine.slug}/sections/F08/")
 
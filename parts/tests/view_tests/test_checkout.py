@@ -110,6 +110,39 @@ class TestCreatePartsOrderService:
             create_parts_order(customer=_customer(), items=[{
                 'part_number': p.part_number, 'section_part_id': section_part.id, 'quantity': 1,
             }])
+    def test_legacy_section_part_id_follows_its_fitment_into_later_builds(self, settings_fixture):
+        from parts.ingestion.importer import import_book
+
+        def book(quantity):
+            return {
+                'model_code': 'AX15W2-6', 'model_name_hint': '', 'colour_index': {},
+                'sections': [{
+                    'code': 'E01', 'group': 'engine', 'name': 'Shroud Assy', 'sort_order': 0, 'diagram_bytes': None,
+                    'parts': [{
+                        'ref_number': '1', 'part_number': 'A-1', 'description': 'Fan Cover', 'quantity': quantity,
+                        'effective_date': None, 'superseded_flag': '', 'sort_order': 0,
+                        'base_part_number': 'A-1', 'colour_suffix': '', 'paint_code': '', 'colour_name': '',
+                    }],
+                }],
+            }
+
+        import_book(book(1), name='Fiddle II')
+        PartFactory._meta.model.objects.filter(part_number='A-1').update(
+            wholesale_price_incl_gst=Decimal('10'), available_qty=5, in_pa_feed=True,
+        )
+        retired_ids = [SectionPart.objects.get().id]
+        import_book(book(2), name='Fiddle II')
+        retired_ids.append(SectionPart.objects.live().get().id)
+        # The third build prunes the first one's rows.
+        import_book(book(3), name='Fiddle II')
+        assert not SectionPart.objects.filter(id=retired_ids[0]).exists()
+
+        for section_part_id in retired_ids:
+            order = create_parts_order(customer=_customer(), items=[{
+                'part_number': 'A-1', 'section_part_id': section_part_id, 'quantity': 1,
+            }])
+            assert order.items.get().section_code == 'E01'
+
     def test_totals_with_markup_and_shipping(self, settings_fixture):
         p = PartFactory(part_number='A-1', wholesale_price_incl_gst=Decimal('100'), available_qty=5, in_pa_feed=True)
         SectionPartFactory(section=PartSectionFactory(), ref_number='1', part=p)
@@ -1,9 +1,11 @@
 """Public read API for the parts catalog (no auth)."""
 from django.db.models import Q
+from django.http import Http404
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
-from parts.models import Part, PartsModel, PartSection, PartsSettings, SectionPart
+from parts.models import Part, PartsModel, PartSection, PartsSettings, PartUsage
+from parts.payload_cache import cached_payload
 from parts.serializers.catalog_serializers import (
     PartsModelDetailSerializer,
     PartsModelListSerializer,
@@ -28,31 +30,40 @@ class PartsModelListView(PublicAPIView):
 
 class PartsModelDetailView(PublicAPIView):
     def get(self, request, slug):
-        model = get_object_or_404(
-            PartsModel.objects.prefetch_related("sections"), slug=slug, is_active=True
-        )
-        return Response(PartsModelDetailSerializer(model, context={"request": request}).data)
+        model = get_object_or_404(PartsModel, slug=slug, is_active=True)
+        settings = PartsSettings.get()
+        return Response(cached_payload(
+            "model", model.id, settings, request,
+            lambda: PartsModelDetailSerializer(model, context={"request": request}).data,
+        ))
 
 
 class SectionDetailView(PublicAPIView):
     def get(self, request, pk):
-        section = get_object_or_404(
-            PartSection.objects.select_related("parts_model"), pk=pk
-        )
+        # A section rebuilt by a later import has a new pk; old links follow it.
+        section = PartSection.objects.select_related("parts_model").live_successor(pk)
+        if section is None:
+            raise Http404
         settings = PartsSettings.get()
-        return Response(build_section_payload(section, settings, request=request))
+        return Response(cached_payload(
+            "section", section.id, settings, request,
+            lambda: build_section_payload(section, settings, request=request),
+        ))
 
 
 class ModelSectionDetailView(PublicAPIView):
     def get(self, request, slug, code):
         section = get_object_or_404(
-            PartSection.objects.select_related("parts_model"),
+            PartSection.objects.live().select_related("parts_model"),
             parts_model__slug=slug,
             parts_model__is_active=True,
             code__iexact=code,
         )
         settings = PartsSettings.get()
-        return Response(build_section_payload(section, settings, request=request))
+        return Response(cached_payload(
+            "section", section.id, settings, request,
+            lambda: build_section_payload(section, settings, request=request),
+        ))
 
 
 class VinLookupView(PublicAPIView):
@@ -88,7 +99,9 @@ class PartsSearchView(PublicAPIView):
         parts_qs = Part.objects.filter(
             Q(part_number__icontains=q) | Q(description__icontains=q)
         ).order_by("part_number")[:SEARCH_LIMIT]
-        parts = [self._part_result(p, settings) for p in parts_qs]
+        parts_list = list(parts_qs)
+        usages = self._usages(parts_list)
+        parts = [self._part_result(p, settings, usages.get(p.id, [])) for p in parts_list]
 
         models_qs = PartsModel.objects.filter(
             Q(name__icontains=q) | Q(model_code__icontains=q), is_active=True
@@ -97,19 +110,29 @@ class PartsSearchView(PublicAPIView):
 
         return Response({"query": q, "parts": parts, "models": models})
 
-    def _part_result(self, part, settings):
+    def _usages(self, parts):
+        """Each part's ``PartUsage`` rows in active books, fetched in one query."""
+        usages = {}
+        for usage in (
+            PartUsage.objects.filter(part__in=parts, model__is_active=True)
+            .select_related("section", "model")
+            .order_by("model__name", "model__model_code")
+        ):
+            usages.setdefault(usage.part_id, []).append(usage)
+        return usages
+
+    def _part_result(self, part, settings, usages):
         price = settings.apply_markup(part.wholesale_price_incl_gst)
         section_refs = [
             {
-                "section_id": sp.section_id,
-                "section_code": sp.section.code,
-                "section_name": sp.section.name,
-                "model_slug": sp.section.parts_model.slug,
-                "model_name": sp.section.parts_model.name,
-                "ref_number": sp.ref_number,
+                "section_id": usage.section_id,
+                "section_code": usage.section.code,
+                "section_name": usage.section.name,
+                "model_slug": usage.model.slug,
+                "model_name": usage.model.name,
+                "ref_number": usage.ref_number,
             }
-            for sp in SectionPart.objects.filter(part=part)
-            .select_related("section", "section__parts_model")[:10]
+            for usage in usages[:10]
         ]
         return {
             "part_number": part.part_number,